@@ -2,8 +2,9 @@
 PRAGMA foreign_keys = ON;
 
 -- Customers dimension
-CREATE TABLE customers (
-    customer_id INTEGER PRIMARY KEY,
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id INTEGER PRIMARY KEY,      -- surrogate key
+    source_customer_id INTEGER UNIQUE,    -- natural key (customerid)
     first_name TEXT,
     last_name TEXT,
     email TEXT,
@@ -15,8 +16,9 @@ CREATE TABLE customers (
 );
 
 -- Products dimension
-CREATE TABLE products (
-    product_id INTEGER PRIMARY KEY,
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER PRIMARY KEY,       -- surrogate key
+    source_product_id INTEGER UNIQUE,     -- natural key (productid)
     product_name TEXT,
     category TEXT,
     brand TEXT,               -- new column
@@ -25,21 +27,26 @@ CREATE TABLE products (
     stock_level INTEGER        -- new column
 );
 
--- Dates dimension
-CREATE TABLE dates (
-    date_id INTEGER PRIMARY KEY,
+-- Dates dimension (one row per calendar day, see date_dim.py)
+CREATE TABLE IF NOT EXISTS dates (
+    date_id INTEGER PRIMARY KEY,          -- YYYYMMDD
     date TEXT,
+    day INTEGER,
+    week INTEGER,             -- ISO week number
     month INTEGER,
     quarter INTEGER,
-    year INTEGER
+    year INTEGER,
+    weekday INTEGER           -- ISO weekday, 1 = Monday
 );
 
 -- Sales fact table
-CREATE TABLE sales (
+CREATE TABLE IF NOT EXISTS sales (
     sale_id INTEGER PRIMARY KEY,
     date_id INTEGER,
     customer_id INTEGER,
     product_id INTEGER,
+    store_id INTEGER,         -- new column
+    campaign_id INTEGER,      -- new column
     quantity INTEGER,
     sales_amount REAL,
     discount_rate REAL,       -- new column
@@ -49,3 +56,9 @@ CREATE TABLE sales (
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
     FOREIGN KEY (product_id) REFERENCES products(product_id)
 );
+
+-- Covering indexes on the fact foreign keys (the measure rides along so
+-- per-customer / per-product / per-date aggregates never touch the table)
+CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales (customer_id, sales_amount);
+CREATE INDEX IF NOT EXISTS idx_sales_product ON sales (product_id, sales_amount);
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (date_id, sales_amount);
@@ -12,8 +12,9 @@ JOIN products_prepared p ON s.productid = p.productid
 GROUP BY p.productid, p.category_1
 ORDER BY num_sales DESC;
 
--- Sales over time
-SELECT saledate, COUNT(transactionid) AS num_sales
-FROM sales_prepared
-GROUP BY saledate
-ORDER BY saledate;
+-- Sales over time (grouped on the integer date key, in calendar order)
+SELECT d.date, COUNT(s.transactionid) AS num_sales
+FROM sales_prepared s
+LEFT JOIN dates_prepared d ON d.date_id = s.date_id
+GROUP BY s.date_id
+ORDER BY s.date_id;
@@ -0,0 +1,32 @@
+-- Report queries against the star schema built by star_schema.py
+-- (same reports as queries.sql, answered through the fact indexes)
+
+-- Total sales per customer
+SELECT c.source_customer_id AS customerid, c.preferred_contact, s.num_sales
+FROM (
+    SELECT customer_id, COUNT(*) AS num_sales
+    FROM sales
+    GROUP BY customer_id
+) s
+JOIN customers c ON c.customer_id = s.customer_id
+ORDER BY s.num_sales DESC;
+
+-- Total sales per product
+SELECT p.source_product_id AS productid, p.supplier AS category_1, s.num_sales
+FROM (
+    SELECT product_id, COUNT(*) AS num_sales
+    FROM sales
+    GROUP BY product_id
+) s
+JOIN products p ON p.product_id = s.product_id
+ORDER BY s.num_sales DESC;
+
+-- Sales over time
+SELECT d.date, s.num_sales
+FROM (
+    SELECT date_id, COUNT(*) AS num_sales
+    FROM sales
+    GROUP BY date_id
+) s
+JOIN dates d ON d.date_id = s.date_id
+ORDER BY d.date_id;
@@ -0,0 +1,6 @@
+"""Run the pipeline DAG: ``python -m analytics_project`` (see orchestrator.py)."""
+
+from .orchestrator import main
+
+if __name__ == "__main__":  # spawned workers import this module as __mp_main__
+    raise SystemExit(main())
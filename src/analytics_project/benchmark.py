@@ -0,0 +1,248 @@
+"""Benchmark the ETL stages on synthetic data at several scale factors.
+
+For each scale, synthetic raw files are generated into a scratch workspace
+(see synthetic_data.py) and every stage runs against that workspace in its
+own fresh process, so peak RSS belongs to the stage alone and the
+repository's data folder is never touched:
+
+- data_scrubber: scrub all three raw files;
+- prepare_customers / prepare_products / prepare_sales: the prepare scripts;
+- etl_load: etl_to_dw.load_data_to_db into a fresh warehouse;
+- run_queries: the reports in SQL/queries.sql (result cache off), on
+  create_db tables with the index advisor's indexes.
+
+Wall time, peak RSS and rows/sec per stage are appended as one run to a
+JSON results file, together with the git commit and machine details, so
+runs can be compared over time. The build cache is switched off.
+
+Stages read what earlier stages wrote (etl_load and run_queries need all
+three prepared files), so a subset given with ``--stages`` must include its
+prerequisites; stages always run in the order above.
+
+Module Information:
+    - Filename: benchmark.py
+    - Module: benchmark
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.benchmark --scales 1 100
+"""
+
+import argparse
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+import json
+import multiprocessing
+import os
+import pathlib
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .build_cache import CACHE_ENV_VAR, PROJECT_ROOT
+from .utils_logger import METRICS_ENV_VAR, init_logger, logger
+
+RESULTS_PATH: pathlib.Path = PROJECT_ROOT / "data" / "benchmarks" / "results.json"
+STAGES: tuple[str, ...] = (
+    "data_scrubber",
+    "prepare_customers",
+    "prepare_products",
+    "prepare_sales",
+    "etl_load",
+    "run_queries",
+)
+
+
+@dataclass
+class StageTiming:
+    """Measurements for one stage at one scale."""
+
+    stage: str
+    scale: float
+    seconds: float
+    peak_rss_mb: float
+    baseline_rss_mb: float  # peak before the timed part (imports and setup)
+    rows: int
+
+    @property
+    def rows_per_sec(self) -> float:
+        """Throughput of the timed part; 0.0 when it took no measurable time."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _csv_rows(path: pathlib.Path) -> int:
+    with path.open("rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def _stage_body(stage: str, raw: pathlib.Path, prepared: pathlib.Path, db: pathlib.Path):
+    """Point a stage's module at the workspace and return (callable, input rows)."""
+    if stage == "data_scrubber":
+        from . import data_scrubber
+
+        data_scrubber.RAW_DIR, data_scrubber.PREPARED_DIR = raw, prepared
+        rows = sum(_csv_rows(p) for p in raw.glob("*_data.csv"))
+        return data_scrubber.main, rows
+
+    if stage == "prepare_customers":
+        from .data_preparation import prepare_customers_data as module
+
+        module.INPUT_FILE = raw / "customers_data.csv"
+        module.OUTPUT_FILE = prepared / "customers_prepared.csv"
+        return module.main, _csv_rows(module.INPUT_FILE)
+
+    if stage in ("prepare_products", "prepare_sales"):
+        from .data_preparation import prepare_products_data, prepare_sales_data
+
+        module = prepare_products_data if stage == "prepare_products" else prepare_sales_data
+        module.RAW_DATA_DIR, module.PREPARED_DATA_DIR = raw, prepared
+        name = "products" if stage == "prepare_products" else "sales"
+        run = module.main if stage == "prepare_products" else lambda: module.main([])
+        return run, _csv_rows(raw / f"{name}_data.csv")
+
+    if stage == "etl_load":
+        from . import etl_to_dw
+
+        etl_to_dw.PREPARED_DATA_DIR, etl_to_dw.DB_PATH = prepared, db
+        db.unlink(missing_ok=True)
+        rows = sum(_csv_rows(p) for p in prepared.glob("*_prepared.csv"))
+        return etl_to_dw.load_data_to_db, rows
+
+    if stage == "run_queries":
+        from . import create_db, index_advisor, run_queries
+
+        # The reports read create_db's tables and indexes; building them is not timed
+        project_db = db.with_name("project.db")
+        project_db.unlink(missing_ok=True)
+        create_db.ingest(create_db.find_files(prepared), project_db)
+        index_advisor.advise(project_db, repeat=1)
+        queries = run_queries.split_queries(run_queries.QUERIES_PATH.read_text(encoding="utf-8"))
+
+        def run():
+            for result in run_queries.run_queries(queries, project_db, cache=None):
+                if result.error:
+                    raise RuntimeError(result.error)
+
+        return run, _csv_rows(prepared / "sales_prepared.csv")
+
+    raise ValueError(f"Unknown stage {stage!r}; expected one of {STAGES}")
+
+
+def _run_in_child(stage: str, workspace: str, results) -> None:
+    """Worker process: run one stage quietly and report its measurements."""
+    os.environ[CACHE_ENV_VAR] = "off"
+    os.environ[METRICS_ENV_VAR] = "off"
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    try:
+        root = pathlib.Path(workspace)
+        run, rows = _stage_body(stage, root / "raw", root / "prepared", root / "smart_sales.db")
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        results.put(("ok", seconds, peak_kb / 1024, baseline_kb / 1024, rows))
+    except BaseException as e:  # noqa: BLE001 - the parent blocks until the child reports
+        results.put(("error", repr(e)))
+
+
+def run_stage(stage: str, workspace: pathlib.Path, scale: float) -> StageTiming:
+    """Run one stage in a fresh (spawned) process and return its timing.
+
+    Raises:
+        RuntimeError: If the stage fails.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    child = ctx.Process(target=_run_in_child, args=(stage, str(workspace), results))
+    child.start()
+    outcome = results.get()
+    child.join()
+    if outcome[0] == "error":
+        raise RuntimeError(f"Stage {stage} failed at scale {scale:g}: {outcome[1]}")
+    return StageTiming(stage, scale, *outcome[1:])
+
+
+def _git_commit() -> str | None:
+    git = shutil.which("git")  # full path, so PATH is not searched again at run time
+    if git is None:
+        return None
+    try:
+        out = subprocess.run(  # noqa: S603 - fixed arguments, no shell
+            [git, "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )  # fmt: skip
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_benchmark(
+    scales: list[float], stages: tuple[str, ...] = STAGES, seed: int = 0
+) -> list[StageTiming]:
+    """Generate data and time every stage at every scale."""
+    from .synthetic_data import generate
+
+    timings = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"bench_{scale:g}x_") as tmp:
+            workspace = pathlib.Path(tmp)
+            (workspace / "prepared").mkdir()
+            generate(scale, workspace / "raw", seed)
+            for stage in sorted(stages, key=STAGES.index):
+                timing = run_stage(stage, workspace, scale)
+                logger.info(
+                    f"{scale:g}x {stage}: {timing.seconds:.2f}s, "
+                    f"{timing.peak_rss_mb:.0f} MB peak, {timing.rows_per_sec:,.0f} rows/sec"
+                )
+                timings.append(timing)
+    return timings
+
+
+def save_results(timings: list[StageTiming], path: pathlib.Path = RESULTS_PATH) -> None:
+    """Append one run to the JSON results file (a list of runs)."""
+    runs = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    runs.append(
+        {
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "results": [{**asdict(t), "rows_per_sec": round(t.rows_per_sec, 1)} for t in timings],
+        }
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(runs, indent=2), encoding="utf-8")
+    logger.info(f"Saved {len(timings)} timings to {path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Time the requested stages at each scale and save the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the ETL stages on synthetic data")
+    parser.add_argument(
+        "--scales", type=float, nargs="+", default=[1, 100], help="Scale factors, e.g. 1 100 10000"
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES,
+        default=list(STAGES),
+        help="Stages to time (later stages need the earlier ones' output)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument("--results", type=pathlib.Path, default=RESULTS_PATH, help="JSON file")
+    args = parser.parse_args(argv)
+
+    init_logger()
+    save_results(run_benchmark(args.scales, tuple(args.stages), args.seed), args.results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Skip preparation stages whose raw input and cleaning code are unchanged.
+
+Each stage's cache key is a SHA-256 over the contents of its input files,
+the source files that implement its cleaning (so editing the code
+invalidates the cache) and any options that change the output, such as the
+prepared file format. After a successful run the key, the size/mtime of
+every file the stage wrote (its main output plus side outputs such as the
+calendar written by the sales stage) and the row count are recorded; the
+next run with the same key and all of those files untouched skips the
+stage.
+
+The manifest lives next to the prepared data, one JSON file per stage in
+data/prepared/.build_cache/, so stages running in parallel processes never
+write the same file. Set ANALYTICS_BUILD_CACHE=off to always rebuild (the
+manifest is then neither read nor written).
+
+Module Information:
+    - Filename: build_cache.py
+    - Module: build_cache
+    - Location: src/analytics_project/
+"""
+
+from dataclasses import asdict, dataclass, field
+import hashlib
+import json
+import os
+import pathlib
+
+CACHE_ENV_VAR = "ANALYTICS_BUILD_CACHE"
+PACKAGE_DIR: pathlib.Path = pathlib.Path(__file__).resolve().parent
+PROJECT_ROOT: pathlib.Path = PACKAGE_DIR.parent.parent
+DEFAULT_CACHE_DIR: pathlib.Path = PROJECT_ROOT / "data" / "prepared" / ".build_cache"
+
+# Modules every preparation stage depends on besides its own script
+SHARED_CODE: list[pathlib.Path] = [
+    PACKAGE_DIR / "schemas.py",
+    PACKAGE_DIR / "prepared_io.py",
+    PACKAGE_DIR / "cleaning_rules.py",
+    PACKAGE_DIR / "outliers.py",
+    PACKAGE_DIR / "sketches.py",
+    PACKAGE_DIR / "date_dim.py",
+]
+
+
+@dataclass
+class CacheEntry:
+    """What a stage produced the last time it ran."""
+
+    key: str
+    output: str
+    output_size: int
+    output_mtime_ns: int
+    rows: int
+    # Other files written by the stage: path -> [size, mtime_ns]
+    side_outputs: dict[str, list[int]] = field(default_factory=dict)
+
+
+def output_stat(path: pathlib.Path) -> list[int]:
+    """Return [size, mtime_ns] of a file, as stored in a cache entry."""
+    stat = pathlib.Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def cache_enabled() -> bool:
+    """Return False when the cache is switched off through the environment."""
+    return os.environ.get(CACHE_ENV_VAR, "on").lower() not in {"off", "0", "false", "no"}
+
+
+def _hash_file(digest, path: pathlib.Path) -> None:
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def stage_key(
+    inputs: list[pathlib.Path], code: list[pathlib.Path], options: dict | None = None
+) -> str:
+    """Return the cache key for a stage's inputs, code and options."""
+    digest = hashlib.sha256()
+    for group in (inputs, code):
+        for path in sorted(pathlib.Path(p) for p in group):
+            digest.update(path.name.encode())
+            _hash_file(digest, path)
+    digest.update(json.dumps(options or {}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Per-stage manifest of the last successful build."""
+
+    def __init__(self, cache_dir: pathlib.Path = DEFAULT_CACHE_DIR) -> None:
+        """Keep the manifests in ``cache_dir``."""
+        self.cache_dir = pathlib.Path(cache_dir)
+
+    def _entry_path(self, stage: str) -> pathlib.Path:
+        return self.cache_dir / f"{stage}.json"
+
+    def lookup(self, stage: str, key: str) -> CacheEntry | None:
+        """Return the recorded entry if the key matches and every output is untouched."""
+        if not cache_enabled():
+            return None
+        try:
+            entry = CacheEntry(**json.loads(self._entry_path(stage).read_text(encoding="utf-8")))
+            written = {entry.output: [entry.output_size, entry.output_mtime_ns]}
+            written.update(entry.side_outputs)
+            current = {path: output_stat(path) for path in written}
+        except (FileNotFoundError, ValueError, TypeError):
+            return None  # no entry, or an output was deleted
+        if entry.key != key:
+            return None
+        if current != written:
+            return None  # an output was rewritten by something else since
+        return entry
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        output: pathlib.Path,
+        rows: int,
+        side_outputs: list[pathlib.Path] | None = None,
+    ) -> None:
+        """Remember a successful build (written atomically)."""
+        if not cache_enabled():
+            return
+        size, mtime_ns = output_stat(output)
+        sides = {str(path): output_stat(path) for path in side_outputs or []}
+        entry = CacheEntry(key, str(output), size, mtime_ns, int(rows), sides)
+        self._write(stage, entry)
+
+    def refresh(self, stage: str, output: pathlib.Path, previous: list[int], rows: int) -> bool:
+        """Re-point an entry at its output after a later step rewrote it in place.
+
+        ``previous`` is the output's [size, mtime_ns] before the rewrite; the
+        entry is only updated if it still described that file. Returns True
+        if the entry was updated.
+        """
+        if not cache_enabled():
+            return False
+        try:
+            entry = CacheEntry(**json.loads(self._entry_path(stage).read_text(encoding="utf-8")))
+        except (FileNotFoundError, ValueError, TypeError):
+            return False
+        if entry.output != str(output) or [entry.output_size, entry.output_mtime_ns] != previous:
+            return False
+        entry.output_size, entry.output_mtime_ns = output_stat(output)
+        entry.rows = int(rows)
+        self._write(stage, entry)
+        return True
+
+    def _write(self, stage: str, entry: CacheEntry) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(stage)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(entry), indent=2), encoding="utf-8")
+        tmp.replace(path)
@@ -1,41 +1,198 @@
-import pandas as pd
+"""Count and profile the rows of every raw and prepared data file.
+
+CSV rows are counted without parsing: the file is memory-mapped and its
+bytes are scanned with NumPy for newlines, block by block. Newlines inside
+quoted fields are skipped by tracking quote parity (an escaped ``""`` counts
+twice, so parity is unaffected), and blank lines are not counted, matching
+what ``pd.read_csv`` returns. Parquet and Feather row counts come from file
+metadata. The same pass over the bytes feeds a SHA-256 checksum.
+
+Files are profiled in parallel threads (NumPy scans and hashing release the
+GIL). Each file's size, row count, checksum and, with ``--nulls``, missing
+values per column are logged as one JSON record per file.
+
+Module Information:
+    - Filename: check_row_counts.py
+    - Module: check_row_counts
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.check_row_counts [--nulls] [folder ...]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import mmap
 import os
+import pathlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from .build_cache import PROJECT_ROOT
+from .prepared_io import count_prepared_rows, format_of, iter_prepared, list_prepared
+from .utils_logger import init_logger, logger, timed_stage
+
+RAW_DIR: pathlib.Path = PROJECT_ROOT / "data" / "raw"
+PREPARED_DIR: pathlib.Path = PROJECT_ROOT / "data" / "prepared"
+
+# Bytes scanned per step; bounds the temporary arrays, not the mapping
+BLOCK_BYTES = 64 << 20
+NULL_CHUNK_ROWS = 250_000
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+NEWLINE, CARRIAGE_RETURN, QUOTE = ord("\n"), ord("\r"), ord('"')
+
+
+@dataclass
+class FileProfile:
+    """Size, rows and checksum of one data file."""
+
+    path: str
+    size_bytes: int
+    rows: int
+    sha256: str | None
+    seconds: float
+    nulls: dict[str, int] | None = None
+
+
+def _count_records(data: np.ndarray, quoted: bool, digest, block_bytes: int) -> int:
+    """Count non-blank records in a byte array, hashing it on the way."""
+    records = 0
+    in_quotes = False
+    last_end = -1  # offset of the previous record's newline
+    for start in range(0, len(data), block_bytes):
+        block = data[start : start + block_bytes]
+        if digest:
+            digest.update(block)
+        ends = np.flatnonzero(block == NEWLINE)
+        if quoted:
+            quotes = np.flatnonzero(block == QUOTE)
+            # A newline ends a record only after an even number of quotes
+            parity = (np.searchsorted(quotes, ends) + in_quotes) % 2
+            ends = ends[parity == 0]
+            in_quotes = (len(quotes) + in_quotes) % 2 == 1
+        if len(ends) == 0:
+            continue
+        ends += start
+        # Blank lines ("\n" or "\r\n" right after the previous record) are skipped
+        gaps = np.diff(ends, prepend=last_end)
+        blank = (gaps == 1) | ((gaps == 2) & (data[ends - 1] == CARRIAGE_RETURN))
+        records += len(ends) - int(blank.sum())
+        last_end = int(ends[-1])
+
+    tail = data[last_end + 1 :]
+    if len(tail) and not (len(tail) == 1 and tail[0] == CARRIAGE_RETURN):
+        records += 1  # the last record has no trailing newline
+    return records
+
+
+def _scan_csv(
+    path: pathlib.Path, checksum: bool = True, block_bytes: int = BLOCK_BYTES
+) -> tuple[int, str | None]:
+    """Return (data rows, SHA-256) of a CSV file with a header line."""
+    digest = hashlib.sha256() if checksum else None
+    records = 0
+    if path.stat().st_size:
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # A zero-copy view; it is released when _count_records returns
+            data = np.frombuffer(mm, dtype=np.uint8)
+            records = _count_records(data, mm.find(b'"') != -1, digest, block_bytes)
+            del data
+    return max(records - 1, 0), digest.hexdigest() if digest else None
+
+
+def count_csv_rows(path: str | pathlib.Path) -> int:
+    """Count the data rows of a CSV file without parsing it."""
+    return _scan_csv(pathlib.Path(path), checksum=False)[0]
+
+
+def _null_counts(path: pathlib.Path) -> dict[str, int]:
+    totals: pd.Series | None = None
+    if format_of(path) == "csv":
+        chunks = pd.read_csv(path, chunksize=NULL_CHUNK_ROWS)
+    else:
+        chunks = iter_prepared(path, NULL_CHUNK_ROWS)
+    for chunk in chunks:
+        counts = chunk.isna().sum()
+        totals = counts if totals is None else totals + counts
+    return {} if totals is None else {col: int(n) for col, n in totals.items()}
+
 
-# Folders containing the CSV files
-raw_folder = r"C:\Users\tiffa\Desktop\Master\Oct25\smart-store-thildebrand\data\raw"
-prepared_folder = r"C:\Users\tiffa\Desktop\Master\Oct25\smart-store-thildebrand\data\prepared"
+def profile_file(path: pathlib.Path, nulls: bool = False, checksum: bool = True) -> FileProfile:
+    """Profile one CSV, Parquet or Feather file."""
+    start = time.perf_counter()
+    if format_of(path) == "csv":
+        rows, sha256 = _scan_csv(path, checksum)
+    else:
+        rows = count_prepared_rows(path)
+        sha256 = None
+        if checksum:
+            digest = hashlib.sha256()
+            with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest.update(mm)
+            sha256 = digest.hexdigest()
+    null_counts = _null_counts(path) if nulls else None
+    try:
+        shown = path.resolve().relative_to(PROJECT_ROOT)
+    except ValueError:
+        shown = path
+    return FileProfile(
+        path=shown.as_posix(),
+        size_bytes=path.stat().st_size,
+        rows=rows,
+        sha256=sha256,
+        seconds=time.perf_counter() - start,
+        nulls=null_counts,
+    )
 
 
-# Function to count records in a folder
-def count_records(folder):
-    counts = {}
-    for filename in os.listdir(folder):
-        if filename.endswith(".csv"):
-            file_path = os.path.join(folder, filename)
-            try:
-                df = pd.read_csv(file_path)
-                counts[filename] = len(df)
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
-    return counts
+def data_files(folder: pathlib.Path) -> list[pathlib.Path]:
+    """Return the CSV files of a folder plus the newest file per prepared dataset."""
+    if not folder.is_dir():
+        return []
+    return sorted(set(folder.glob("*.csv")) | set(list_prepared(folder)))
 
-# Count records
-raw_counts = count_records(raw_folder)
-prepared_counts = count_records(prepared_folder)
 
-# Write counts to project.log
-with open("project.log", "a") as log_file:
-    log_file.write("=== Record Counts ===\n")
+def profile_folders(
+    folders: list[pathlib.Path],
+    workers: int = DEFAULT_WORKERS,
+    nulls: bool = False,
+    checksum: bool = True,
+) -> list[FileProfile]:
+    """Profile every data file in ``folders`` in parallel threads."""
+    files = [path for folder in folders for path in data_files(folder)]
+    if not files:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        return list(executor.map(lambda p: profile_file(p, nulls, checksum), files))
 
-    log_file.write("Raw CSV Files:\n")
-    for file, count in raw_counts.items():
-        log_file.write(f"{file}: {count} records\n")
 
-    log_file.write("\nPrepared CSV Files:\n")
-    for file, count in prepared_counts.items():
-        log_file.write(f"{file}: {count} records\n")
+def main(argv: list[str] | None = None) -> list[FileProfile]:
+    """Profile the data folders and log one JSON record per file."""
+    parser = argparse.ArgumentParser(description="Count and profile data file rows")
+    parser.add_argument(
+        "folders", type=pathlib.Path, nargs="*", default=[RAW_DIR, PREPARED_DIR],
+        help="Folders to scan (default: data/raw and data/prepared)",
+    )  # fmt: skip
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel files")
+    parser.add_argument("--nulls", action="store_true", help="Also count missing values")
+    parser.add_argument("--no-checksum", action="store_true", help="Skip SHA-256 checksums")
+    args = parser.parse_args(argv)
 
-    log_file.write("\n====================\n\n")
+    init_logger()
+    with timed_stage("row_counts") as stage:
+        profiles = profile_folders(args.folders, args.workers, args.nulls, not args.no_checksum)
+        stage.rows = sum(p.rows for p in profiles)
+    for p in profiles:
+        logger.info(f"{p.path}: {p.rows:,} rows, {p.size_bytes:,} bytes")
+        logger.info("Row count record: {}", json.dumps(asdict(p)))
+    return profiles
 
-print("Record counts logged to project.log!")
 
+if __name__ == "__main__":
+    main()
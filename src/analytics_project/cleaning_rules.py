@@ -0,0 +1,201 @@
+"""Declare dataset cleaning as an ordered list of rules and run it in one pass.
+
+Each preparation script lists its cleaning as rules: ``Dedup`` (optionally
+on key columns), ``Fill`` (a constant or a median/mean of the column),
+``Range`` (keep rows whose value lies within bounds) and ``Normalize``
+(named text steps such as strip + title). ``compile_rules`` turns the list
+into a ``CleaningPlan`` that
+
+- never filters the frame step by step: dedup and range rules only narrow
+  one boolean mask, and the frame is indexed with it once at the end;
+- replaces transformed columns on a shallow copy of the input, so no step
+  copies the whole frame;
+- merges consecutive text steps on the same column into one function that
+  runs once per category for categoricals (see ``normalize_text``).
+
+Rules keep their sequential meaning: a fill statistic is computed over the
+rows still selected when the rule is reached, and a range check sees the
+values produced by earlier fills. A rule naming a column the frame does
+not have fails the run rather than being skipped.
+
+Module Information:
+    - Filename: cleaning_rules.py
+    - Module: cleaning_rules
+    - Location: src/analytics_project/
+"""
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from .schemas import fill_category, normalize_text
+
+# Text steps available to Normalize, applied in the order given
+TEXT_STEPS: dict[str, Callable[[pd.Series], pd.Series]] = {
+    "strip": lambda s: s.str.strip(),
+    "lower": lambda s: s.str.lower(),
+    "upper": lambda s: s.str.upper(),
+    "title": lambda s: s.str.title(),
+}
+
+
+@dataclass(frozen=True)
+class Dedup:
+    """Drop repeated rows, comparing ``keys`` only if given (first one wins)."""
+
+    keys: tuple[str, ...] | None = None
+
+    @property
+    def label(self) -> str:
+        """Describe the dropped rows for the log."""
+        return f"duplicates on {', '.join(self.keys)}" if self.keys else "duplicates"
+
+
+@dataclass(frozen=True)
+class Fill:
+    """Fill missing values with ``value`` or a statistic of the column."""
+
+    column: str
+    value: object = None
+    strategy: Literal["value", "median", "mean"] = "value"
+
+    def fill_value(self, values: pd.Series):
+        """Return the value that fills the gaps in ``values``."""
+        if self.strategy == "median":
+            return values.median()
+        if self.strategy == "mean":
+            return values.mean()
+        return self.value
+
+
+@dataclass(frozen=True)
+class Range:
+    """Keep rows whose value lies within the inclusive bounds (missing fails)."""
+
+    column: str
+    min: float | None = None
+    max: float | None = None
+
+    @property
+    def label(self) -> str:
+        """Describe the dropped rows for the log."""
+        bounds = []
+        if self.min is not None:
+            bounds.append(f"{self.column} >= {self.min}")
+        if self.max is not None:
+            bounds.append(f"{self.column} <= {self.max}")
+        return "failing " + " and ".join(bounds)
+
+
+@dataclass(frozen=True)
+class Normalize:
+    """Apply named text steps from ``TEXT_STEPS`` to a column, in order."""
+
+    column: str
+    steps: tuple[str, ...]
+
+
+Rule = Dedup | Fill | Range | Normalize
+
+
+def _text_function(steps: Sequence[str]) -> Callable[[pd.Series], pd.Series]:
+    funcs = [TEXT_STEPS[step] for step in steps]
+
+    def apply(series: pd.Series) -> pd.Series:
+        for func in funcs:
+            series = func(series)
+        return series
+
+    return apply
+
+
+class CleaningPlan:
+    """Compiled rules; ``run`` executes them over a frame in one pass."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        """Keep the rules in order; build plans with ``compile_rules``."""
+        self.rules = list(rules)
+
+    @property
+    def columns(self) -> set[str]:
+        """Columns the rules read, which every cleaned frame must have."""
+        return {
+            col
+            for rule in self.rules
+            for col in ((rule.keys or ()) if isinstance(rule, Dedup) else (rule.column,))
+        }
+
+    def run(
+        self, df: pd.DataFrame, fill_values: dict[str, object] | None = None
+    ) -> tuple[pd.DataFrame, dict[str, int]]:
+        """Clean a frame and report the rows each row filter removed.
+
+        ``fill_values`` overrides a Fill rule's computed value per column,
+        e.g. a median computed over a whole file by a streaming caller.
+
+        Raises:
+            KeyError: If a rule names a column the frame does not have.
+        """
+        fill_values = fill_values or {}
+        missing = sorted(self.columns - set(df.columns))
+        if missing:
+            raise KeyError(f"Cleaning rules name columns the frame does not have: {missing}")
+        df = df.copy(deep=False)  # columns are replaced below, never the caller's
+        mask = np.ones(len(df), dtype=bool)
+        removed: dict[str, int] = {}
+
+        for rule in self.rules:
+            if isinstance(rule, Dedup):
+                keys = list(rule.keys) if rule.keys else None
+                keep = ~df.duplicated(subset=keys).to_numpy()
+                removed[rule.label] = int((mask & ~keep).sum())
+                mask &= keep
+                continue
+
+            series = df[rule.column]
+            if isinstance(rule, Fill):
+                if rule.column in fill_values:
+                    value = fill_values[rule.column]
+                else:
+                    value = rule.fill_value(series if mask.all() else series[mask])
+                df[rule.column] = fill_category(series, value)
+            elif isinstance(rule, Range):
+                keep = np.ones(len(df), dtype=bool)
+                if rule.min is not None:
+                    keep &= (series >= rule.min).to_numpy(dtype=bool, na_value=False)
+                if rule.max is not None:
+                    keep &= (series <= rule.max).to_numpy(dtype=bool, na_value=False)
+                removed[rule.label] = int((mask & ~keep).sum())
+                mask &= keep
+            else:
+                df[rule.column] = normalize_text(series, _text_function(rule.steps))
+
+        return (df if mask.all() else df[mask]), removed
+
+
+def compile_rules(rules: Sequence[Rule]) -> CleaningPlan:
+    """Validate rules and merge adjacent text steps into a CleaningPlan.
+
+    Raises:
+        ValueError: If a Dedup follows a Range (dropping a row first would
+            change which duplicate is kept), or a text step is unknown.
+    """
+    compiled: list[Rule] = []
+    seen_range = False
+    for rule in rules:
+        if isinstance(rule, Dedup) and seen_range:
+            raise ValueError("Dedup rules must come before Range rules")
+        seen_range |= isinstance(rule, Range)
+        if isinstance(rule, Normalize):
+            unknown = set(rule.steps) - set(TEXT_STEPS)
+            if unknown:
+                raise ValueError(f"Unknown text steps {sorted(unknown)}; have {sorted(TEXT_STEPS)}")
+            previous = compiled[-1] if compiled else None
+            if isinstance(previous, Normalize) and previous.column == rule.column:
+                compiled[-1] = Normalize(rule.column, previous.steps + rule.steps)
+                continue
+        compiled.append(rule)
+    return CleaningPlan(compiled)
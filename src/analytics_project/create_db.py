@@ -1,17 +1,72 @@
+"""Import the prepared files into project.db, one table per dataset.
+
+Files are parsed in a process pool while a single SQLite connection writes
+them as they arrive, all inside one transaction: readers see either the
+previous tables or the complete new ones. Each table is dropped and
+created with column types declared from the parsed data (INTEGER, REAL or
+TEXT) and, where the dataset has one, its natural key as PRIMARY KEY. A
+row whose key is already loaded is not inserted: the conflicts are counted
+and logged with their keys (the first row to be written wins; with several
+workers that is the first file to finish parsing), and ``--strict`` fails
+the import instead.
+
+Partitioned datasets load into one table: ``sales_prepared_001.csv``,
+``sales_prepared_002.csv`` ... all go to ``sales_prepared`` (the trailing
+``_<number>`` is dropped from the table name). ``--pattern`` picks the
+files with globs; by default every prepared file is imported, in its
+newest format. Column names are sanitized as before (spaces and dots become
+underscores, SQLite keywords get a ``_col`` suffix).
+
+Recreating a table drops its indexes, so afterwards the index advisor
+(index_advisor.py) re-adds the covering indexes the report queries use
+and refreshes the planner statistics; ``--no-indexes`` skips it.
+
+Module Information:
+    - Filename: create_db.py
+    - Module: create_db
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.create_db [--pattern "sales_prepared_*.csv"] [--workers 4]
+        [--strict]
+"""
+
+import argparse
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import pathlib
+import re
 import sqlite3
+
 import pandas as pd
-import os
 
-# Paths
-data_folder = os.path.join(os.path.dirname(__file__), '../../data/prepared')
-db_path = os.path.join(os.path.dirname(__file__), '../../data/project.db')
+from . import index_advisor
+from .etl_to_dw import quote_identifier, sql_rows, sql_type
+from .prepared_io import SUFFIXES, list_prepared, read_prepared
+from .utils_logger import init_logger, logger, timed_stage
+
+BASE_DIR = pathlib.Path(__file__).resolve().parents[2]
+PREPARED_DIR: pathlib.Path = BASE_DIR / "data" / "prepared"
+DB_PATH: pathlib.Path = BASE_DIR / "data" / "project.db"
+
+# Table -> natural key declared as PRIMARY KEY (sanitized column name)
+PRIMARY_KEYS: dict[str, str] = {
+    "customers_prepared": "customerid",
+    "products_prepared": "productid",
+    "sales_prepared": "transactionid",
+    "dates_prepared": "date_id",
+}
+
+# Rows per executemany call
+INSERT_BATCH_ROWS = 50_000
 
-# Debug: check folder and files
-print("Looking for CSVs in:", data_folder)
-print("Files found:", os.listdir(data_folder))
+# Trailing partition number in a file stem: sales_prepared_003 -> sales_prepared
+PARTITION_SUFFIX = re.compile(r"_\d+$")
 
 # SQLite reserved keywords (partial)
-sqlite_keywords = {
+SQLITE_KEYWORDS = {
     "ABORT","ACTION","ADD","AFTER","ALL","ALTER","ANALYZE","AND","AS","ASC","ATTACH",
     "AUTOINCREMENT","BEFORE","BEGIN","BETWEEN","BY","CASCADE","CASE","CAST","CHECK",
     "COLLATE","COLUMN","COMMIT","CONFLICT","CONSTRAINT","CREATE","CROSS","CURRENT_DATE",
@@ -25,34 +80,199 @@ sqlite_keywords = {
     "RENAME","REPLACE","RESTRICT","RIGHT","ROLLBACK","ROW","SAVEPOINT","SELECT","SET","TABLE",
     "TEMP","TEMPORARY","THEN","TO","TRANSACTION","TRIGGER","UNION","UNIQUE","UPDATE","USING",
     "VACUUM","VALUES","VIEW","VIRTUAL","WHEN","WHERE","WITH","WITHOUT"
-}
+}  # fmt: skip
+
+
+def sanitize_column(name: str) -> str:
+    """Return a column name usable unquoted in the report queries."""
+    col = name.strip().replace(" ", "_").replace(".", "_").replace('"', "").replace("'", "")
+    return col + "_col" if col.upper() in SQLITE_KEYWORDS else col
+
+
+def table_for(path: pathlib.Path) -> str:
+    """Return the table a prepared file loads into (partition suffix dropped)."""
+    return PARTITION_SUFFIX.sub("", path.stem)
+
+
+def find_files(
+    prepared_dir: pathlib.Path = PREPARED_DIR, patterns: list[str] | None = None
+) -> dict[str, list[pathlib.Path]]:
+    """Group the files to import by table, in name order within a table."""
+    if patterns:
+        files = {p for pattern in patterns for p in prepared_dir.glob(pattern)}
+        files = {p for p in files if p.suffix.lower() in SUFFIXES.values()}
+    else:
+        files = set(list_prepared(prepared_dir)) if prepared_dir.is_dir() else set()
+    tables: dict[str, list[pathlib.Path]] = {}
+    for path in sorted(files):
+        tables.setdefault(table_for(path), []).append(path)
+    return tables
+
+
+def parse_file(path: pathlib.Path) -> pd.DataFrame:
+    """Read one prepared file with sanitized column names (runs in a worker)."""
+    df = read_prepared(path)
+    df.columns = [sanitize_column(c) for c in df.columns]
+    return df
+
+
+def _create_table(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    key = PRIMARY_KEYS.get(table)
+    columns = [
+        f"{quote_identifier(c)} {sql_type(df[c].dtype) if c != key else 'INTEGER'}"
+        + (" PRIMARY KEY" if c == key else "")
+        for c in df.columns
+    ]
+    conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+    conn.execute(f"CREATE TABLE {quote_identifier(table)} ({', '.join(columns)})")
+
+
+def _insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> int:
+    """Insert rows, skipping any whose primary key is taken. Returns rows written."""
+    sql = (
+        f"INSERT OR IGNORE INTO {quote_identifier(table)} "  # noqa: S608 - quoted identifiers, bound values
+        f"({', '.join(map(quote_identifier, df.columns))}) "
+        f"VALUES ({', '.join('?' for _ in df.columns)})"
+    )
+    before = conn.total_changes
+    for start in range(0, len(df), INSERT_BATCH_ROWS):
+        conn.executemany(sql, sql_rows(df.iloc[start : start + INSERT_BATCH_ROWS]))
+    return conn.total_changes - before
+
+
+def _conflicting_keys(df: pd.DataFrame, key: str, seen: set) -> pd.Series:
+    """Return the keys of rows that repeat a key of this file or of ``seen``."""
+    keys = df[key].dropna()
+    return keys[keys.duplicated() | keys.isin(seen)]
+
+
+class _TableWriter:
+    """Write parsed files into their tables on one connection, tracking keys."""
+
+    def __init__(self, conn: sqlite3.Connection, strict: bool) -> None:
+        self.conn = conn
+        self.strict = strict
+        self.rows: dict[str, int] = {}
+        self.columns: dict[str, list[str]] = {}
+        self.keys: dict[str, set] = {}
+        self.conflicts: dict[str, int] = {}
+
+    def _repeated_keys(self, table: str, path: pathlib.Path, df: pd.DataFrame) -> pd.Series:
+        key = PRIMARY_KEYS.get(table)
+        if key not in df.columns:
+            return pd.Series(dtype=object)
+        repeated = _conflicting_keys(df, key, self.keys.setdefault(table, set()))
+        if len(repeated) and self.strict:
+            raise ValueError(f"{path.name}: {key} repeated: {sorted(set(repeated))[:10]}")
+        self.keys[table].update(df[key].dropna())
+        return repeated
+
+    def write(self, table: str, path: pathlib.Path, df: pd.DataFrame) -> None:
+        """Create the table on its first file, then insert the rows."""
+        if table not in self.columns:
+            _create_table(self.conn, table, df)
+            self.columns[table] = list(df.columns)
+        elif list(df.columns) != self.columns[table]:
+            raise ValueError(f"{path.name} columns differ from the rest of {table}")
+        repeated = self._repeated_keys(table, path, df)
+        written = _insert(self.conn, table, df)
+        self.rows[table] = self.rows.get(table, 0) + written
+        logger.info(f"Imported {path.name} into {table} ({written} rows)")
+        if written < len(df):
+            self.conflicts[table] = self.conflicts.get(table, 0) + len(df) - written
+            logger.warning(
+                f"{path.name}: skipped {len(df) - written} rows whose {PRIMARY_KEYS.get(table)} "
+                f"was already loaded: {sorted(set(repeated))[:10]}"
+            )
+
+
+def _parsed_files(
+    files: list[tuple[str, pathlib.Path]], workers: int
+) -> Iterator[tuple[str, pathlib.Path, pd.DataFrame]]:
+    """Yield (table, path, frame) per file, in the order the files finish parsing."""
+    if workers == 1:
+        for table, path in files:
+            yield table, path, parse_file(path)
+        return
+    # Parse in workers; each file is yielded as soon as it is parsed. Spawned,
+    # not forked: the logger may be running threads in this process
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {pool.submit(parse_file, path): (table, path) for table, path in files}
+        for future in as_completed(futures):
+            yield *futures[future], future.result()
+
+
+def ingest(
+    tables: dict[str, list[pathlib.Path]],
+    db_path: pathlib.Path = DB_PATH,
+    workers: int | None = None,
+    strict: bool = False,
+) -> dict[str, int]:
+    """Parse files in parallel and (re)create their tables in one transaction.
+
+    A table's columns and types come from the first of its files to finish
+    parsing; later partitions must have the same columns. Rows repeating a
+    primary key already written are skipped and logged as conflicts.
+
+    Returns the rows inserted per table.
+
+    Raises:
+        ValueError: If partitions of one table have different columns, or
+            if ``strict`` and a primary key is repeated.
+    """
+    files = [(table, path) for table, paths in tables.items() for path in paths]
+    workers = min(workers or os.cpu_count() or 1, len(files) or 1)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)  # BEGIN/COMMIT below only
+    try:
+        conn.execute("BEGIN")
+        writer = _TableWriter(conn, strict)
+        for table, path, df in _parsed_files(files, workers):
+            writer.write(table, path, df)
+        conn.execute("COMMIT")
+        if writer.conflicts:
+            logger.warning(f"Primary key conflicts skipped per table: {writer.conflicts}")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return writer.rows
+
+
+def main(argv: list[str] | None = None) -> dict[str, int]:
+    """Import prepared files into project.db. Returns rows per table."""
+    parser = argparse.ArgumentParser(description="Import prepared files into project.db")
+    parser.add_argument("--prepared", type=pathlib.Path, default=PREPARED_DIR, help="Folder")
+    parser.add_argument("--db", type=pathlib.Path, default=DB_PATH, help="SQLite database")
+    parser.add_argument(
+        "--pattern", action="append", default=None,
+        help='Glob of files to import, repeatable (e.g. "sales_prepared_*.csv")',
+    )  # fmt: skip
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes")
+    parser.add_argument("--no-indexes", action="store_true", help="Skip the index advisor")
+    parser.add_argument(
+        "--strict", action="store_true", help="Fail on a repeated primary key instead of skipping"
+    )
+    args = parser.parse_args(argv)
+
+    init_logger()
+    tables = find_files(args.prepared, args.pattern)
+    if not tables:
+        logger.warning(f"No prepared files found in {args.prepared}")
+        return {}
+    with timed_stage("create_db") as stage:
+        rows = ingest(tables, args.db, args.workers, args.strict)
+        stage.rows = sum(rows.values())
+    logger.info(f"Database created at {args.db}: {rows}")
+    if not args.no_indexes:
+        with timed_stage("index_advisor"):
+            report = index_advisor.advise(args.db)
+        index_advisor.log_report(report)
+    return rows
 
-# Connect to SQLite (will create new project.db)
-conn = sqlite3.connect(db_path)
-
-# List CSV files
-csv_files = [f for f in os.listdir(data_folder) if f.lower().endswith('.csv')]
-if not csv_files:
-    print("No CSV files found in", data_folder)
-else:
-    for filename in csv_files:
-        table_name = os.path.splitext(filename)[0]
-        csv_path = os.path.join(data_folder, filename)
-        df = pd.read_csv(csv_path)
-
-        # Sanitize column names
-        new_columns = []
-        for c in df.columns:
-            col = c.strip().replace(' ', '_').replace('.', '_').replace('"','').replace("'",'')
-            if col.upper() in sqlite_keywords:
-                col = col + "_col"
-            new_columns.append(col)
-        df.columns = new_columns
-
-        # Import into SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        print(f"Imported {filename} into table {table_name}")
-
-conn.close()
-print("Database created successfully at:", db_path)
 
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import pathlib
 
 import pandas as pd
 
+from .schemas import RAW_FILES, memory_mb, read_raw_csv
 from .utils_logger import init_logger, logger, project_root
 
 # Set up paths as constants
@@ -30,10 +31,13 @@ def read_and_log(path: pathlib.Path) -> pd.DataFrame:
     try:
         # Typically, we log the start of a file read operation
         logger.info(f"Reading raw data from {path}.")
-        df = pd.read_csv(path)
+        # Known raw files are read with their declared column types (see schemas.py)
+        dataset = RAW_FILES.get(path.name)
+        df = read_raw_csv(path, dataset) if dataset else pd.read_csv(path)
         # Typically, we log the successful completion of a file read operation
         logger.info(
             f"{path.name}: loaded DataFrame with shape {df.shape[0]} rows x {df.shape[1]} cols"
+            f" ({memory_mb(df):.2f} MB)"
         )
         return df
     except FileNotFoundError:
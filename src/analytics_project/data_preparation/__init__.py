@@ -0,0 +1,3 @@
+# __init__.py
+# Marks data_preparation as a subpackage so the pipeline runner can import
+# the prepare_*_data scripts. Each script can still be run directly.
@@ -8,15 +8,24 @@ Tasks:
 - Remove duplicates
 - Handle missing values
 - Standardize text formatting
+- Add an integer enrolled_date_id (YYYYMMDD)
 """
 
 #####################################
 # Import Modules
 #####################################
+import logging
 import pathlib
 import sys
+
 import pandas as pd
-import logging
+
+from analytics_project.build_cache import SHARED_CODE, BuildCache, stage_key
+from analytics_project.cleaning_rules import Dedup, Fill, Normalize, compile_rules
+from analytics_project.date_dim import add_date_ids
+from analytics_project.prepared_io import prepared_format, write_prepared
+from analytics_project.schemas import memory_mb, read_raw_csv
+from analytics_project.utils_logger import timed_stage
 
 # ------------------------------
 # Project root & logger setup
@@ -37,6 +46,20 @@ PREPARED_DATA_DIR = DATA_DIR / "prepared"
 INPUT_FILE = RAW_DATA_DIR / "customers_data.csv"
 OUTPUT_FILE = PREPARED_DATA_DIR / "customers_prepared.csv"
 
+# ------------------------------
+# Cleaning rules (run in order, see cleaning_rules.py)
+# ------------------------------
+CUSTOMER_RULES = [
+    Dedup(),
+    Fill("loyaltypoints", 0),
+    Fill("preferredcontact", "unknown"),
+    Normalize("firstname", ("strip", "title")),
+    Normalize("region", ("strip", "title")),
+    Normalize("preferredcontact", ("strip", "lower")),
+]
+CUSTOMER_PLAN = compile_rules(CUSTOMER_RULES)
+
+
 # ------------------------------
 # Read & clean functions
 # ------------------------------
@@ -46,56 +69,67 @@ def read_raw_data(file_path: pathlib.Path) -> pd.DataFrame:
         logger.error(f"File not found: {file_path}")
         raise FileNotFoundError(f"{file_path} does not exist")
 
-    df = pd.read_csv(file_path)
+    df = read_raw_csv(file_path, "customers")
     df.columns = [col.strip().lower() for col in df.columns]  # standardize column names
     logger.info(f"Loaded dataframe with {len(df)} rows and {len(df.columns)} columns")
+    logger.info(f"DataFrame memory: {memory_mb(df):.2f} MB")
     return df
 
+
 def clean_customers_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Starting cleaning process...")
 
-    # Remove duplicates
-    initial_rows = len(df)
-    df = df.drop_duplicates()
-    logger.info(f"Removed duplicates: {initial_rows - len(df)} rows")
-
-    # Handle missing values
-    if "loyaltypoints" in df.columns:
-        df["loyaltypoints"] = df["loyaltypoints"].fillna(0)
-    if "preferredcontact" in df.columns:
-        df["preferredcontact"] = df["preferredcontact"].fillna("unknown")
-
-    # Standardize text formatting
-    if "firstname" in df.columns:
-        df["firstname"] = df["firstname"].str.strip().str.title()
-    if "region" in df.columns:
-        df["region"] = df["region"].str.strip().str.title()
-    if "preferredcontact" in df.columns:
-        df["preferredcontact"] = df["preferredcontact"].str.strip().str.lower()
+    # Remove duplicates, handle missing values, standardize text formatting
+    df, removed = CUSTOMER_PLAN.run(df)
+    for rule, rows in removed.items():
+        logger.info(f"Removed {rows} rows: {rule}")
 
+    # Integer YYYYMMDD key next to the enrollment date
+    add_date_ids(df, "customers")
     logger.info("Finished cleaning")
     return df
 
-def save_prepared_data(df: pd.DataFrame, output_file: pathlib.Path):
-    output_file.parent.mkdir(parents=True, exist_ok=True)  # ensure prepared folder exists
-    df.to_csv(output_file, index=False)
+
+def save_prepared_data(df: pd.DataFrame, output_file: pathlib.Path) -> pathlib.Path:
+    output_file = write_prepared(df, output_file)  # creates the prepared folder if needed
     logger.info(f"Saved cleaned data to: {output_file}")
+    return output_file
+
 
 # ------------------------------
 # Main
 # ------------------------------
-def main():
-    logger.info("="*50)
+@timed_stage("prepare_customers")
+def main() -> int:
+    logger.info("=" * 50)
     logger.info("STARTING prepare_customers_data.py")
-    logger.info("="*50)
-
-    df = read_raw_data(INPUT_FILE)
-    df_clean = clean_customers_data(df)
-    save_prepared_data(df_clean, OUTPUT_FILE)
-
-    logger.info("="*50)
+    logger.info("=" * 50)
+
+    # Skip the work when neither the raw file nor this code has changed
+    cache = BuildCache()
+    key = stage_key(
+        [INPUT_FILE], [pathlib.Path(__file__), *SHARED_CODE], {"format": prepared_format()}
+    )
+    if (hit := cache.lookup("customers", key)) is not None:
+        logger.info(f"{INPUT_FILE.name} unchanged, reusing {hit.output}")
+        return hit.rows
+
+    with timed_stage("prepare_customers.read") as stage:
+        df = read_raw_data(INPUT_FILE)
+        stage.rows = len(df)
+    with timed_stage("prepare_customers.clean") as stage:
+        df_clean = clean_customers_data(df)
+        stage.rows = len(df_clean)
+    with timed_stage("prepare_customers.save") as stage:
+        output_file = save_prepared_data(df_clean, OUTPUT_FILE)
+        stage.rows = len(df_clean)
+    cache.record("customers", key, output_file, len(df_clean))
+
+    logger.info("=" * 50)
     logger.info("FINISHED prepare_customers_data.py")
-    logger.info("="*50)
+    logger.info("=" * 50)
+    return len(df_clean)
+
 
 if __name__ == "__main__":
     main()
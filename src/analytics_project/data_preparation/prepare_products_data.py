@@ -17,6 +17,7 @@ Tasks:
 #####################################
 import pathlib
 import sys
+
 import pandas as pd
 
 # Add parent folder to sys.path
@@ -24,6 +25,12 @@ sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
 
 from utils_logger import logger
 
+from analytics_project.build_cache import SHARED_CODE, BuildCache, stage_key
+from analytics_project.cleaning_rules import Dedup, Fill, Range, compile_rules
+from analytics_project.prepared_io import prepared_format, write_prepared
+from analytics_project.schemas import memory_mb, read_raw_csv
+from analytics_project.utils_logger import timed_stage
+
 SCRIPTS_DATA_PREP_DIR = pathlib.Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPTS_DATA_PREP_DIR.parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
@@ -33,58 +40,73 @@ PREPARED_DATA_DIR = DATA_DIR / "prepared"
 RAW_DATA_DIR.mkdir(exist_ok=True)
 PREPARED_DATA_DIR.mkdir(exist_ok=True)
 
+# Cleaning rules, run in order (see cleaning_rules.py)
+PRODUCT_RULES = [
+    Dedup(),
+    # Numeric gaps get the column median, categorical ones "Unknown"
+    *(Fill(col, strategy="median") for col in ["unitprice", "stockquantity"]),
+    Fill("category", "Unknown"),
+    # Remove impossible numeric values
+    Range("unitprice", min=0),
+    Range("stockquantity", min=0),
+]
+PRODUCT_PLAN = compile_rules(PRODUCT_RULES)
+
 
 def read_raw_data(file_name: str) -> pd.DataFrame:
     logger.info(f"Reading raw data: {file_name}")
-    df = pd.read_csv(RAW_DATA_DIR / file_name)
+    df = read_raw_csv(RAW_DATA_DIR / file_name, "products")
     df.columns = df.columns.str.strip().str.lower().str.replace(" ", "")
     logger.info(f"Loaded dataframe with {len(df)} rows and {len(df.columns)} columns")
+    logger.info(f"DataFrame memory: {memory_mb(df):.2f} MB")
     return df
 
 
 def clean_products_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Starting cleaning process...")
 
-    # Remove duplicates
-    before = len(df)
-    df = df.drop_duplicates()
-    logger.info(f"Removed duplicates: {before - len(df)} rows")
-
-    # Handle missing values
-    for col in ["price", "stockquantity"]:  # numeric example
-        if col in df.columns:
-            df[col] = df[col].fillna(df[col].median())
-    for col in ["category", "brand"]:  # categorical example
-        if col in df.columns:
-            df[col] = df[col].fillna("Unknown")
-    logger.info("Handled missing values")
-
-    # Remove impossible numeric values
-    if "price" in df.columns:
-        df = df[df["price"] >= 0]
-    if "stockquantity" in df.columns:
-        df = df[df["stockquantity"] >= 0]
+    df, removed = PRODUCT_PLAN.run(df)
+    for rule, rows in removed.items():
+        logger.info(f"Removed {rows} rows: {rule}")
 
     logger.info("Finished cleaning")
     return df
 
 
-def main():
+@timed_stage("prepare_products")
+def main() -> int:
     logger.info("==================================")
     logger.info("STARTING prepare_products_data.py")
     logger.info("==================================")
 
-    df = read_raw_data("products_data.csv")
-    df_clean = clean_products_data(df)
-
-    output_file = PREPARED_DATA_DIR / "products_prepared.csv"
-    df_clean.to_csv(output_file, index=False)
+    # Skip the work when neither the raw file nor this code has changed
+    cache = BuildCache()
+    key = stage_key(
+        [RAW_DATA_DIR / "products_data.csv"],
+        [pathlib.Path(__file__), *SHARED_CODE],
+        {"format": prepared_format()},
+    )
+    if (hit := cache.lookup("products", key)) is not None:
+        logger.info(f"products_data.csv unchanged, reusing {hit.output}")
+        return hit.rows
+
+    with timed_stage("prepare_products.read") as stage:
+        df = read_raw_data("products_data.csv")
+        stage.rows = len(df)
+    with timed_stage("prepare_products.clean") as stage:
+        df_clean = clean_products_data(df)
+        stage.rows = len(df_clean)
+
+    with timed_stage("prepare_products.save") as stage:
+        output_file = write_prepared(df_clean, PREPARED_DATA_DIR / "products_prepared.csv")
+        stage.rows = len(df_clean)
     logger.info(f"Saved cleaned data to: {output_file}")
+    cache.record("products", key, output_file, len(df_clean))
 
     logger.info("FINISHED prepare_products_data.py")
     logger.info("==================================")
+    return len(df_clean)
 
 
 if __name__ == "__main__":
     main()
-
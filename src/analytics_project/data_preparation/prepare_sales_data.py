@@ -7,23 +7,49 @@ and writes the cleaned version to the data/prepared folder.
 Tasks:
 - Remove duplicates
 - Handle missing values
-- Remove outliers
+- Remove outliers (optional: --outliers iqr|zscore [--outlier-by productid|storeid])
 - Ensure consistent formatting
+- Add an integer date_id (YYYYMMDD) and write the calendar (dates_prepared)
 
 """
 
 #####################################
 # Import Modules
 #####################################
+import argparse
 import pathlib
 import sys
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 
 # Add parent folder to sys.path
 sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
 
 from utils_logger import logger
 
+from analytics_project.build_cache import SHARED_CODE, BuildCache, stage_key
+from analytics_project.cleaning_rules import Dedup, Fill, Normalize, Range, compile_rules
+from analytics_project.date_dim import CALENDAR_FILE, add_date_ids, write_calendar
+from analytics_project.outliers import METHODS, OutlierSketches
+from analytics_project.prepared_io import (
+    PreparedWriter,
+    prepared_format,
+    resolve_prepared,
+    write_prepared,
+)
+from analytics_project.schemas import (
+    coerce_integers,
+    csv_options,
+    log_invalid_integers,
+    memory_mb,
+    parse_dates,
+    read_raw_csv,
+)
+from analytics_project.sketches import KLLSketch
+from analytics_project.utils_logger import log_sampled, timed_stage
+
 #####################################
 # Constants
 #####################################
@@ -37,61 +63,326 @@ PREPARED_DATA_DIR = DATA_DIR / "prepared"
 RAW_DATA_DIR.mkdir(exist_ok=True)
 PREPARED_DATA_DIR.mkdir(exist_ok=True)
 
+# Rows per chunk when streaming (see stream_sales_data)
+DEFAULT_CHUNK_SIZE = 250_000
+# At most one streaming progress message per this many seconds
+PROGRESS_SECONDS = 10.0
+
+# Cleaning rules after de-duplication, run in order (see cleaning_rules.py).
+# Streaming de-duplicates across chunks itself, so Dedup is kept separate.
+SALES_ROW_RULES = [
+    Fill("saleamount", strategy="median"),
+    Fill("discountpercent", 0),
+    Range("saleamount", min=0),
+    Normalize("paymenttype", ("strip", "title")),
+]
+SALES_PLAN = compile_rules([Dedup(), *SALES_ROW_RULES])
+SALES_ROW_PLAN = compile_rules(SALES_ROW_RULES)
+
+# Columns checked by the optional outlier stage, and the groups it may use
+OUTLIER_COLUMNS = ["saleamount", "discountpercent"]
+OUTLIER_GROUPS = ("productid", "storeid")
+
 #####################################
 # Functions
 #####################################
 
+
 def read_raw_data(file_name: str) -> pd.DataFrame:
     """Read raw CSV data into a DataFrame"""
     logger.info(f"Reading raw data: {file_name}")
     file_path = RAW_DATA_DIR / file_name
-    df = pd.read_csv(file_path)
+    df = read_raw_csv(file_path, "sales")
 
     # Standardize column names: lowercase, strip spaces, no underscores
     df.columns = df.columns.str.strip().str.lower()
 
     logger.info(f"Columns after standardizing: {df.columns.tolist()}")
     logger.info(f"Loaded dataframe with {len(df)} rows and {len(df.columns)} columns")
+    logger.info(f"DataFrame memory: {memory_mb(df):.2f} MB")
     return df
 
-def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean the sales DataFrame"""
+
+def clean_sales_data(
+    df: pd.DataFrame,
+    outliers: OutlierSketches | None = None,
+    outlier_method: str = "iqr",
+    outlier_k: float | None = None,
+) -> pd.DataFrame:
+    """Clean the sales DataFrame
+
+    With ``outliers`` (empty sketches naming the columns and optional
+    group), rows outside the fitted bounds are removed as a last step.
+    """
     logger.info("Starting cleaning process...")
 
-    # Remove duplicate rows
-    initial_rows = len(df)
-    df = df.drop_duplicates()
-    removed_duplicates = initial_rows - len(df)
-    logger.info(f"Removed duplicates: {removed_duplicates} rows")
+    # Remove duplicates, fill missing values, drop negative sale amounts
+    # and fix paymenttype formatting
+    raw = df
+    df, removed = SALES_PLAN.run(df)
+    for rule, rows in removed.items():
+        logger.info("Removed {} rows: {}", rows, rule)
 
-    # Handle missing values
-    df.loc[:, 'saleamount'] = df['saleamount'].fillna(df['saleamount'].median())
-    df.loc[:, 'discountpercent'] = df['discountpercent'].fillna(0)
-    logger.info("Handled missing values for saleamount and discountpercent")
+    if outliers is not None:
+        # Fit on the observed values of the kept rows, not on filled-in ones
+        outliers.update(raw.loc[df.index])
+        bounds = _log_bounds(outliers, outlier_method, outlier_k)
+        keep = outliers.keep_mask(df, bounds)
+        logger.info("Removed {} rows: {} outliers", int((~keep).sum()), outlier_method)
+        df = df[keep]
 
-    # Remove negative sale amounts
-    initial_rows = len(df)
-    df = df[df['saleamount'] >= 0]
-    removed_negatives = initial_rows - len(df)
-    logger.info(f"Removed negative saleamount: {removed_negatives} rows")
+    # Integer YYYYMMDD key next to the sale date
+    return add_date_ids(df, "sales")
 
-    # Fix text formatting in paymenttype
-    df.loc[:, 'paymenttype'] = df['paymenttype'].astype(str).str.strip().str.title()
-    logger.info("Cleaned paymenttype column formatting")
 
-    return df
+def _log_bounds(outliers: OutlierSketches, method: str, k: float | None) -> pd.DataFrame:
+    bounds = outliers.bounds(method, k)
+    for col in outliers.columns:
+        lower, upper = bounds.at[None, f"{col}_lower"], bounds.at[None, f"{col}_upper"]
+        logger.info(f"Outlier bounds for {col} ({method}): [{lower:.2f}, {upper:.2f}]")
+    if outliers.by:
+        logger.info(f"Bounds are per {outliers.by} for {len(bounds) - 1} groups")
+    return bounds
+
 
-def save_prepared_data(df: pd.DataFrame, file_name: str) -> None:
+def save_prepared_data(df: pd.DataFrame, file_name: str) -> pathlib.Path:
     """Save cleaned DataFrame to prepared folder"""
-    output_path = PREPARED_DATA_DIR / file_name
-    df.to_csv(output_path, index=False)
+    output_path = write_prepared(df, PREPARED_DATA_DIR / file_name)
     logger.info(f"Saved cleaned data to {output_path}")
+    ids = df["date_id"].dropna()
+    calendar = write_calendar(
+        ids.min() if len(ids) else None, ids.max() if len(ids) else None, PREPARED_DATA_DIR
+    )
+    logger.info(f"Saved calendar to {calendar}")
+    return output_path
+
+
+#####################################
+# Streaming (chunked) mode
+#####################################
+
+
+class _DigestSet:
+    """Append-only set of 64-bit row digests kept as sorted NumPy runs.
+
+    Runs are merged LSM-style (a new run absorbs every older run that is not
+    larger than it), so lookups touch O(log n) runs and memory stays close to
+    8 bytes per distinct row instead of a Python int per row.
+    """
+
+    def __init__(self) -> None:
+        self._runs: list[np.ndarray] = []
+
+    def contains(self, digests: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(digests), dtype=bool)
+        for run in self._runs:
+            idx = np.searchsorted(run, digests)
+            idx[idx == len(run)] = len(run) - 1
+            found |= run[idx] == digests
+        return found
+
+    def add(self, digests: np.ndarray) -> None:
+        """Add digests that are known to be new and distinct."""
+        if len(digests) == 0:
+            return
+        run = np.sort(digests)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]), kind="stable")
+        self._runs.append(run)
+
+
+def _standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.strip().str.lower()
+    return df
+
+
+def _row_digests(chunk: pd.DataFrame) -> np.ndarray:
+    """Hash every row to a uint64 so duplicates can be found across chunks.
+
+    Numeric columns are hashed as float64 because the same column can be
+    inferred as int64 in one chunk and float64 (NaN present) in another.
+    """
+    numeric = {col: "float64" for col in chunk.columns if is_numeric_dtype(chunk[col])}
+    return pd.util.hash_pandas_object(chunk.astype(numeric), index=False).to_numpy()
+
+
+def _widen_dtype(current, new):
+    """Return a dtype able to hold both per-chunk inferred dtypes."""
+    if current is None or current == new:
+        return new
+    # Categories differ chunk to chunk; read every chunk as a categorical
+    if isinstance(current, pd.CategoricalDtype | str) and isinstance(new, pd.CategoricalDtype):
+        return "category"
+    if is_numeric_dtype(current) and is_numeric_dtype(new):
+        return np.result_type(current, new)
+    return np.dtype(object)
+
+
+def _scan_sales_chunks(
+    file_path: pathlib.Path, chunk_size: int, outliers: OutlierSketches | None = None
+):
+    """First pass: find cross-chunk duplicates and the global saleamount median.
+
+    Returns one packed keep-mask per chunk (1 bit per row), the median of
+    ``saleamount`` over the de-duplicated rows (from a fixed-size quantile
+    sketch, so exact only for small files), a per-column dtype that fits
+    the whole file, and the number of duplicate rows found. ``outliers``
+    sketches, if given, are fed the de-duplicated rows that the cleaning
+    rules keep, so outlier bounds need no extra pass.
+    """
+    seen = _DigestSet()
+    keep_masks: list[np.ndarray] = []
+    amounts = KLLSketch()
+    dtypes: dict = {}
+    invalid: dict[str, int] = {}
+    duplicates = 0
+
+    with pd.read_csv(file_path, chunksize=chunk_size, **csv_options(file_path, "sales")) as reader:
+        for chunk in reader:
+            chunk, chunk_invalid = coerce_integers(_standardize_columns(chunk), "sales")
+            for col, count in chunk_invalid.items():
+                invalid[col] = invalid.get(col, 0) + count
+            for col in chunk.columns:
+                dtypes[col] = _widen_dtype(dtypes.get(col), chunk[col].dtype)
+            chunk = parse_dates(chunk, "sales")
+
+            digests = _row_digests(chunk)
+            keep = ~pd.Series(digests).duplicated().to_numpy()
+            keep &= ~seen.contains(digests)
+            seen.add(digests[keep])
+            duplicates += int(len(keep) - keep.sum())
+            keep_masks.append(np.packbits(keep))
+
+            amounts.update(chunk["saleamount"].to_numpy(dtype="float64", na_value=np.nan)[keep])
+            if outliers is not None:
+                # Rows the cleaning rules keep; missing amounts are filled later, so they stay
+                negative = (chunk["saleamount"] < 0).to_numpy(dtype=bool, na_value=False)
+                outliers.update(chunk[keep & ~negative])
+
+    log_invalid_integers(invalid, "sales")
+    return keep_masks, amounts.quantile(0.5), dtypes, duplicates
+
+
+def stream_sales_data(
+    input_file: str,
+    output_file: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    outliers: OutlierSketches | None = None,
+    outlier_method: str = "iqr",
+    outlier_k: float | None = None,
+) -> int:
+    """Clean a sales file too large for memory, chunk by chunk.
+
+    Makes two passes over the raw file. The first de-duplicates rows across
+    chunks with a digest set and estimates the median ``saleamount`` with a
+    quantile sketch (exact below a few hundred rows, rank error well under
+    1% above); the second re-reads the file with dtypes fixed for the whole
+    file, applies the same cleaning as ``clean_sales_data`` and appends each
+    chunk to the output. Peak memory is one chunk, plus the digest set
+    (about 8 bytes per distinct row) and the keep-masks (1 bit per row),
+    which still grow with the file.
+    With ``outliers``, the first pass also fills the sketches and the
+    second drops rows outside the fitted bounds.
+
+    Returns the number of rows written.
+    """
+    input_path = RAW_DATA_DIR / input_file
+    output_path = PREPARED_DATA_DIR / output_file
+    logger.info(f"Streaming raw data: {input_file} in chunks of {chunk_size} rows")
+
+    keep_masks, median, dtypes, duplicates = _scan_sales_chunks(input_path, chunk_size, outliers)
+    logger.info(f"Removed duplicates: {duplicates} rows")
+    logger.info(f"Global saleamount median: {median}")
+    bounds = _log_bounds(outliers, outlier_method, outlier_k) if outliers is not None else None
+
+    # Map standardized names back to the raw header so read_csv applies them;
+    # integer columns stay text and are coerced per chunk as in the first pass
+    options = csv_options(input_path, "sales")
+    scanned = {raw: dtypes[raw.strip().lower()] for raw in options["usecols"]}
+    options["dtype"] = scanned | options["dtype"]
+
+    # Output columns, so a file whose rows are all removed still has its header
+    empty = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()})
+    columns = list(add_date_ids(parse_dates(empty, "sales"), "sales").columns)
+
+    rows_written = 0
+    removed: dict[str, int] = {}
+    first_date = last_date = None  # date_id span for the calendar
+    with (
+        pd.read_csv(input_path, chunksize=chunk_size, **options) as reader,
+        PreparedWriter(output_path, columns=columns) as writer,
+    ):
+        for i, (chunk, packed) in enumerate(zip(reader, keep_masks, strict=True)):
+            chunk, _ = coerce_integers(_standardize_columns(chunk), "sales")
+            chunk = parse_dates(chunk, "sales")
+            keep = np.unpackbits(packed, count=len(chunk)).astype(bool)
+            # Same rules as clean_sales_data, with the median of the whole file
+            chunk, chunk_removed = SALES_ROW_PLAN.run(chunk[keep], {"saleamount": median})
+            if outliers is not None:
+                outlier_keep = outliers.keep_mask(chunk, bounds)
+                chunk_removed[f"{outlier_method} outliers"] = int((~outlier_keep).sum())
+                chunk = chunk[outlier_keep]
+            for rule, rows in chunk_removed.items():
+                removed[rule] = removed.get(rule, 0) + rows
+            ids = add_date_ids(chunk, "sales")["date_id"].dropna()
+            if len(ids):
+                first_date = min(ids.min(), first_date or ids.min())
+                last_date = max(ids.max(), last_date or ids.max())
+            writer.write(chunk)
+            rows_written += len(chunk)
+            logger.debug("Chunk {}: wrote {} rows", i, len(chunk))
+            log_sampled(
+                "INFO",
+                "Streamed {} of {} chunks ({} rows written)",
+                i + 1,
+                len(keep_masks),
+                rows_written,
+                seconds=PROGRESS_SECONDS,
+            )
+
+    output_path = writer.path
+    for rule, rows in removed.items():
+        logger.info("Removed {} rows: {}", rows, rule)
+    logger.info(f"Saved cleaned data to {output_path} ({rows_written} rows)")
+    calendar = write_calendar(first_date, last_date, PREPARED_DATA_DIR)
+    logger.info(f"Saved calendar to {calendar}")
+    return rows_written
+
 
 #####################################
 # Main Execution
 #####################################
 
-def main():
+
+@timed_stage("prepare_sales")
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Prepare sales data")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream the raw file in chunks of this many rows to bound memory use",
+    )
+    parser.add_argument(
+        "--outliers",
+        choices=METHODS,
+        default=None,
+        help="Remove saleamount/discountpercent outliers using IQR or z-score bounds",
+    )
+    parser.add_argument(
+        "--outlier-by",
+        choices=OUTLIER_GROUPS,
+        default=None,
+        help="Fit outlier bounds per product or per store instead of overall",
+    )
+    parser.add_argument(
+        "--outlier-k",
+        type=float,
+        default=None,
+        help="IQR multiplier (default 1.5) or z-score limit (default 3)",
+    )
+    args = parser.parse_args(argv)
+
     logger.info("==================================")
     logger.info("STARTING prepare_sales_data.py")
     logger.info("==================================")
@@ -99,13 +390,46 @@ def main():
     input_file = "sales_data.csv"
     output_file = "sales_prepared.csv"
 
-    df = read_raw_data(input_file)
-    df_clean = clean_sales_data(df)
-    save_prepared_data(df_clean, output_file)
+    # Skip the work when neither the raw file nor this code has changed
+    # (streaming and in-memory runs produce the same output, so share a key)
+    cache = BuildCache()
+    options = {"format": prepared_format()}
+    if args.outliers:
+        options["outliers"] = [args.outliers, args.outlier_by, args.outlier_k]
+    key = stage_key([RAW_DATA_DIR / input_file], [pathlib.Path(__file__), *SHARED_CODE], options)
+    if (hit := cache.lookup("sales", key)) is not None:
+        logger.info(f"{input_file} unchanged, reusing {hit.output}")
+        return hit.rows
+
+    outliers = OutlierSketches(OUTLIER_COLUMNS, args.outlier_by) if args.outliers else None
+    if args.chunksize:
+        with timed_stage("prepare_sales.stream") as stage:
+            rows = stage.rows = stream_sales_data(
+                input_file, output_file, args.chunksize, outliers, args.outliers, args.outlier_k
+            )
+    else:
+        with timed_stage("prepare_sales.read") as stage:
+            df = read_raw_data(input_file)
+            stage.rows = len(df)
+        with timed_stage("prepare_sales.clean") as stage:
+            df_clean = clean_sales_data(df, outliers, args.outliers, args.outlier_k)
+            stage.rows = len(df_clean)
+        with timed_stage("prepare_sales.save") as stage:
+            save_prepared_data(df_clean, output_file)
+            rows = stage.rows = len(df_clean)
+    cache.record(
+        "sales",
+        key,
+        resolve_prepared(PREPARED_DATA_DIR / output_file),
+        rows,
+        side_outputs=[resolve_prepared(PREPARED_DATA_DIR / CALENDAR_FILE)],
+    )
 
     logger.info("==================================")
     logger.info("FINISHED prepare_sales_data.py")
     logger.info("==================================")
+    return rows
+
 
 #####################################
 # Conditional Execution
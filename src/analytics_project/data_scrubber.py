@@ -1,5 +1,12 @@
-import pandas as pd
 from pathlib import Path
+import time
+
+import pandas as pd
+
+from analytics_project.build_cache import SHARED_CODE, BuildCache, stage_key
+from analytics_project.cleaning_rules import Dedup, Fill, Normalize, compile_rules
+from analytics_project.prepared_io import prepared_format, write_prepared
+from analytics_project.schemas import memory_mb
 
 # ===============================
 # Define directories and folders
@@ -14,26 +21,50 @@ PREPARED_DIR = BASE_DIR / "data" / "prepared"
 # Create the prepared directory if it doesn't exist
 PREPARED_DIR.mkdir(parents=True, exist_ok=True)
 
+# Fill value for missing text; numeric and date columns keep their nulls
+MISSING_TEXT = "Unknown"
+
+
 # ===============================
 # Define cleaning function
 # ===============================
-def clean_dataframe(df):
-    """Perform basic data cleaning steps on a pandas DataFrame."""
+def _is_text(series):
+    """Return True for string columns (and object columns that only hold strings)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string"
+
+
+def scrub_rules(df):
+    """Return the cleaning rules for a frame based on its column dtypes.
+
+    Text and categorical columns are stripped (categoricals once per
+    category; the str dtype is Arrow-backed when pyarrow is installed, so
+    the strip is a vectorized compute kernel) and their missing values
+    become "Unknown". Numbers, booleans and dates keep their dtype and
+    nulls; filling them with text would turn the column into object.
+    Duplicates are dropped last, so rows that only differed by surrounding
+    whitespace collapse too.
+    """
+    rules = []
+    for col in df.columns:
+        if _is_text(df[col]) or isinstance(df[col].dtype, pd.CategoricalDtype):
+            rules += [Normalize(col, ("strip",)), Fill(col, MISSING_TEXT)]
+    return [*rules, Dedup()]
 
-    # Remove duplicate rows
-    df = df.drop_duplicates()
 
-    # Fill missing values with 'Unknown'
-    df = df.fillna("Unknown")
-
-    # Convert all column names to lowercase, remove spaces, and strip whitespace
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+def clean_dataframe(df):
+    """Perform basic data cleaning steps on a pandas DataFrame.
 
-    # Ensure all string values are stripped of whitespace
-    for col in df.select_dtypes(include=["object"]).columns:
-        df[col] = df[col].astype(str).str.strip()
+    Column names are lower-cased with spaces replaced by underscores, then
+    the rules from ``scrub_rules`` run in one pass.
+    """
+    df = df.set_axis(df.columns.str.strip().str.lower().str.replace(" ", "_"), axis=1)
+    cleaned, _ = compile_rules(scrub_rules(df)).run(df)
+    return cleaned
 
-    return df
 
 # ===============================
 # Define processing function
@@ -47,20 +78,42 @@ def process_and_save(filename, output_name):
         print(f"⚠️ File not found: {input_path}")
         return
 
+    # Skip files whose content and cleaning code are unchanged since last run
+    cache = BuildCache()
+    stage = f"scrub_{Path(output_name).stem}"
+    key = stage_key([input_path], [Path(__file__), *SHARED_CODE], {"format": prepared_format()})
+    if (hit := cache.lookup(stage, key)) is not None:
+        print(f"⏭️ {filename} unchanged, keeping {hit.output}")
+        return
+
     print(f"Processing {filename}...")
 
     # Read, clean, and save
     df = pd.read_csv(input_path)
+    start = time.perf_counter()
     cleaned_df = clean_dataframe(df)
-    cleaned_df.to_csv(output_path, index=False)
+    elapsed = time.perf_counter() - start
+    print(
+        f"   {len(df)} -> {len(cleaned_df)} rows, {memory_mb(df):.2f} MB -> "
+        f"{memory_mb(cleaned_df):.2f} MB, cleaned in {elapsed * 1000:.1f} ms"
+    )
+    output_path = write_prepared(cleaned_df, output_path)
+    cache.record(stage, key, output_path, len(cleaned_df))
 
     print(f"✅ Saved cleaned data to: {output_path}")
 
+
 # ===============================
 # Process all raw data files
 # ===============================
-process_and_save("customers_data.csv", "customers_prepared.csv")
-process_and_save("products_data.csv", "products_prepared.csv")
-process_and_save("sales_data.csv", "sales_prepared.csv")
+def main():
+    """Clean every raw file into the prepared folder."""
+    process_and_save("customers_data.csv", "customers_prepared.csv")
+    process_and_save("products_data.csv", "products_prepared.csv")
+    process_and_save("sales_data.csv", "sales_prepared.csv")
+
+    print("🎉 All files processed and saved successfully!")
+
 
-print("🎉 All files processed and saved successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Integer date keys and the calendar dimension they join to.
+
+Prepared files carry each parsed date a second time as an integer
+``date_id`` (YYYYMMDD): ``saledate`` -> ``date_id`` for sales and
+``dateenrolled`` -> ``enrolled_date_id`` for customers (see
+``DATE_ID_COLUMNS``). Integer keys sort chronologically and group without
+string comparisons.
+
+The sales stage also writes dates_prepared.csv: one row per day between
+the first and last sale with day, ISO week, month, quarter, year and ISO
+weekday (1 = Monday), the same columns as the ``dates`` table in
+SQL/create_tables.sql. Reports group by ``date_id`` and join the calendar
+for the attributes they show.
+
+Module Information:
+    - Filename: date_dim.py
+    - Module: date_dim
+    - Location: src/analytics_project/
+"""
+
+import pathlib
+
+import pandas as pd
+
+from .prepared_io import write_prepared
+
+# Dataset -> {date column: integer key column}
+DATE_ID_COLUMNS: dict[str, dict[str, str]] = {
+    "customers": {"dateenrolled": "enrolled_date_id"},
+    "sales": {"saledate": "date_id"},
+}
+
+CALENDAR_FILE = "dates_prepared.csv"
+CALENDAR_COLUMNS: tuple[str, ...] = (
+    "date_id", "date", "day", "week", "month", "quarter", "year", "weekday",
+)  # fmt: skip
+
+
+def date_ids(dates: pd.Series) -> pd.Series:
+    """Return YYYYMMDD integer keys for parsed dates (NaT becomes <NA>)."""
+    ids = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return ids.astype("Int32")
+
+
+def add_date_ids(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Insert each date column's integer key right after it (in place)."""
+    for date_col, id_col in DATE_ID_COLUMNS.get(dataset, {}).items():
+        if date_col in df.columns and id_col not in df.columns:
+            df.insert(df.columns.get_loc(date_col) + 1, id_col, date_ids(df[date_col]))
+    return df
+
+
+def build_calendar(first: int, last: int) -> pd.DataFrame:
+    """Return one calendar row per day from date_id ``first`` to ``last``."""
+    days = pd.date_range(
+        pd.to_datetime(str(first), format="%Y%m%d"),
+        pd.to_datetime(str(last), format="%Y%m%d"),
+        freq="D",
+    )
+    iso = days.isocalendar()
+    return pd.DataFrame(
+        {
+            "date_id": days.year * 10000 + days.month * 100 + days.day,
+            "date": days.strftime("%Y-%m-%d"),
+            "day": days.day,
+            "week": iso["week"].to_numpy(dtype="int64"),
+            "month": days.month,
+            "quarter": days.quarter,
+            "year": days.year,
+            "weekday": iso["day"].to_numpy(dtype="int64"),
+        }
+    )
+
+
+def write_calendar(first: int | None, last: int | None, prepared_dir: pathlib.Path) -> pathlib.Path:
+    """Write the calendar covering ``first``..``last`` to the prepared folder."""
+    calendar = (
+        build_calendar(first, last)
+        if first is not None and last is not None
+        else pd.DataFrame(columns=list(CALENDAR_COLUMNS))
+    )
+    return write_prepared(calendar, prepared_dir / CALENDAR_FILE)
@@ -0,0 +1,208 @@
+"""Dense, memory-mappable lookup tables for enriching sales with dimensions.
+
+A ``DimensionLookup`` holds one dimension as arrays indexed by key offset:
+slot ``key - base`` of each array describes that key (``customerid - 1000``
+for customers, ``productid - 2000`` for products). Numeric attributes are
+float64 arrays with NaN for missing values. Text attributes are
+dictionary-encoded: an int32 code per slot (-1 = missing) plus a sorted
+array of labels. Enriching a fact column is then one subtraction and one
+NumPy gather per attribute; the sales frame itself is never copied or
+merged.
+
+    customers = load_or_build("customers")
+    sales = sales.join(customers.enrich(sales["customerid"]))
+
+Lookups are saved as a folder of ``.npy`` files plus ``meta.json`` under
+data/lookups/<name>/. ``load`` memory-maps the arrays read-only, so
+opening a lookup costs no copy. Worker processes that load the same folder
+share the pages through the OS page cache, and only the folder path has to
+be passed to them, not pickled arrays. Labels are stored as fixed-width
+Unicode so no array needs pickle. A saved lookup is rebuilt when its
+prepared file is newer.
+
+Module Information:
+    - Filename: dim_lookup.py
+    - Module: dim_lookup
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.dim_lookup
+"""
+
+from dataclasses import dataclass
+import json
+import os
+import pathlib
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .etl_to_dw import BASE_DIR, PREPARED_DATA_DIR
+from .prepared_io import read_prepared, resolve_prepared
+from .utils_logger import init_logger, logger, timed_stage
+
+LOOKUP_DIR: pathlib.Path = BASE_DIR / "data" / "lookups"
+
+# Lookup name -> (prepared file, key column, attributes)
+LOOKUPS: dict[str, tuple[str, str, tuple[str, ...]]] = {
+    "customers": ("customers_prepared.csv", "customerid", ("region", "preferredcontact")),
+    "products": ("products_prepared.csv", "productid", ("category", "unitprice")),
+}
+
+# A key range this many times larger than the row count is too sparse for
+# dense arrays (plus slack so tiny dimensions are always dense)
+MAX_SPARSITY = 16
+MIN_SLOTS = 1 << 16
+
+MISSING_CODE = -1
+
+
+@dataclass(frozen=True)
+class DimensionLookup:
+    """One dimension as dense arrays indexed by ``key - base``."""
+
+    key: str
+    base: int
+    attributes: tuple[str, ...]
+    present: np.ndarray  # bool per slot: a row exists for base + slot
+    numeric: dict[str, np.ndarray]  # float64 per slot
+    codes: dict[str, np.ndarray]  # int32 per slot, MISSING_CODE if absent
+    labels: dict[str, np.ndarray]  # sorted distinct labels per text attribute
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, key: str, attributes: tuple[str, ...]
+    ) -> "DimensionLookup":
+        """Build a lookup; when a key repeats, its last row wins.
+
+        Raises:
+            ValueError: If the keys are too sparse for dense arrays.
+        """
+        keys = pd.to_numeric(df[key], errors="coerce")
+        df = df.loc[keys.notna(), list(attributes)]
+        keys = keys[keys.notna()].to_numpy(dtype=np.int64)
+        base = int(keys.min()) if len(keys) else 0
+        span = int(keys.max()) - base + 1 if len(keys) else 0
+        if span > max(MIN_SLOTS, MAX_SPARSITY * len(keys)):
+            raise ValueError(f"{key} spans {span:,} values for {len(keys):,} rows; too sparse")
+
+        slots = keys - base
+        present = np.zeros(span, dtype=bool)
+        present[slots] = True
+        numeric, codes, labels = {}, {}, {}
+        for name in attributes:
+            values = df[name]
+            if pd.api.types.is_numeric_dtype(values):
+                column = np.full(span, np.nan)
+                column[slots] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                numeric[name] = column
+            else:
+                row_codes, uniques = pd.factorize(values, sort=True)
+                column = np.full(span, MISSING_CODE, dtype=np.int32)
+                column[slots] = row_codes
+                codes[name] = column
+                labels[name] = np.asarray(uniques, dtype=str)  # fixed width, no pickle
+        return cls(key, base, tuple(attributes), present, numeric, codes, labels)
+
+    def slots(self, keys) -> tuple[np.ndarray, np.ndarray]:
+        """Return (slot per key, found mask); unknown or missing keys are not found."""
+        keys = pd.to_numeric(pd.Series(keys), errors="coerce").to_numpy(np.float64, na_value=np.nan)
+        offsets = keys - self.base
+        found = (offsets >= 0) & (offsets < len(self.present))  # False for NaN
+        slots = np.where(found, offsets, 0).astype(np.intp)
+        found &= self.present[slots] if len(self.present) else False
+        return slots, found
+
+    def enrich(self, keys, attributes: list[str] | None = None) -> pd.DataFrame:
+        """Return the attributes of each key, aligned with ``keys``.
+
+        Text attributes come back as Categoricals over the stored labels, so
+        only an int32 code per row is allocated. Unknown keys get NaN.
+        """
+        slots, found = self.slots(keys)
+        index = keys.index if isinstance(keys, pd.Series) else None
+        columns = {}
+        for name in attributes or self.attributes:
+            if name in self.numeric:
+                columns[name] = np.where(found, self.numeric[name][slots], np.nan)
+            elif name in self.codes:
+                row_codes = np.where(found, self.codes[name][slots], MISSING_CODE)
+                columns[name] = pd.Categorical.from_codes(row_codes, categories=self.labels[name])
+            else:
+                raise KeyError(f"Unknown attribute {name!r}; have {list(self.attributes)}")
+        return pd.DataFrame(columns, index=index)
+
+    def save(self, folder: pathlib.Path) -> pathlib.Path:
+        """Write the arrays as .npy files plus meta.json, replacing ``folder``."""
+        tmp = folder.with_name(f"{folder.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "present.npy", self.present)
+        for name, column in self.numeric.items():
+            np.save(tmp / f"{name}.npy", column)
+        for name, column in self.codes.items():
+            np.save(tmp / f"{name}.codes.npy", column)
+            np.save(tmp / f"{name}.labels.npy", self.labels[name])
+        meta = {"key": self.key, "base": self.base, "attributes": list(self.attributes),
+                "numeric": list(self.numeric), "text": list(self.codes)}  # fmt: skip
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        shutil.rmtree(folder, ignore_errors=True)
+        tmp.replace(folder)
+        return folder
+
+    @classmethod
+    def load(cls, folder: pathlib.Path, mmap: bool = True) -> "DimensionLookup":
+        """Open a saved lookup; arrays are read-only memory maps unless ``mmap`` is False."""
+        meta = json.loads((folder / "meta.json").read_text(encoding="utf-8"))
+        mode = "r" if mmap else None
+        return cls(
+            key=meta["key"],
+            base=meta["base"],
+            attributes=tuple(meta["attributes"]),
+            present=np.load(folder / "present.npy", mmap_mode=mode),
+            numeric={n: np.load(folder / f"{n}.npy", mmap_mode=mode) for n in meta["numeric"]},
+            codes={n: np.load(folder / f"{n}.codes.npy", mmap_mode=mode) for n in meta["text"]},
+            labels={n: np.load(folder / f"{n}.labels.npy") for n in meta["text"]},
+        )
+
+
+def build_lookup(name: str, prepared_dir: pathlib.Path = PREPARED_DATA_DIR) -> DimensionLookup:
+    """Build a lookup in ``LOOKUPS`` from its prepared file."""
+    file_name, key, attributes = LOOKUPS[name]
+    df = read_prepared(prepared_dir / file_name, columns=[key, *attributes])
+    return DimensionLookup.from_frame(df, key, attributes)
+
+
+def load_or_build(
+    name: str,
+    prepared_dir: pathlib.Path = PREPARED_DATA_DIR,
+    lookup_dir: pathlib.Path = LOOKUP_DIR,
+) -> DimensionLookup:
+    """Memory-map a saved lookup, rebuilding it first if its prepared file is newer."""
+    folder = lookup_dir / name
+    source = resolve_prepared(prepared_dir / LOOKUPS[name][0])
+    meta = folder / "meta.json"
+    if not meta.exists() or meta.stat().st_mtime_ns < source.stat().st_mtime_ns:
+        build_lookup(name, prepared_dir).save(folder)
+        logger.info(f"Built {name} lookup from {source.name} into {folder}")
+    return DimensionLookup.load(folder)
+
+
+def main() -> None:
+    """Build and save every lookup from the prepared files."""
+    init_logger()
+    for name in LOOKUPS:
+        with timed_stage(f"dim_lookup_{name}") as stage:
+            lookup = build_lookup(name)
+            folder = lookup.save(LOOKUP_DIR / name)
+            stage.rows = int(lookup.present.sum())
+        size = sum(p.stat().st_size for p in folder.iterdir())
+        logger.info(
+            f"{name}: {stage.rows:,} keys over {len(lookup.present):,} slots "
+            f"from {lookup.key}={lookup.base}, {size / 1024:.1f} KB in {folder}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Propose, create and verify covering indexes for the report queries.
+
+The workload is the queries in SQL/queries.sql. Each query is planned with
+``EXPLAIN QUERY PLAN``, and a query needs help when its plan scans a table
+without a covering index or builds a temp B-tree for GROUP BY / ORDER BY.
+For every table such a query reads, one candidate index is proposed: its
+equality (join and WHERE) columns first, then GROUP BY and ORDER BY columns,
+then every other column the query reads from that table, so the index
+covers the query.
+
+Candidates are created and ``ANALYZE`` is run inside one transaction. Then
+every query is planned again. Candidates that no plan uses are dropped.
+The indexes that remain are kept (or, with ``--dry-run``, rolled back) and
+``PRAGMA optimize`` is run. Plans and latencies (best of ``--repeat`` runs)
+before and after are logged per query.
+
+The query parsing is deliberately simple. It handles single SELECTs that
+join tables with aliases, as in queries.sql. Subqueries and CTEs are not
+analysed.
+
+Module Information:
+    - Filename: index_advisor.py
+    - Module: index_advisor
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.index_advisor [--dry-run] [--repeat 3]
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import pathlib
+import re
+import sqlite3
+import time
+
+from .run_queries import DB_PATH, QUERIES_PATH, split_queries
+from .utils_logger import init_logger, logger, timed_stage
+
+INDEX_PREFIX = "advisor_"
+DEFAULT_REPEAT = 3
+
+# FROM/JOIN <table> [AS] [alias]; a following keyword is not an alias
+TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN)\s+(\w+)"
+    r"(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|INNER|CROSS|GROUP|ORDER|LIMIT)\b)(\w+))?",
+    re.IGNORECASE,
+)
+COLUMN_REF = re.compile(r"(?<![\w.])(?:(\w+)\.)?(\w+)(?![\w.(])")
+EQUALITY = re.compile(r"((?:\w+\.)?\w+)\s*=\s*((?:\w+\.)?\w+)")
+CLAUSE_END = r"(?=\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|$)"
+# Index named in a query-plan step: "... USING [COVERING] INDEX <name> (...)"
+PLAN_INDEX = re.compile(r"\bINDEX (\w+)")
+
+
+@dataclass
+class QueryReport:
+    """Plan and latency of one query before and after indexing."""
+
+    title: str
+    sql: str
+    plan_before: list[str] = field(default_factory=list)
+    plan_after: list[str] = field(default_factory=list)
+    ms_before: float = 0.0
+    ms_after: float = 0.0
+    error: str | None = None
+
+    @property
+    def speedup(self) -> float:
+        """How many times faster the query ran after indexing (0.0 if untimed)."""
+        return self.ms_before / self.ms_after if self.ms_after else 0.0
+
+
+@dataclass
+class AdvisorReport:
+    """Outcome of one advisor run."""
+
+    queries: list[QueryReport]
+    created: list[str] = field(default_factory=list)  # CREATE INDEX statements kept
+    rejected: list[str] = field(default_factory=list)  # candidates no plan used
+
+
+def needs_index(plan: list[str]) -> bool:
+    """Return True if a plan scans a table without a covering index or sorts."""
+    return any(
+        (step.startswith("SCAN ") and "COVERING INDEX" not in step) or "TEMP B-TREE" in step
+        for step in plan
+    )
+
+
+def _plan(conn: sqlite3.Connection, sql: str) -> list[str]:
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _latency_ms(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _rowid_column(conn: sqlite3.Connection, table: str) -> str | None:
+    """Return the INTEGER PRIMARY KEY column (an alias of the rowid), if any."""
+    keys = [row for row in conn.execute(f'PRAGMA table_info("{table}")') if row[5]]
+    return keys[0][1] if len(keys) == 1 and keys[0][2].upper() == "INTEGER" else None
+
+
+def _existing_indexes(conn: sqlite3.Connection, table: str) -> list[tuple[str, ...]]:
+    """Column lists of a table's indexes (the INTEGER PRIMARY KEY is its rowid)."""
+    indexes = []
+    for row in conn.execute(f'PRAGMA index_list("{table}")'):
+        info = conn.execute(f'PRAGMA index_info("{row[1]}")').fetchall()
+        indexes.append(tuple(r[2] for r in info))
+    return indexes
+
+
+def propose_indexes(conn: sqlite3.Connection, sql: str) -> dict[str, tuple[str, ...]]:
+    """Return a covering index candidate (column order) per table a query reads."""
+    aliases = {(alias or table).lower(): table for table, alias in TABLE_REF.findall(sql)}
+    tables = set(aliases.values())
+    columns = {table: _table_columns(conn, table) for table in tables}
+
+    def resolve(qualifier: str, name: str) -> tuple[str, str] | None:
+        if qualifier:
+            table = aliases.get(qualifier.lower())
+            return (table, name) if table and name in columns[table] else None
+        owners = [table for table in tables if name in columns[table]]
+        return (owners[0], name) if len(owners) == 1 else None
+
+    def refs(text: str) -> list[tuple[str, str]]:
+        found = (resolve(q, n) for q, n in COLUMN_REF.findall(text))
+        return [ref for ref in found if ref]
+
+    group = re.search(rf"\bGROUP\s+BY\b(.*?){CLAUSE_END}", sql, re.IGNORECASE | re.DOTALL)
+    order = re.search(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|$)", sql, re.IGNORECASE | re.DOTALL)
+    equality = [ref for pair in EQUALITY.findall(sql) for ref in refs(" ".join(pair))]
+    ordered = (
+        equality
+        + refs(group.group(1) if group else "")
+        + refs(order.group(1) if order else "")
+        + refs(sql)
+    )
+
+    candidates: dict[str, list[str]] = {table: [] for table in tables}
+    for table, column in ordered:
+        if column not in candidates[table]:
+            candidates[table].append(column)
+    for table, cols in candidates.items():
+        # Every index entry already carries the rowid; keep it only as a leading key
+        rowid = _rowid_column(conn, table)
+        if rowid in cols[1:]:
+            cols.remove(rowid)
+    return {table: tuple(cols) for table, cols in candidates.items() if cols}
+
+
+def _create_statement(table: str, cols: tuple[str, ...]) -> tuple[str, str]:
+    """Return (index name, CREATE INDEX statement) for a candidate."""
+    name = f"{INDEX_PREFIX}{table}_{'_'.join(cols)}"
+    column_list = ", ".join(f'"{c}"' for c in cols)
+    return name, f'CREATE INDEX "{name}" ON "{table}" ({column_list})'
+
+
+def _collect_candidates(
+    conn: sqlite3.Connection, reports: list[QueryReport], repeat: int
+) -> dict[str, str]:
+    """Plan and time every query; return index name -> CREATE INDEX for those needing help."""
+    candidates: dict[str, str] = {}
+    for q in reports:
+        try:
+            q.plan_before = _plan(conn, q.sql)
+            q.ms_before = _latency_ms(conn, q.sql, repeat)
+        except sqlite3.Error as e:
+            q.error = str(e)
+            logger.warning(f"Skipping query '{q.title}': {e}")
+            continue
+        if needs_index(q.plan_before):
+            for table, cols in propose_indexes(conn, q.sql).items():
+                if cols not in _existing_indexes(conn, table):
+                    name, statement = _create_statement(table, cols)
+                    candidates[name] = statement
+    return candidates
+
+
+def _keep_used(conn: sqlite3.Connection, candidates: dict[str, str], report: AdvisorReport) -> None:
+    """Replan the queries and drop the created candidates that no plan uses."""
+    used = set()
+    for q in report.queries:
+        if q.error is None:
+            q.plan_after = _plan(conn, q.sql)
+            used.update(name for step in q.plan_after for name in PLAN_INDEX.findall(step))
+    for name, statement in candidates.items():
+        if name in used:
+            report.created.append(statement)
+        else:
+            conn.execute(f'DROP INDEX "{name}"')
+            report.rejected.append(statement)
+
+
+def advise(
+    db_path: pathlib.Path = DB_PATH,
+    queries_path: pathlib.Path = QUERIES_PATH,
+    repeat: int = DEFAULT_REPEAT,
+    dry_run: bool = False,
+) -> AdvisorReport:
+    """Measure the workload, add the covering indexes its plans use, measure again.
+
+    Raises:
+        FileNotFoundError: If the database does not exist.
+    """
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+    queries = split_queries(queries_path.read_text(encoding="utf-8"))
+    reports = [QueryReport(sql.splitlines()[0].removeprefix("--").strip(), sql) for sql in queries]
+    report = AdvisorReport(reports)
+
+    conn = sqlite3.connect(db_path, isolation_level=None)  # BEGIN/COMMIT below only
+    try:
+        candidates = _collect_candidates(conn, reports, repeat)
+
+        conn.execute("BEGIN")
+        for statement in candidates.values():
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+        _keep_used(conn, candidates, report)
+
+        for q in reports:
+            if q.error is None:
+                q.plan_after = _plan(conn, q.sql)
+                q.ms_after = _latency_ms(conn, q.sql, repeat)
+        conn.execute("ROLLBACK" if dry_run else "COMMIT")
+        conn.execute("PRAGMA optimize")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return report
+
+
+def log_report(report: AdvisorReport, dry_run: bool = False) -> None:
+    """Log per-query plans and latencies, then the index changes."""
+    for q in report.queries:
+        if q.error:
+            logger.warning(f"{q.title}: {q.error}")
+            continue
+        logger.info(f"{q.title}: {q.ms_before:.1f} ms -> {q.ms_after:.1f} ms ({q.speedup:.1f}x)")
+        logger.info(f"  before: {' | '.join(q.plan_before)}")
+        logger.info(f"  after:  {' | '.join(q.plan_after)}")
+    verb = "Would create" if dry_run else "Created"
+    for statement in report.created:
+        logger.info(f"{verb}: {statement}")
+    for statement in report.rejected:
+        logger.info(f"Rejected (unused by any plan): {statement}")
+    if not report.created:
+        logger.info("No new indexes needed")
+
+
+def main(argv: list[str] | None = None) -> AdvisorReport:
+    """Add and time indexes for the report queries, then log the report."""
+    parser = argparse.ArgumentParser(description="Add covering indexes for SQL/queries.sql")
+    parser.add_argument("--db", type=pathlib.Path, default=DB_PATH, help="SQLite database")
+    parser.add_argument("--queries", type=pathlib.Path, default=QUERIES_PATH, help="SQL file")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per timing")
+    parser.add_argument("--dry-run", action="store_true", help="Report, then roll back")
+    args = parser.parse_args(argv)
+
+    init_logger()
+    with timed_stage("index_advisor"):
+        report = advise(args.db, args.queries, args.repeat, args.dry_run)
+    log_report(report, args.dry_run)
+    return report
+
+
+if __name__ == "__main__":
+    main()
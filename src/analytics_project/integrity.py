@@ -0,0 +1,291 @@
+"""Check that every prepared sale references a known customer and product.
+
+The dimension keys are loaded once into sorted NumPy arrays (``KeyIndex``),
+and the sales file is streamed in chunks; each chunk's ``customerid`` and
+``productid`` columns are looked up with one vectorized ``searchsorted``
+per key. SQLite is never queried row by row.
+
+Orphan rows (a key missing from its dimension, or no key at all) are moved
+out of the prepared sales file into data/quarantine/sales_orphans.csv with
+an ``orphan_reason`` column, and counts per key are logged. When nothing
+is orphaned the sales file is left untouched and any stale quarantine file
+is removed.
+
+The sales stage may be skipped on the next run (its cache entry points at
+the stripped file), so quarantined rows would otherwise never be checked
+again. The stat of the stripped file is kept next to the quarantine file;
+while the sales file still matches it, the quarantined rows are checked
+again with the sales rows, and those whose keys now resolve are written
+back to the sales file. A rebuilt sales file holds every row again, so the
+old quarantine file is then simply replaced. After a rewrite the sales stage's build-cache entry is pointed
+at the new file, so the next run still reuses it, and a result entry for
+this check lets that run skip the scan while the dimensions are unchanged.
+
+Module Information:
+    - Filename: integrity.py
+    - Module: integrity
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.integrity [--check-only]
+"""
+
+import argparse
+from contextlib import suppress
+from dataclasses import dataclass, field
+import json
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from .build_cache import BuildCache, output_stat, stage_key
+from .etl_to_dw import BASE_DIR, PREPARED_DATA_DIR
+from .prepared_io import PreparedWriter, format_of, iter_prepared, read_prepared, resolve_prepared
+from .utils_logger import init_logger, logger
+
+QUARANTINE_DIR: pathlib.Path = BASE_DIR / "data" / "quarantine"
+
+# Fact key -> (dimension file, dimension key)
+SALES_REFERENCES: dict[str, tuple[str, str]] = {
+    "customerid": ("customers_prepared.csv", "customerid"),
+    "productid": ("products_prepared.csv", "productid"),
+}
+
+CHUNK_SIZE = 100_000
+# Stat of the sales file written after the last quarantine, next to the quarantine file
+QUARANTINE_STATE = "sales_orphans.state.json"
+
+
+class KeyIndex:
+    """Sorted distinct keys of a dimension for vectorized membership tests."""
+
+    def __init__(self, keys: pd.Series) -> None:
+        """Index the distinct numeric keys; values that are not numbers are ignored."""
+        values = pd.to_numeric(keys, errors="coerce").dropna().to_numpy(dtype="float64")
+        self.keys = np.unique(values)
+
+    def contains(self, values: pd.Series) -> np.ndarray:
+        """Return True where a value is a known key (missing values are not)."""
+        probe = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        if len(self.keys) == 0:
+            return np.zeros(len(probe), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.keys, probe), len(self.keys) - 1)
+        return self.keys[pos] == probe  # NaN never compares equal
+
+
+@dataclass
+class IntegrityReport:
+    """Counts from one validation run."""
+
+    rows: int = 0
+    kept: int = 0
+    orphans: dict[str, int] = field(default_factory=dict)
+    quarantine_file: pathlib.Path | None = None
+
+    @property
+    def quarantined(self) -> int:
+        """Number of rows moved to the quarantine file."""
+        return self.rows - self.kept
+
+
+def load_key_indexes(prepared_dir: pathlib.Path = PREPARED_DATA_DIR) -> dict[str, KeyIndex]:
+    """Build a KeyIndex per sales foreign key, reading only the key columns."""
+    return {
+        fact_key: KeyIndex(read_prepared(prepared_dir / file, columns=[dim_key])[dim_key])
+        for fact_key, (file, dim_key) in SALES_REFERENCES.items()
+    }
+
+
+def _orphan_reasons(
+    chunk: pd.DataFrame, indexes: dict[str, KeyIndex], counts: dict[str, int] | None = None
+) -> pd.Series:
+    """Return "key;..." for each row with an unknown or missing key, else "".
+
+    Orphans per key are added to ``counts`` when it is given.
+    """
+    reasons = pd.Series("", index=chunk.index)
+    for key, index in indexes.items():
+        missing = ~index.contains(chunk[key])
+        if counts is not None:
+            counts[key] += int(missing.sum())
+        reasons[missing] += f"{key};"
+    return reasons
+
+
+class _Quarantine:
+    """Orphan rows written to the quarantine file, replacing it on the first write."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.started = False
+
+    def write(self, rows: pd.DataFrame) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        rows.to_csv(
+            self.path, mode="a" if self.started else "w", header=not self.started, index=False
+        )
+        self.started = True
+
+
+def _scan(
+    chunk: pd.DataFrame,
+    indexes: dict[str, KeyIndex],
+    report: IntegrityReport,
+    quarantine: _Quarantine | None,
+) -> np.ndarray:
+    """Count a chunk's orphans, quarantining them if asked; return the kept mask."""
+    reasons = _orphan_reasons(chunk, indexes, report.orphans)
+    orphan = (reasons != "").to_numpy()
+    report.rows += len(chunk)
+    report.kept += int((~orphan).sum())
+    if quarantine is not None and orphan.any():
+        quarantine.write(chunk[orphan].assign(orphan_reason=reasons[orphan].str.rstrip(";")))
+    return ~orphan
+
+
+def _carried_orphans(
+    quarantine_file: pathlib.Path, state_file: pathlib.Path, sales_path: pathlib.Path
+) -> pd.DataFrame:
+    """Return the quarantined rows if the sales file is still the one stripped of them.
+
+    Once the sales stage rebuilds its file the rows are back in it, and an
+    empty frame is returned.
+    """
+    try:
+        if json.loads(state_file.read_text(encoding="utf-8")) == output_stat(sales_path):
+            df = pd.read_csv(quarantine_file, dtype_backend="numpy_nullable")
+            return df.drop(columns="orphan_reason")
+    except (FileNotFoundError, ValueError):
+        pass
+    return pd.DataFrame()
+
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: pd.Series | None) -> pd.DataFrame:
+    """Cast rows read back from the quarantine CSV to the sales file's dtypes."""
+    if dtypes is None:
+        return df
+    df = df.copy()
+    for col in df.columns.intersection(dtypes.index):
+        # Left as read if it does not fit, e.g. a missing key in a plain int column
+        with suppress(TypeError, ValueError):
+            df[col] = df[col].astype(dtypes[col])
+    return df
+
+
+def _rewrite_sales(
+    sales_path: pathlib.Path,
+    indexes: dict[str, KeyIndex],
+    restored: pd.DataFrame,
+    columns: list[str],
+    chunk_size: int,
+) -> None:
+    """Replace the sales file with its rows that have known keys, plus ``restored``."""
+    writer = PreparedWriter(sales_path, fmt=format_of(sales_path), columns=columns)
+    try:
+        for chunk in iter_prepared(sales_path, chunk_size, nullable=True):
+            writer.write(chunk[(_orphan_reasons(chunk, indexes) == "").to_numpy()])
+        if not restored.empty:
+            writer.write(restored)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+
+
+def _keep_quarantine_state(
+    quarantine_file: pathlib.Path,
+    state_file: pathlib.Path,
+    sales_path: pathlib.Path,
+    quarantined: bool,
+) -> None:
+    """Note which sales file the quarantined rows are missing from, or clean up."""
+    if quarantined:
+        state_file.write_text(json.dumps(output_stat(sales_path)), encoding="utf-8")
+    else:
+        quarantine_file.unlink(missing_ok=True)
+        state_file.unlink(missing_ok=True)
+
+
+def validate_sales(
+    prepared_dir: pathlib.Path = PREPARED_DATA_DIR,
+    quarantine_dir: pathlib.Path = QUARANTINE_DIR,
+    chunk_size: int = CHUNK_SIZE,
+    check_only: bool = False,
+) -> IntegrityReport:
+    """Check sales foreign keys and quarantine orphan rows.
+
+    The first pass only counts (and copies orphans to the quarantine file);
+    the sales file is rewritten in a second pass only if orphans are removed
+    from it or earlier quarantined rows are restored to it. With
+    ``check_only`` the counts are reported but no file is changed.
+    """
+    sales_path = resolve_prepared(prepared_dir / "sales_prepared.csv")
+    quarantine_file = quarantine_dir / "sales_orphans.csv"
+    state_file = quarantine_dir / QUARANTINE_STATE
+    cache = BuildCache()
+    key = stage_key(
+        [resolve_prepared(prepared_dir / file) for file, _ in SALES_REFERENCES.values()],
+        [pathlib.Path(__file__)],
+        {"sales": str(sales_path)},
+    )
+    if not check_only and (hit := cache.lookup("integrity", key)) is not None:
+        logger.info(f"{sales_path.name} already validated against unchanged dimensions")
+        quarantined = quarantine_file if quarantine_file.exists() else None
+        return IntegrityReport(rows=hit.rows, kept=hit.rows, quarantine_file=quarantined)
+
+    indexes = load_key_indexes(prepared_dir)
+    report = IntegrityReport(orphans=dict.fromkeys(indexes, 0))
+    carried = _carried_orphans(quarantine_file, state_file, sales_path)
+    quarantine = None if check_only else _Quarantine(quarantine_file)
+    dtypes = None
+
+    # Nullable types, so integer columns with gaps are written back unchanged
+    for chunk in iter_prepared(sales_path, chunk_size, nullable=True):
+        dtypes = chunk.dtypes if dtypes is None else dtypes
+        _scan(chunk, indexes, report, quarantine)
+    stripped = quarantine is not None and quarantine.started  # orphans left the sales file
+    restored = carried
+    if not carried.empty:
+        # Rows quarantined by an earlier run, checked against today's dimensions
+        restored = _restore_dtypes(carried, dtypes)
+        restored = restored[_scan(restored, indexes, report, quarantine)]
+
+    if quarantine is not None:
+        if stripped or not restored.empty:
+            before = output_stat(sales_path)
+            columns = list(dtypes.index) if dtypes is not None else list(carried)
+            _rewrite_sales(sales_path, indexes, restored, columns, chunk_size)
+            # The sales stage's output is now the kept rows; keep its cache entry valid
+            cache.refresh("sales", sales_path, before, report.kept)
+            if not restored.empty:
+                logger.info(f"Restored {len(restored)} quarantined sales whose keys now resolve")
+        _keep_quarantine_state(quarantine_file, state_file, sales_path, quarantine.started)
+        if quarantine.started:
+            report.quarantine_file = quarantine_file
+        side_outputs = [quarantine_file] if quarantine.started else None
+        cache.record("integrity", key, sales_path, report.kept, side_outputs)
+
+    for key, count in report.orphans.items():
+        logger.info(f"Sales with unknown {key}: {count}")
+    logger.info(
+        f"Integrity check: {report.rows} sales, {report.kept} kept, "
+        f"{report.quarantined} {'orphaned' if check_only else 'quarantined'}"
+        + (f" to {quarantine_file}" if report.quarantine_file else "")
+    )
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Validate sales against the dimensions. Returns the orphan count."""
+    parser = argparse.ArgumentParser(description="Check sales foreign keys")
+    parser.add_argument(
+        "--check-only", action="store_true", help="Report orphans without moving them"
+    )
+    args = parser.parse_args(argv)
+    init_logger()
+    return validate_sales(check_only=args.check_only).quarantined
+
+
+if __name__ == "__main__":
+    main()
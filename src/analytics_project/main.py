@@ -1,7 +1,9 @@
 """Entry point for professional analytics project execution.
 
-This module serves as the orchestrator, demonstrating how professional
-Python projects integrate multiple modules into a cohesive application.
+By default this runs the data pipeline DAG (see orchestrator.py); any
+arguments are passed on to it. ``--demo`` runs the demo modules instead,
+showing how professional Python projects integrate multiple modules into
+a cohesive application.
 
 Module Information:
     - Filename: main.py
@@ -21,7 +23,10 @@ Professional Applications:
     - Scheduled analytics jobs
 """
 
+import sys
+
 # Import from local project modules
+from . import orchestrator
 from .demo_module_basics import demo_basics
 from .demo_module_languages import demo_greetings
 from .demo_module_stats import demo_stats
@@ -29,7 +34,19 @@ from .demo_module_viz import demo_viz
 from .utils_logger import init_logger, logger
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    """Run the pipeline DAG, or the demo modules with ``--demo``.
+
+    Returns:
+        int: Exit status code (0 for success, 1 for failure).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if "--demo" in argv:
+        return run_demos()
+    return orchestrator.main(argv)
+
+
+def run_demos() -> int:
     """Demonstrate a complete Python project structure.
 
     This function coordinates multiple demo modules to illustrate
@@ -69,4 +86,4 @@ if __name__ == "__main__":
 
 
 # List public exports (best practice for packages)
-__all__ = ["main"]
+__all__ = ["main", "run_demos"]
@@ -0,0 +1,260 @@
+"""Slice, dice and roll up the sales fact in memory.
+
+``load_cube`` reads fact_sales joined with the customer and product
+dimensions once and keeps every attribute dictionary-encoded: a sorted
+array of distinct labels plus an integer code per row. Filters turn member
+labels into a boolean lookup over codes, and group-bys combine the codes
+of the requested attributes into one integer key that ``np.bincount``
+aggregates. No query touches SQLite or loops over rows, so on millions of
+facts an interactive query takes milliseconds.
+
+    cube = load_cube()
+    cube.slice("year", "2025").dice(region=["East", "West"]).rollup("region", "customer")
+    cube.drill_down("time", 2)  # year -> month
+
+Module Information:
+    - Filename: olap.py
+    - Module: olap
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.olap
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+import pathlib
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from .etl_to_dw import DB_PATH
+from .schemas import parse_prepared_dates
+from .utils_logger import init_logger, logger
+
+# Fact rows with the attributes analyses group by; the plain append load can
+# leave several copies of a dimension row, so the latest one wins
+CUBE_SQL = """
+SELECT f.saledate, f.customerid, f.productid, f.storeid, f.paymenttype,
+       f.saleamount, f.discountpercent,
+       c.region, c.firstname AS customer_name, p.category, p.productname
+FROM fact_sales f
+LEFT JOIN (SELECT * FROM dim_customer
+           WHERE rowid IN (SELECT MAX(rowid) FROM dim_customer GROUP BY customerid)) c
+       ON c.customerid = f.customerid
+LEFT JOIN (SELECT * FROM dim_product
+           WHERE rowid IN (SELECT MAX(rowid) FROM dim_product GROUP BY productid)) p
+       ON p.productid = f.productid
+"""
+
+# Additive measures; a discount is summed as an amount (saleamount * discountpercent
+# / 100), since a sum of percentages means nothing. Average rate = discount / sales.
+MEASURES: tuple[str, ...] = ("saleamount", "discount_amount")
+
+# Drill-down paths, coarsest level first
+HIERARCHIES: dict[str, tuple[str, ...]] = {
+    "geography": ("region", "customer"),
+    "product": ("category", "product"),
+    "time": ("year", "month", "day"),
+}
+
+# Label used for missing attribute values (e.g. a sale with no customer row)
+UNKNOWN = "Unknown"
+
+# Above this many possible key combinations, keys are compacted with np.unique
+# before counting instead of sizing the bincount by the full key space
+DENSE_KEY_LIMIT = 1 << 22
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """A dictionary-encoded attribute: sorted distinct labels and a code per row."""
+
+    labels: np.ndarray
+    codes: np.ndarray
+
+    @classmethod
+    def encode(cls, values: pd.Series) -> "Dimension":
+        """Encode a column; missing values get a label of their own."""
+        codes, labels = pd.factorize(values, sort=True, use_na_sentinel=False)
+        # Platform ints: np.bincount would otherwise copy-convert the codes per query
+        return cls(np.asarray(labels, dtype=object), codes.astype(np.intp))
+
+    def member_mask(self, members: Iterable) -> np.ndarray:
+        """Return a boolean over codes, True for the given member labels.
+
+        Raises:
+            KeyError: If none of the members exist in the dimension.
+        """
+        wanted = set(members)
+        keep = np.fromiter((label in wanted for label in self.labels), bool, len(self.labels))
+        if not keep.any():
+            raise KeyError(f"No such members: {sorted(map(str, wanted))}")
+        return keep
+
+
+@dataclass(frozen=True)
+class Cube:
+    """Immutable view over encoded facts; filters return narrower cubes."""
+
+    dimensions: dict[str, Dimension]
+    measures: dict[str, np.ndarray]
+    rows: np.ndarray | None = None  # selected row positions, None = all
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, dimensions: Iterable[str], measures: Iterable[str] = MEASURES
+    ) -> "Cube":
+        """Encode the given attribute columns and measure columns of a frame."""
+        return cls(
+            dimensions={name: Dimension.encode(df[name]) for name in dimensions},
+            measures={
+                name: pd.to_numeric(df[name], errors="coerce").fillna(0).to_numpy(np.float64)
+                for name in measures
+            },
+        )
+
+    def __len__(self) -> int:
+        """Return the number of fact rows in this cube."""
+        if self.rows is not None:
+            return len(self.rows)
+        return len(next(iter(self.measures.values()), ()))
+
+    def _dimension(self, name: str) -> Dimension:
+        try:
+            return self.dimensions[name]
+        except KeyError:
+            raise KeyError(f"Unknown dimension {name!r}; have {sorted(self.dimensions)}") from None
+
+    def _codes(self, name: str) -> np.ndarray:
+        codes = self._dimension(name).codes
+        return codes if self.rows is None else codes[self.rows]
+
+    def dice(self, **members) -> "Cube":
+        """Keep facts whose attributes are among the given members.
+
+        Each keyword is a dimension name with one label or a list of labels,
+        e.g. ``dice(region=["East", "West"], category="Electronics")``.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        for name, wanted in members.items():
+            if isinstance(wanted, str) or not isinstance(wanted, Iterable):
+                wanted = [wanted]
+            keep &= self._dimension(name).member_mask(wanted)[self._codes(name)]
+        selected = np.flatnonzero(keep)
+        rows = selected if self.rows is None else self.rows[selected]
+        return replace(self, rows=rows)
+
+    def slice(self, name: str, member) -> "Cube":
+        """Fix one dimension to a single member."""
+        return self.dice(**{name: [member]})
+
+    def rollup(self, *by: str, measures: Iterable[str] | None = None) -> pd.DataFrame:
+        """Aggregate the selected facts by the given dimensions.
+
+        Returns one row per combination that has facts, sorted by the group
+        labels, with ``num_sales`` and the sum of every measure. With no
+        dimensions the selection is totalled into a single row.
+        """
+        measures = list(measures or self.measures)
+        if not by:
+            totals = {"num_sales": [len(self)]}
+            for name in measures:
+                values = self.measures[name]
+                totals[name] = [values.sum() if self.rows is None else values[self.rows].sum()]
+            return pd.DataFrame(totals)
+
+        sizes = [len(self._dimension(name).labels) for name in by]
+        key = self._codes(by[0])
+        for name, size in zip(by[1:], sizes[1:], strict=True):
+            key = key * size  # new array; never scale the stored codes in place
+            key += self._codes(name)
+
+        space = int(np.prod(sizes, dtype=np.int64))
+        if space <= DENSE_KEY_LIMIT:
+            counts = np.bincount(key, minlength=space)
+            groups = np.flatnonzero(counts)
+            inverse = None
+            counts = counts[groups]
+        else:
+            groups, inverse, counts = np.unique(key, return_inverse=True, return_counts=True)
+
+        out = {}
+        for name, codes in zip(by, np.unravel_index(groups, sizes), strict=True):
+            out[name] = self._dimension(name).labels[codes]
+        out["num_sales"] = counts
+        for name in measures:
+            values = self.measures[name]
+            if self.rows is not None:
+                values = values[self.rows]
+            if inverse is None:
+                out[name] = np.bincount(key, weights=values, minlength=space)[groups]
+            else:
+                out[name] = np.bincount(inverse, weights=values, minlength=len(groups))
+        return pd.DataFrame(out)
+
+    def drill_down(
+        self, hierarchy: str, depth: int, measures: Iterable[str] | None = None
+    ) -> pd.DataFrame:
+        """Roll up by the first ``depth`` levels of a hierarchy (e.g. year -> month)."""
+        levels = HIERARCHIES[hierarchy]
+        if not 1 <= depth <= len(levels):
+            raise ValueError(f"{hierarchy} has levels {levels}; depth must be 1..{len(levels)}")
+        return self.rollup(*levels[:depth], measures=measures)
+
+
+def load_cube(db_path: pathlib.Path = DB_PATH) -> Cube:
+    """Read fact_sales with its dimensions from the warehouse into a Cube."""
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(CUBE_SQL, conn)
+    finally:
+        conn.close()
+
+    dates = parse_prepared_dates(df["saledate"])
+    percent = pd.to_numeric(df["discountpercent"], errors="coerce")
+    df["discount_amount"] = pd.to_numeric(df["saleamount"], errors="coerce") * percent / 100
+    df["year"] = dates.dt.strftime("%Y")
+    df["month"] = dates.dt.strftime("%Y-%m")
+    df["day"] = dates.dt.strftime("%Y-%m-%d")
+    df["customer"] = df["customerid"].astype("Int64").astype("string") + " " + df["customer_name"]
+    df["product"] = df["productid"].astype("Int64").astype("string") + " " + df["productname"]
+    dimensions = [
+        "year", "month", "day", "region", "customer", "category", "product",
+        "storeid", "paymenttype",
+    ]  # fmt: skip
+    for name in dimensions:
+        df[name] = df[name].astype("string").fillna(UNKNOWN)
+
+    cube = Cube.from_frame(df, dimensions)
+    logger.info(f"Loaded cube with {len(cube)} facts in {time.perf_counter() - start:.2f}s")
+    return cube
+
+
+def main() -> None:
+    """Load the cube and print a few example analyses with their timings."""
+    init_logger()
+    cube = load_cube()
+    examples = {
+        "Sales by region": lambda: cube.rollup("region"),
+        "Top customers in the East": lambda: (
+            cube.slice("region", "East").rollup("customer").nlargest(5, "saleamount")
+        ),
+        "Electronics/Clothing by month": lambda: cube.dice(
+            category=["Electronics", "Clothing"]
+        ).rollup("month", "category"),
+        "Year -> month drill-down": lambda: cube.drill_down("time", 2),
+    }
+    for title, query in examples.items():
+        start = time.perf_counter()
+        result = query()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n--- {title} ({elapsed_ms:.1f} ms) ---")
+        print(result.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
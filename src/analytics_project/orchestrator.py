@@ -0,0 +1,385 @@
+"""Run the whole pipeline as a DAG of stages with asyncio.
+
+Each ``Stage`` names the function it runs (``"module:function"``), the
+stages it depends on, where it runs and how often it is retried. Stages
+are declared in ``STAGES``:
+
+    prepare_customers ─┐
+    prepare_products  ─┼─> integrity ─┬─> etl_load ─> rollups
+    prepare_sales     ─┘              └─> create_db ─> run_queries
+
+One asyncio task per stage waits for its dependencies, then hands the
+work to an executor. CPU-bound stages (pandas) go to a process pool, and
+stages that mostly wait on SQLite or on their own worker pools go to a
+thread pool. Every stage whose dependencies are done runs at once, and
+the event loop only schedules. A failed attempt is retried after a short,
+growing delay. When a stage finally fails, the stages that depend on it
+are skipped and the other branches still finish.
+
+Partial re-runs select a subgraph. ``--from`` runs the given stages and
+everything downstream of them. ``--targets`` runs the given stages and
+everything they need. Dependencies outside the selection are assumed to
+be up to date from an earlier run. The build cache (build_cache.py) still
+skips preparation whose inputs are unchanged.
+
+At the end a timeline is logged: every stage's start and end relative to
+the run start, as a bar chart, plus the critical path. That is the chain
+of dependencies that ended last, i.e. the stages to shrink to shorten the
+run. ``--timeline`` also writes it as JSON. Stage metrics are still
+recorded under one run id in metrics.jsonl (see utils_logger.timed_stage).
+
+data_scrubber is not a stage. It writes the same prepared files as the
+prepare_* scripts, so running both would race on them.
+
+Module Information:
+    - Filename: orchestrator.py
+    - Module: orchestrator
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project [--from create_db] [--targets etl_load]
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+import importlib
+import json
+import multiprocessing
+import os
+import pathlib
+import time
+
+from .build_cache import CACHE_ENV_VAR
+from .pipeline import LOAD_MODES
+from .utils_logger import init_logger, log_run_report, logger, run_id
+
+# Seconds before the first retry; doubles with every further attempt
+RETRY_DELAY_SECONDS = 1.0
+
+TIMELINE_WIDTH = 50
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of the pipeline DAG."""
+
+    name: str
+    target: str  # "package.module:function"
+    deps: tuple[str, ...] = ()
+    args: tuple = ()
+    executor: str = "process"  # "process" for CPU-bound work, "thread" otherwise
+    retries: int = 0
+
+
+@dataclass
+class StageRun:
+    """What happened to one stage in a run (times in seconds from the run start)."""
+
+    name: str
+    status: str = "pending"  # pending, ok, failed, skipped
+    attempts: int = 0
+    start: float | None = None
+    end: float | None = None
+    rows: int | None = None
+    error: str | None = None
+    deps: tuple[str, ...] = ()
+
+    @property
+    def seconds(self) -> float:
+        """Wall time of the stage, or 0.0 if it did not run."""
+        return (self.end - self.start) if self.start is not None and self.end is not None else 0.0
+
+
+STAGES: tuple[Stage, ...] = (
+    Stage("prepare_customers", "analytics_project.pipeline:run_stage", args=("customers",)),
+    Stage("prepare_products", "analytics_project.pipeline:run_stage", args=("products",)),
+    Stage("prepare_sales", "analytics_project.pipeline:run_stage", args=("sales",)),
+    Stage(
+        "integrity",
+        "analytics_project.integrity:validate_sales",
+        deps=("prepare_customers", "prepare_products", "prepare_sales"),
+    ),
+    Stage(
+        "etl_load",
+        "analytics_project.pipeline:load_warehouse",
+        deps=("integrity",),
+        args=("incremental",),
+        retries=1,  # the warehouse file can be briefly locked by a reader
+    ),
+    Stage("rollups", "analytics_project.rollups:refresh_rollups", deps=("etl_load",), retries=1),
+    Stage(
+        "create_db",
+        "analytics_project.create_db:main",
+        deps=("integrity",),
+        args=([],),
+        executor="thread",  # parses in its own process pool
+        retries=1,
+    ),
+    Stage(
+        "run_queries",
+        "analytics_project.run_queries:main",
+        deps=("create_db",),
+        args=([],),
+        executor="thread",  # SQLite releases the GIL while a query runs
+    ),
+)
+
+
+def validate(stages: tuple[Stage, ...]) -> dict[str, Stage]:
+    """Return stages by name after checking names, dependencies and cycles.
+
+    Raises:
+        ValueError: On duplicate names, unknown dependencies or a cycle.
+    """
+    by_name: dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate stage {stage.name!r}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        unknown = [dep for dep in stage.deps if dep not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages {unknown}")
+
+    state: dict[str, str] = {}
+
+    def visit(name: str, path: tuple[str, ...]) -> None:
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join((*path, name))}")
+        state[name] = "visiting"
+        for dep in by_name[name].deps:
+            visit(dep, (*path, name))
+        state[name] = "done"
+
+    for name in by_name:
+        visit(name, ())
+    return by_name
+
+
+def select(
+    stages: dict[str, Stage],
+    targets: list[str] | None = None,
+    starting: list[str] | None = None,
+) -> list[str]:
+    """Return the stage names to run, in declaration order.
+
+    ``targets`` keeps those stages and their ancestors, ``starting`` keeps
+    those stages and their descendants; given both, a stage must satisfy both.
+
+    Raises:
+        ValueError: If a name is not a stage.
+    """
+    for name in (targets or []) + (starting or []):
+        if name not in stages:
+            raise ValueError(f"Unknown stage {name!r}; expected one of {list(stages)}")
+
+    def closure(roots: list[str], edges: dict[str, set[str]]) -> set[str]:
+        seen, todo = set(), list(roots)
+        while todo:
+            name = todo.pop()
+            if name not in seen:
+                seen.add(name)
+                todo.extend(edges[name])
+        return seen
+
+    parents = {name: set(stage.deps) for name, stage in stages.items()}
+    children: dict[str, set[str]] = {name: set() for name in stages}
+    for name, stage in stages.items():
+        for dep in stage.deps:
+            children[dep].add(name)
+
+    chosen = set(stages)
+    if targets:
+        chosen &= closure(targets, parents)
+    if starting:
+        chosen &= closure(starting, children)
+    return [name for name in stages if name in chosen]
+
+
+def _init_worker() -> None:
+    init_logger()
+
+
+def _invoke(target: str, args: tuple) -> int | None:
+    """Import and call a stage's function; return its row count if it reports one."""
+    module_name, func_name = target.split(":")
+    result = getattr(importlib.import_module(module_name), func_name)(*args)
+    if isinstance(result, bool) or result is None:
+        return None
+    if isinstance(result, int):
+        return result
+    if hasattr(result, "rows"):
+        return int(result.rows)
+    if isinstance(result, dict) and all(isinstance(v, int) for v in result.values()):
+        return sum(result.values())
+    return None
+
+
+async def _run_stage(
+    stage: Stage,
+    run: StageRun,
+    waits: list[asyncio.Future],
+    executor: Executor,
+    started: float,
+) -> None:
+    if waits:
+        await asyncio.gather(*waits)
+    runs_of_deps = [w.result() for w in waits]
+    failed = [r.name for r in runs_of_deps if r.status != "ok"]
+    if failed:
+        run.status, run.error = "skipped", f"upstream failed: {', '.join(failed)}"
+        logger.warning(f"Stage {stage.name} skipped ({run.error})")
+        return
+
+    loop = asyncio.get_running_loop()
+    run.start = time.perf_counter() - started
+    for attempt in range(1, stage.retries + 2):
+        run.attempts = attempt
+        try:
+            run.rows = await loop.run_in_executor(executor, _invoke, stage.target, stage.args)
+        except Exception as e:
+            run.error = f"{type(e).__name__}: {e}"
+            if attempt > stage.retries:
+                run.status = "failed"
+                logger.error(f"Stage {stage.name} failed after {attempt} attempt(s): {run.error}")
+                break
+            delay = RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+            logger.warning(f"Stage {stage.name} attempt {attempt} failed ({run.error}); "
+                           f"retrying in {delay:.1f}s")  # fmt: skip
+            await asyncio.sleep(delay)
+        else:
+            run.status, run.error = "ok", None
+            break
+    run.end = time.perf_counter() - started
+    logger.info(f"Stage {stage.name} {run.status} in {run.seconds:.2f}s")
+
+
+async def run_dag(
+    stages: dict[str, Stage], names: list[str], workers: int | None = None
+) -> dict[str, StageRun]:
+    """Run the named stages as soon as their selected dependencies are done."""
+    runs = {name: StageRun(name, deps=stages[name].deps) for name in names}
+    started = time.perf_counter()
+    run_id()  # set before workers start, so their metrics share the run id
+    spawn = multiprocessing.get_context("spawn")
+    with (
+        ProcessPoolExecutor(workers, mp_context=spawn, initializer=_init_worker) as processes,
+        ThreadPoolExecutor(workers) as threads,
+    ):
+        loop = asyncio.get_running_loop()
+        done: dict[str, asyncio.Future] = {name: loop.create_future() for name in names}
+
+        async def task(name: str) -> None:
+            stage = stages[name]
+            waits = [done[dep] for dep in stage.deps if dep in done]
+            pool = processes if stage.executor == "process" else threads
+            try:
+                await _run_stage(stage, runs[name], waits, pool, started)
+            finally:
+                if runs[name].status == "pending":
+                    runs[name].status = "failed"
+                done[name].set_result(runs[name])
+
+        await asyncio.gather(*(task(name) for name in names))
+    return runs
+
+
+def critical_path(runs: dict[str, StageRun]) -> list[str]:
+    """Return the chain of stages, each waiting on the previous, that ended last."""
+    finished = {name: r for name, r in runs.items() if r.end is not None}
+    if not finished:
+        return []
+    path = [max(finished.values(), key=lambda r: r.end).name]
+    while True:
+        deps = [finished[d] for d in finished[path[-1]].deps if d in finished]
+        if not deps:
+            return path[::-1]
+        path.append(max(deps, key=lambda r: r.end).name)
+
+
+def log_timeline(runs: dict[str, StageRun], path: pathlib.Path | None = None) -> None:
+    """Log a start/end bar per stage and the critical path; optionally save as JSON."""
+    total = max((r.end for r in runs.values() if r.end is not None), default=0.0)
+    scale = TIMELINE_WIDTH / total if total else 0.0
+    width = max(len(name) for name in runs) if runs else 0
+    for r in runs.values():
+        if r.start is None:
+            logger.info(f"{r.name:<{width}} |{' ' * TIMELINE_WIDTH}| {r.status}")
+            continue
+        lead = int(r.start * scale)
+        bar = max(1, int(r.end * scale) - lead)
+        logger.info(
+            f"{r.name:<{width}} |{' ' * lead}{'#' * bar:<{TIMELINE_WIDTH - lead}}| "
+            f"{r.start:6.2f}s -> {r.end:6.2f}s {r.status}"
+            + (f" ({r.attempts} attempts)" if r.attempts > 1 else "")
+        )
+    chain = critical_path(runs)
+    logger.info(
+        f"Critical path ({sum(runs[n].seconds for n in chain):.2f}s of {total:.2f}s): "
+        + " -> ".join(f"{n} {runs[n].seconds:.2f}s" for n in chain)
+    )
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = [{**asdict(r), "seconds": round(r.seconds, 4)} for r in runs.values()]
+        path.write_text(
+            json.dumps({"run_id": run_id(), "stages": records, "critical_path": chain}, indent=2),
+            encoding="utf-8",
+        )
+        logger.info(f"Timeline written to {path}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the pipeline DAG (or a subgraph of it). Returns a process exit code."""
+    names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description="Run the pipeline stages as a DAG")
+    parser.add_argument("--targets", nargs="+", choices=names, help="Run these and what they need")
+    parser.add_argument("--from", dest="starting", nargs="+", choices=names,
+                        help="Run these and everything downstream")  # fmt: skip
+    parser.add_argument("--workers", type=int, default=None, help="Processes/threads per pool")
+    parser.add_argument("--retries", type=int, default=None, help="Override retries per stage")
+    parser.add_argument(
+        "--load",
+        choices=LOAD_MODES[:-1],
+        default="incremental",
+        help="etl_load mode; append and bulk duplicate facts in tables not yet loaded incrementally",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild prepared files")
+    parser.add_argument("--timeline", type=pathlib.Path, default=None, help="Save timeline JSON")
+    parser.add_argument("--list", action="store_true", help="Print the stages and exit")
+    args = parser.parse_args(argv)
+
+    stages = []
+    for stage in STAGES:
+        changes = {}
+        if args.retries is not None:
+            changes["retries"] = args.retries
+        if stage.name == "etl_load":
+            changes["args"] = (args.load,)
+        stages.append(replace(stage, **changes))
+    by_name = validate(tuple(stages))
+    selected = select(by_name, args.targets, args.starting)
+
+    if args.list:
+        for stage in stages:
+            mark = "*" if stage.name in selected else " "
+            print(f"{mark} {stage.name:<18} after: {', '.join(stage.deps) or '-'}")
+        return 0
+    if args.no_cache:
+        os.environ[CACHE_ENV_VAR] = "off"  # inherited by the worker processes
+
+    init_logger()
+    logger.info(f"Running {len(selected)} stage(s): {', '.join(selected)}")
+    try:
+        runs = asyncio.run(run_dag(by_name, selected, args.workers))
+        log_timeline(runs, args.timeline)
+    finally:
+        log_run_report()
+    return 0 if all(r.status == "ok" for r in runs.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
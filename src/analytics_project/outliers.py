@@ -0,0 +1,138 @@
+"""Find outlier rows with bounds fitted from streaming sketches.
+
+``OutlierSketches`` summarizes numeric columns chunk by chunk, overall and
+optionally per group (e.g. per ``productid``), with a KLL quantile sketch
+and exact moments for each. Sketches from different chunks or workers merge
+with ``merge``. Once every chunk has been seen, ``bounds`` turns them into
+lower/upper limits:
+
+- ``iqr``: [Q1 - k * IQR, Q3 + k * IQR], k defaults to 1.5;
+- ``zscore``: mean +/- k standard deviations, k defaults to 3.
+
+Groups with fewer than ``MIN_GROUP_ROWS`` observations use the overall
+bounds. ``keep_mask`` then flags rows inside the bounds; missing values are
+never outliers.
+
+Module Information:
+    - Filename: outliers.py
+    - Module: outliers
+    - Location: src/analytics_project/
+"""
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from .sketches import KLLSketch, Moments
+
+Method = Literal["iqr", "zscore"]
+METHODS: tuple[str, ...] = ("iqr", "zscore")
+DEFAULT_K: dict[str, float] = {"iqr": 1.5, "zscore": 3.0}
+
+# Groups with fewer observed values fall back to the overall bounds
+MIN_GROUP_ROWS = 30
+
+
+class _ColumnSummary:
+    def __init__(self) -> None:
+        self.quantiles = KLLSketch()
+        self.moments = Moments()
+
+    def update(self, values: np.ndarray) -> None:
+        self.quantiles.update(values)
+        self.moments.update(values)
+
+    def merge(self, other: "_ColumnSummary") -> None:
+        self.quantiles.merge(other.quantiles)
+        self.moments.merge(other.moments)
+
+    def bounds(self, method: Method, k: float) -> tuple[float, float]:
+        if method == "iqr":
+            q1, q3 = self.quantiles.quantile(np.array([0.25, 0.75]))
+            return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+        return self.moments.mean - k * self.moments.std, self.moments.mean + k * self.moments.std
+
+
+class OutlierSketches:
+    """Mergeable per-column (and per-group) summaries for outlier bounds."""
+
+    def __init__(self, columns: list[str], by: str | None = None) -> None:
+        """Summarize ``columns``, and each group of ``by`` when given."""
+        self.columns = list(columns)
+        self.by = by
+        self._overall = {col: _ColumnSummary() for col in self.columns}
+        self._groups: dict[object, dict[str, _ColumnSummary]] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Add a chunk's values (NaN values are skipped)."""
+        for col in self.columns:
+            self._overall[col].update(df[col].to_numpy(dtype="float64", na_value=np.nan))
+        if self.by is None:
+            return
+        # One sort per chunk, then contiguous slices per group
+        codes, groups = pd.factorize(df[self.by])
+        order = np.argsort(codes, kind="stable")
+        starts = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+        for col in self.columns:
+            values = df[col].to_numpy(dtype="float64", na_value=np.nan)[order]
+            for i, group in enumerate(groups):
+                summaries = self._groups.setdefault(
+                    group, {c: _ColumnSummary() for c in self.columns}
+                )
+                summaries[col].update(values[starts[i] : starts[i + 1]])
+
+    def merge(self, other: "OutlierSketches") -> None:
+        """Fold the summaries of another worker or chunk range into this one."""
+        for col in self.columns:
+            self._overall[col].merge(other._overall[col])
+        for group, summaries in other._groups.items():
+            mine = self._groups.setdefault(group, {c: _ColumnSummary() for c in self.columns})
+            for col in self.columns:
+                mine[col].merge(summaries[col])
+
+    def bounds(self, method: Method = "iqr", k: float | None = None) -> pd.DataFrame:
+        """Return lower/upper bounds per column, indexed by group.
+
+        Without ``by`` the frame has a single row indexed by None.
+
+        Raises:
+            ValueError: If the method is unknown.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown outlier method {method!r}; expected one of {METHODS}")
+        k = DEFAULT_K[method] if k is None else k
+        overall = {col: self._overall[col].bounds(method, k) for col in self.columns}
+
+        rows = {None: overall}
+        for group, summaries in self._groups.items():
+            rows[group] = {
+                col: summary.bounds(method, k)
+                if summary.moments.count >= MIN_GROUP_ROWS
+                else overall[col]
+                for col, summary in summaries.items()
+            }
+        return pd.DataFrame(
+            {
+                f"{col}_{side}": [row[col][i] for row in rows.values()]
+                for col in self.columns
+                for i, side in enumerate(("lower", "upper"))
+            },
+            index=pd.Index(list(rows), dtype=object),
+        )
+
+    def keep_mask(self, df: pd.DataFrame, bounds: pd.DataFrame) -> np.ndarray:
+        """Return True for rows whose values all lie within their group's bounds."""
+        keep = np.ones(len(df), dtype=bool)
+        for col in self.columns:
+            lower = np.full(len(df), bounds.at[None, f"{col}_lower"])
+            upper = np.full(len(df), bounds.at[None, f"{col}_upper"])
+            if self.by is not None:
+                # Map each row's group to its bounds; unseen groups keep the overall ones
+                positions = bounds.index.get_indexer(df[self.by].astype(object))
+                known = positions >= 0
+                lower[known] = bounds[f"{col}_lower"].to_numpy()[positions[known]]
+                upper[known] = bounds[f"{col}_upper"].to_numpy()[positions[known]]
+            values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+            keep &= np.isnan(values) | ((values >= lower) & (values <= upper))
+        return keep
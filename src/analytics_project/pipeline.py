@@ -0,0 +1,197 @@
+"""Run the data preparation stages in parallel, then load the warehouse.
+
+The customers, products and sales preparation scripts are independent until
+the warehouse load, so each runs in its own worker process. Per-stage wall
+time and row counts are collected, and etl_to_dw only runs once every stage
+has succeeded. Total prep time becomes that of the slowest stage. Before the
+load, sales referencing unknown customers or products are quarantined (see
+integrity.py). Every stage, including those run in workers, is recorded
+under one run id in metrics.jsonl and summarized at the end (see
+utils_logger.timed_stage).
+
+Module Information:
+    - Filename: pipeline.py
+    - Module: pipeline
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.pipeline --workers 3
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import importlib
+import os
+import time
+
+from . import etl_to_dw, integrity, rollups
+from .build_cache import CACHE_ENV_VAR
+from .prepared_io import FORMAT_ENV_VAR, FORMATS
+from .utils_logger import (
+    LOG_MODE_ENV_VAR,
+    LOG_MODES,
+    init_logger,
+    log_run_report,
+    logger,
+    timed_stage,
+)
+
+# Stage name -> module holding its main()
+PREPARE_STAGES: dict[str, str] = {
+    "customers": "analytics_project.data_preparation.prepare_customers_data",
+    "products": "analytics_project.data_preparation.prepare_products_data",
+    "sales": "analytics_project.data_preparation.prepare_sales_data",
+}
+
+# Stages whose main() parses command-line arguments; they always get an
+# explicit argv so workers never parse the pipeline's own sys.argv
+ARGV_STAGES = {"sales"}
+
+LOAD_MODES = ("incremental", "append", "bulk", "none")
+
+
+@dataclass
+class StageResult:
+    """Outcome of one preparation stage."""
+
+    name: str
+    seconds: float
+    rows: int
+
+
+def run_stage(name: str, args: tuple[str, ...] = ()) -> StageResult:
+    """Import a stage's module and run its main() (executes in a worker)."""
+    module = importlib.import_module(PREPARE_STAGES[name])
+    start = time.perf_counter()
+    rows = module.main(list(args)) if name in ARGV_STAGES else module.main()
+    return StageResult(name, time.perf_counter() - start, int(rows))
+
+
+def run_prepare_stages(
+    workers: int | None = None, sales_chunksize: int | None = None
+) -> dict[str, StageResult]:
+    """Run every preparation stage in a process pool.
+
+    Raises:
+        RuntimeError: If any stage fails; the other stages still finish.
+    """
+    stage_args: dict[str, tuple[str, ...]] = dict.fromkeys(PREPARE_STAGES, ())
+    if sales_chunksize:
+        stage_args["sales"] = ("--chunksize", str(sales_chunksize))
+
+    results: dict[str, StageResult] = {}
+    failures: dict[str, BaseException] = {}
+    with ProcessPoolExecutor(max_workers=workers or len(PREPARE_STAGES)) as pool:
+        futures = {pool.submit(run_stage, name, stage_args[name]): name for name in PREPARE_STAGES}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Stage {name} failed: {e}")
+                failures[name] = e
+            else:
+                r = results[name]
+                logger.info(f"Stage {name}: {r.rows} rows in {r.seconds:.2f}s")
+
+    if failures:
+        raise RuntimeError(f"Preparation failed for: {', '.join(sorted(failures))}")
+    return results
+
+
+def load_warehouse(mode: str) -> None:
+    """Run the etl_to_dw load matching the requested mode.
+
+    Raises RuntimeError when the load fails, so callers report it as a failure.
+    """
+    loaders = {
+        "append": etl_to_dw.load_data_to_db,
+        "incremental": etl_to_dw.load_data_to_db_incremental,
+        "bulk": etl_to_dw.bulk_load_data_to_db,
+    }
+    if mode not in loaders:
+        return
+    try:
+        loaders[mode]()
+    except Exception as e:
+        raise RuntimeError(f"Warehouse load ({mode}) failed: {e}") from e
+
+
+@timed_stage("pipeline")
+def run_pipeline(
+    workers: int | None = None,
+    sales_chunksize: int | None = None,
+    load_mode: str = "incremental",
+    validate: bool = True,
+) -> dict[str, StageResult]:
+    """Prepare all datasets in parallel, validate, load the warehouse, refresh rollups."""
+    start = time.perf_counter()
+    results = run_prepare_stages(workers, sales_chunksize)
+    prep_seconds = time.perf_counter() - start
+    slowest = max(results.values(), key=lambda r: r.seconds)
+    logger.info(
+        f"Preparation done in {prep_seconds:.2f}s (slowest stage: {slowest.name}, "
+        f"{slowest.seconds:.2f}s)"
+    )
+
+    if validate:
+        with timed_stage("integrity") as stage:
+            stage.rows = integrity.validate_sales().rows
+    if load_mode != "none":
+        load_warehouse(load_mode)
+        with timed_stage("rollups"):
+            rollups.refresh_rollups()
+    logger.info(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse arguments and run the pipeline. Returns a process exit code."""
+    parser = argparse.ArgumentParser(description="Run the preparation pipeline")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument(
+        "--sales-chunksize", type=int, default=None, help="Stream sales in chunks of N rows"
+    )
+    parser.add_argument(
+        "--load",
+        choices=LOAD_MODES,
+        default="incremental",
+        help="Warehouse load (default: incremental, so re-runs do not duplicate facts)",
+    )
+    parser.add_argument(
+        "--format", choices=FORMATS, default=None, help="Prepared file format (default: csv)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Rebuild every stage even if inputs are unchanged"
+    )
+    parser.add_argument(
+        "--no-validate", action="store_true", help="Skip the sales foreign-key check"
+    )
+    parser.add_argument(
+        "--log-mode", choices=LOG_MODES, default=None, help="fast/json batch log writes"
+    )
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        os.environ[CACHE_ENV_VAR] = "off"
+    if args.format:
+        # Worker processes inherit the environment, so every stage sees it
+        os.environ[FORMAT_ENV_VAR] = args.format
+
+    if args.log_mode:
+        os.environ[LOG_MODE_ENV_VAR] = args.log_mode
+
+    init_logger()
+    try:
+        run_pipeline(args.workers, args.sales_chunksize, args.load, not args.no_validate)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        log_run_report()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+"""Read and write data/prepared files as CSV, Parquet or Arrow IPC (Feather).
+
+CSV stays the default. Parquet gives typed, compressed files; Feather (Arrow
+IPC) files are read memory-mapped, so loading them is close to zero-copy.
+Writers pick the format from the ANALYTICS_PREPARED_FORMAT environment
+variable (or an explicit argument) and record it in a hidden marker next
+to the data (``.sales_prepared.format``); readers accept any of the formats
+and use the one recorded for the dataset. Files with no marker (e.g. the
+CSVs in the repository) fall back to the most recently modified format.
+
+Parquet and Feather need the optional pyarrow dependency:
+    uv pip install -e ".[parquet]"
+
+Module Information:
+    - Filename: prepared_io.py
+    - Module: prepared_io
+    - Location: src/analytics_project/
+"""
+
+from collections.abc import Iterator
+import os
+import pathlib
+from typing import Self
+
+import pandas as pd
+
+FORMAT_ENV_VAR = "ANALYTICS_PREPARED_FORMAT"
+SUFFIXES: dict[str, str] = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+FORMATS: tuple[str, ...] = tuple(SUFFIXES)
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            'Parquet/Feather prepared files need pyarrow: uv pip install -e ".[parquet]"'
+        ) from e
+    return pyarrow
+
+
+def prepared_format(fmt: str | None = None) -> str:
+    """Return the format to write: the argument, the env var, or csv."""
+    fmt = (fmt or os.environ.get(FORMAT_ENV_VAR) or "csv").lower()
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Unknown prepared format {fmt!r}; expected one of {FORMATS}")
+    return fmt
+
+
+def format_of(path: pathlib.Path) -> str:
+    """Return the format name for a prepared file path based on its suffix."""
+    for fmt, suffix in SUFFIXES.items():
+        if path.suffix.lower() == suffix:
+            return fmt
+    raise ValueError(f"Not a prepared data file: {path}")
+
+
+def _format_marker(path: pathlib.Path) -> pathlib.Path:
+    return path.parent / f".{path.stem}.format"
+
+
+def _record_format(path: pathlib.Path) -> None:
+    """Remember which format a dataset was last written in."""
+    marker = _format_marker(path)
+    tmp = marker.with_suffix(".tmp")
+    tmp.write_text(format_of(path), encoding="utf-8")
+    tmp.replace(marker)
+
+
+def resolve_prepared(path: str | pathlib.Path) -> pathlib.Path:
+    """Find the existing file for a dataset, whatever its format.
+
+    ``path`` may name any format (e.g. ``sales_prepared.csv``); its siblings
+    with the other suffixes are considered too. The format recorded by the
+    last writer wins; without a usable record the newest file is used
+    (mtimes are only a fallback: a git checkout touches files too).
+
+    Raises:
+        FileNotFoundError: If no file exists for the dataset in any format.
+    """
+    path = pathlib.Path(path)
+    try:
+        fmt = _format_marker(path).read_text(encoding="utf-8").strip()
+        recorded = path.with_suffix(SUFFIXES[fmt])
+    except (FileNotFoundError, KeyError):
+        recorded = None
+    if recorded is not None and recorded.exists():
+        return recorded
+    candidates = [path.with_suffix(suffix) for suffix in SUFFIXES.values()]
+    existing = [p for p in candidates if p.exists()]
+    if not existing:
+        raise FileNotFoundError(f"No prepared file for {path.stem} in {path.parent}")
+    return max(existing, key=lambda p: p.stat().st_mtime_ns)
+
+
+def list_prepared(folder: pathlib.Path) -> list[pathlib.Path]:
+    """Return the newest file per dataset stem in a folder, sorted by name."""
+    stems = {p.stem for p in folder.iterdir() if p.suffix.lower() in SUFFIXES.values()}
+    return sorted(resolve_prepared(folder / stem) for stem in stems)
+
+
+def write_prepared(
+    df: pd.DataFrame, path: str | pathlib.Path, fmt: str | None = None
+) -> pathlib.Path:
+    """Write a prepared DataFrame and return the path actually written.
+
+    The suffix of ``path`` is replaced to match the chosen format.
+    """
+    fmt = prepared_format(fmt)
+    out = pathlib.Path(path).with_suffix(SUFFIXES[fmt])
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        df.to_csv(out, index=False)
+    else:
+        _require_pyarrow()
+        if fmt == "parquet":
+            df.to_parquet(out, index=False, compression="zstd")
+        else:
+            df.reset_index(drop=True).to_feather(out, compression="lz4")
+    _record_format(out)
+    return out
+
+
+def read_prepared(
+    path: str | pathlib.Path, columns: list[str] | None = None, nullable: bool = False
+) -> pd.DataFrame:
+    """Read a prepared dataset in whichever format it was written.
+
+    ``nullable`` keeps CSV integer columns with gaps as integers, as in
+    ``iter_prepared``; Parquet/Feather files keep their written dtypes anyway.
+    """
+    path = resolve_prepared(path)
+    fmt = format_of(path)
+    if fmt == "csv":
+        options = {"dtype_backend": "numpy_nullable"} if nullable else {}
+        return pd.read_csv(path, usecols=columns, **options)
+    if fmt == "parquet":
+        _require_pyarrow()
+        return pd.read_parquet(path, columns=columns)
+    _require_pyarrow()
+    from pyarrow import feather
+
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def iter_prepared(
+    path: str | pathlib.Path, chunksize: int, nullable: bool = False
+) -> Iterator[pd.DataFrame]:
+    """Yield a prepared dataset in DataFrame chunks of at most ``chunksize`` rows.
+
+    With ``nullable``, CSV integer columns with gaps stay integers (``Int64``)
+    instead of becoming floats, so chunks written back keep ``7`` as ``7``.
+    """
+    path = resolve_prepared(path)
+    fmt = format_of(path)
+    if fmt == "csv":
+        options = {"dtype_backend": "numpy_nullable"} if nullable else {}
+        with pd.read_csv(path, chunksize=chunksize, **options) as reader:
+            yield from reader
+        return
+
+    _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        from pyarrow import feather
+
+        table = feather.read_table(path, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+
+
+def count_prepared_rows(path: str | pathlib.Path) -> int:
+    """Count rows, reading only file metadata for Parquet and Feather."""
+    path = resolve_prepared(path)
+    fmt = format_of(path)
+    if fmt == "csv":
+        from .check_row_counts import count_csv_rows  # scans bytes, no parsing
+
+        return count_csv_rows(path)
+    pa = _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    from pyarrow import ipc
+
+    with pa.memory_map(str(path)) as source:
+        reader = ipc.open_file(source)
+        if hasattr(reader, "count_rows"):  # pyarrow >= 16: batch headers only
+            return reader.count_rows()
+        # Memory-mapped, one batch at a time: never holds the whole table
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+class PreparedWriter:
+    """Append DataFrame chunks to one prepared file in any format.
+
+    Used by streaming preparation; the output is written to a temporary file
+    and moved into place on a clean close, so readers never see partial data.
+    If nothing was written, closing writes an empty table with ``columns``,
+    so the file is still readable in its format; without ``columns`` that
+    would be a table with no columns at all, so ``close`` raises instead.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        fmt: str | None = None,
+        columns: list[str] | None = None,
+    ) -> None:
+        """Prepare to write ``path`` (its suffix is set by the format)."""
+        self.fmt = prepared_format(fmt)
+        self.columns = list(columns or [])
+        self.path = pathlib.Path(path).with_suffix(SUFFIXES[self.fmt])
+        self._tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        self._writer = None
+        self._first = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append one chunk; the first chunk fixes the columns."""
+        if self.fmt == "csv":
+            df.to_csv(self._tmp, mode="w" if self._first else "a", header=self._first, index=False)
+        else:
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # Categories differ from chunk to chunk, but a file has one schema
+            # (and an IPC file one dictionary per column): store plain values.
+            # Parquet dictionary-encodes them on disk anyway.
+            table = table.cast(
+                pa.schema(
+                    f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type) else f
+                    for f in table.schema
+                )
+            )
+            if self._writer is None:
+                if self.fmt == "parquet":
+                    import pyarrow.parquet as pq
+
+                    self._writer = pq.ParquetWriter(self._tmp, table.schema, compression="zstd")
+                else:
+                    from pyarrow import ipc
+
+                    options = ipc.IpcWriteOptions(compression="lz4")
+                    self._writer = ipc.new_file(str(self._tmp), table.schema, options=options)
+            self._writer.write_table(table)
+        self._first = False
+
+    def close(self) -> pathlib.Path:
+        """Finish the file, move it into place and return its path.
+
+        Raises:
+            ValueError: If no chunk was written and no ``columns`` were given.
+        """
+        if self._first:  # nothing was written; a 0-byte file is not valid Parquet/Feather
+            if not self.columns:
+                self.discard()
+                raise ValueError(f"No rows or columns to write to {self.path.name}")
+            self.write(pd.DataFrame(columns=self.columns))
+        if self._writer is not None:
+            self._writer.close()
+        self._tmp.replace(self.path)
+        _record_format(self.path)
+        return self.path
+
+    def discard(self) -> None:
+        """Drop everything written so far and leave the target file as it was."""
+        if self._writer is not None:
+            self._writer.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> Self:
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Close on success, discard on error."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -0,0 +1,281 @@
+"""Materialize pre-aggregated rollup tables over fact_sales.
+
+Dashboard and report queries group fact_sales by date, customer, product,
+region, store or payment type. Instead of scanning the fact table every
+time, this module keeps small rollup tables in smart_sales.db, one per
+grain, holding additive measures (sale count, total amount, discount
+amount). Discounts are stored as money (amount * percent / 100): summing
+the percentages themselves means nothing, while an average discount rate
+is discount_amount / total_amount at any grain.
+
+Refreshing is incremental: each rollup remembers the highest transactionid
+it has absorbed (in etl_watermark, shared with etl_to_dw), and only newer
+fact rows are aggregated and added to the existing totals with an upsert.
+A rollup table whose columns no longer match its definition (e.g. one
+holding the old total_discount sum of percentages) is dropped and rebuilt.
+``query_rollup`` answers a group-by from the smallest rollup whose grain
+covers it, deriving month/year from date when needed; rollup sizes are
+counted once per refresh into ``rollup_stats`` rather than per query.
+
+Module Information:
+    - Filename: rollups.py
+    - Module: rollups
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.rollups [--rebuild]
+"""
+
+import argparse
+import pathlib
+import sqlite3
+
+import pandas as pd
+
+from .etl_to_dw import (
+    DB_PATH,
+    ensure_watermark_table,
+    get_watermark,
+    quote_identifier,
+    set_watermark,
+)
+from .schemas import parse_prepared_dates
+from .utils_logger import init_logger, logger
+
+# Rollup table -> grain (group-by columns)
+ROLLUPS: dict[str, tuple[str, ...]] = {
+    "rollup_date_region_category": ("date", "region", "category"),
+    "rollup_month_store_payment": ("month", "storeid", "paymenttype"),
+    "rollup_date_customer": ("date", "customerid"),
+    "rollup_date_product": ("date", "productid"),
+}
+
+# Additive measures: rollup column -> fact column summed into it
+MEASURES: dict[str, str] = {
+    "num_sales": "num_sales",
+    "total_amount": "saleamount",
+    "discount_amount": "discount_amount",  # saleamount * discountpercent / 100
+}
+INTEGER_MEASURES = {"num_sales"}
+
+# Rollup table -> row count, written at the end of every refresh
+STATS_TABLE = "rollup_stats"
+
+# Grain columns are part of a primary key, so missing values get a sentinel
+UNKNOWN = "Unknown"
+TEXT_GRAIN = {"date", "month", "region", "category", "paymenttype"}
+
+# Attributes computable from a finer grain column: column -> {source: length}
+# (dates are ISO text, so month and year are prefixes)
+DERIVED: dict[str, dict[str, int]] = {
+    "month": {"date": 7},
+    "year": {"date": 4, "month": 4},
+}
+
+# New fact rows joined to the latest copy of each dimension row (the plain
+# append load can leave several copies of a customer or product)
+DELTA_SQL = """
+SELECT f.transactionid, f.saledate, f.customerid, f.productid, f.storeid,
+       f.saleamount, f.discountpercent, f.paymenttype, c.region, p.category
+FROM fact_sales f
+LEFT JOIN (SELECT customerid, region FROM dim_customer
+           WHERE rowid IN (SELECT MAX(rowid) FROM dim_customer GROUP BY customerid)) c
+       ON c.customerid = f.customerid
+LEFT JOIN (SELECT productid, category FROM dim_product
+           WHERE rowid IN (SELECT MAX(rowid) FROM dim_product GROUP BY productid)) p
+       ON p.productid = f.productid
+WHERE f.transactionid > ?
+"""
+
+
+def _column_list(columns) -> str:
+    return ", ".join(map(quote_identifier, columns))
+
+
+def _ensure_rollup_table(conn: sqlite3.Connection, name: str, grain: tuple[str, ...]) -> None:
+    cols = [
+        f"{quote_identifier(col)} {'TEXT' if col in TEXT_GRAIN else 'INTEGER'} NOT NULL"
+        for col in grain
+    ]
+    cols += [
+        f"{quote_identifier(m)} {'INTEGER' if m in INTEGER_MEASURES else 'REAL'} NOT NULL DEFAULT 0"
+        for m in MEASURES
+    ]
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote_identifier(name)} "
+        f"({', '.join(cols)}, PRIMARY KEY ({_column_list(grain)}))"
+    )
+
+
+def _is_outdated(conn: sqlite3.Connection, name: str, grain: tuple[str, ...]) -> bool:
+    """Return True if an existing rollup table has other columns than its definition."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(name)})")]
+    return bool(columns) and columns != [*grain, *MEASURES]
+
+
+def _load_delta(conn: sqlite3.Connection, high_water: int) -> pd.DataFrame:
+    """Read fact rows past the watermark with the attributes rollups group by."""
+    delta = pd.read_sql_query(DELTA_SQL, conn, params=(high_water,))
+    dates = parse_prepared_dates(delta["saledate"])
+    delta["date"] = dates.dt.strftime("%Y-%m-%d")
+    delta["month"] = dates.dt.strftime("%Y-%m")
+    delta["num_sales"] = 1
+    delta["saleamount"] = pd.to_numeric(delta["saleamount"], errors="coerce")
+    percent = pd.to_numeric(delta["discountpercent"], errors="coerce")
+    delta["discount_amount"] = delta["saleamount"] * percent / 100
+    # Grain columns are part of a primary key, so they must not be NULL
+    for col in {c for grain in ROLLUPS.values() for c in grain}:
+        if col in TEXT_GRAIN:
+            delta[col] = delta[col].astype("string").fillna(UNKNOWN)
+        else:
+            delta[col] = pd.to_numeric(delta[col], errors="coerce").fillna(-1).astype("int64")
+    return delta
+
+
+def _save_row_counts(conn: sqlite3.Connection) -> None:
+    """Record each rollup's size so choose_rollup does not count per query."""
+    stats = quote_identifier(STATS_TABLE)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {stats} (name TEXT PRIMARY KEY, row_count INTEGER NOT NULL)"
+    )
+    counts = [(name, _row_count(conn, name)) for name in ROLLUPS]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {stats} (name, row_count) VALUES (?, ?)",  # noqa: S608 - quoted identifier, bound values
+        counts,
+    )
+
+
+def _row_count(conn: sqlite3.Connection, name: str) -> int:
+    sql = f"SELECT COUNT(*) FROM {quote_identifier(name)}"  # noqa: S608 - quoted identifier only
+    return conn.execute(sql).fetchone()[0]
+
+
+def refresh_rollups(db_path: pathlib.Path = DB_PATH, rebuild: bool = False) -> dict[str, int]:
+    """Fold fact rows added since the last refresh into every rollup.
+
+    With ``rebuild`` the rollups are dropped and recomputed from the whole
+    fact table (needed after dimension attributes change, since existing
+    totals keep the region/category they were aggregated under).
+
+    Returns the number of rollup rows touched per table.
+    """
+    touched: dict[str, int] = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_watermark_table(conn)
+        with conn:
+            for name, grain in ROLLUPS.items():
+                if rebuild or _is_outdated(conn, name, grain):
+                    conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(name)}")
+                    set_watermark(conn, name, None, None)
+
+            marks = {name: get_watermark(conn, name)[0] or 0 for name in ROLLUPS}
+            delta = _load_delta(conn, min(marks.values()))
+            new_mark = int(delta["transactionid"].max()) if len(delta) else None
+
+            for name, grain in ROLLUPS.items():
+                _ensure_rollup_table(conn, name, grain)
+                rows = delta[delta["transactionid"] > marks[name]]
+                if rows.empty:
+                    touched[name] = 0
+                    continue
+                agg = rows.groupby(list(grain), as_index=False)[list(MEASURES.values())].sum()
+                conn.executemany(
+                    _upsert_sql(name, grain), agg.astype(object).itertuples(index=False, name=None)
+                )
+                set_watermark(conn, name, new_mark, None)
+                touched[name] = len(agg)
+            _save_row_counts(conn)
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    for name, count in touched.items():
+        logger.info(f"{name}: {count} rows refreshed")
+    return touched
+
+
+def _upsert_sql(name: str, grain: tuple[str, ...]) -> str:
+    """Return an INSERT that adds a group's measures to the stored totals."""
+    cols = [*grain, *MEASURES]
+    measures = (quote_identifier(m) for m in MEASURES)
+    return (
+        f"INSERT INTO {quote_identifier(name)} ({_column_list(cols)}) "  # noqa: S608 - quoted identifiers, bound values
+        f"VALUES ({', '.join('?' for _ in cols)}) "
+        f"ON CONFLICT ({_column_list(grain)}) DO UPDATE SET "
+        + ", ".join(f"{m} = {m} + excluded.{m}" for m in measures)
+    )
+
+
+def _column_expr(column: str, grain: tuple[str, ...]) -> str | None:
+    """Return how to compute a group-by column from a rollup grain, if possible."""
+    if column in grain:
+        return quote_identifier(column)
+    for source, length in DERIVED.get(column, {}).items():
+        if source in grain:
+            source = quote_identifier(source)
+            return (
+                f"CASE WHEN {source} = '{UNKNOWN}' THEN '{UNKNOWN}' "
+                f"ELSE substr({source}, 1, {length}) END"
+            )
+    return None
+
+
+def choose_rollup(conn: sqlite3.Connection, group_by: list[str]) -> str | None:
+    """Return the smallest rollup able to answer a group-by, or None.
+
+    Sizes come from the counts saved by the last refresh; a rollup without
+    one (refreshed by an older version) is counted here.
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    sizes = {}
+    if STATS_TABLE in tables:
+        stats = f"SELECT name, row_count FROM {quote_identifier(STATS_TABLE)}"  # noqa: S608 - quoted identifier only
+        sizes = dict(conn.execute(stats))
+    candidates = []
+    for name, grain in ROLLUPS.items():
+        if name in tables and all(_column_expr(col, grain) for col in group_by):
+            if name not in sizes:
+                sizes[name] = _row_count(conn, name)
+            candidates.append((sizes[name], name))
+    return min(candidates)[1] if candidates else None
+
+
+def query_rollup(
+    conn: sqlite3.Connection, group_by: list[str], measures: list[str] | None = None
+) -> pd.DataFrame:
+    """Aggregate measures by ``group_by`` using the smallest covering rollup.
+
+    Raises:
+        ValueError: If a measure is unknown or no rollup covers the grain.
+    """
+    measures = measures or list(MEASURES)
+    unknown = set(measures) - set(MEASURES)
+    if unknown:
+        raise ValueError(f"Unknown measures: {sorted(unknown)}")
+
+    name = choose_rollup(conn, group_by)
+    if name is None:
+        raise ValueError(f"No rollup covers group-by {group_by}; add one to ROLLUPS")
+    grain = ROLLUPS[name]
+    select = [f"{_column_expr(col, grain)} AS {quote_identifier(col)}" for col in group_by]
+    select += [f"SUM({quote_identifier(m)}) AS {quote_identifier(m)}" for m in measures]
+    # Group-by columns were checked against the grain by choose_rollup; all are quoted
+    sql = f"SELECT {', '.join(select)} FROM {quote_identifier(name)}"  # noqa: S608 - quoted identifiers only
+    if group_by:
+        sql += f" GROUP BY {_column_list(group_by)} ORDER BY {_column_list(group_by)}"
+    logger.debug(f"Answering {group_by} from {name}")
+    return pd.read_sql_query(sql, conn)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Refresh (or rebuild) the rollup tables."""
+    parser = argparse.ArgumentParser(description="Refresh rollup tables in smart_sales.db")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute from the full fact table")
+    args = parser.parse_args(argv)
+    init_logger()
+    refresh_rollups(rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
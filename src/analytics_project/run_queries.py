@@ -1,30 +1,267 @@
+"""Run the report queries in SQL/queries.sql against project.db.
+
+Queries are independent, so they run in parallel threads, each borrowing a
+connection from a small pool of read-only SQLite connections (SQLite allows
+many concurrent readers; sqlite3 releases the GIL while a statement runs).
+Every query records its latency, row count and EXPLAIN QUERY PLAN.
+
+Results are cached on disk keyed by the query text and the database's data
+version (size and modification time of the database file and its WAL), so
+re-running unchanged reports against unchanged data does not touch SQLite.
+Entries for data that has since changed are never hit again, so the cache
+is pruned after every run: entries unused for a week go, and only the most
+recently used ones are kept beyond that (least recently used first out).
+
+Module Information:
+    - Filename: run_queries.py
+    - Module: run_queries
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.run_queries [--workers 4] [--no-cache]
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import hashlib
+import os
+import pathlib
+import queue
 import sqlite3
+import time
+
 import pandas as pd
-import os
 
 # Paths
-db_path = os.path.join(os.path.dirname(__file__), '../../data/project.db')
-queries_path = os.path.join(os.path.dirname(__file__), 'SQL', 'queries.sql')
-
-# Connect to database
-conn = sqlite3.connect(db_path)
-
-# Read SQL file
-with open(queries_path, 'r') as f:
-    sql_content = f.read()
-
-# Split queries by semicolon
-queries = [q.strip() for q in sql_content.split(';') if q.strip()]
-
-# Run each query
-for i, query in enumerate(queries, start=1):
-    print(f"\n--- Query {i} ---")
-    print(query)
-    try:
-        df = pd.read_sql_query(query, conn)
-        print(df.head(10))  # Show first 10 rows
-    except Exception as e:
-        print("Error:", e)
-
-conn.close()
-print("\nAll queries executed.")
+BASE_DIR = pathlib.Path(__file__).resolve().parents[2]
+DB_PATH = BASE_DIR / "data" / "project.db"
+QUERIES_PATH = pathlib.Path(__file__).resolve().parent / "SQL" / "queries.sql"
+CACHE_DIR = BASE_DIR / "data" / ".query_cache"
+
+DEFAULT_WORKERS = 4
+
+# Result cache limits: entries kept, and seconds an unused entry survives
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+@dataclass
+class QueryResult:
+    """Outcome of one query."""
+
+    sql: str
+    df: pd.DataFrame | None = None
+    seconds: float = 0.0
+    plan: list[str] = field(default_factory=list)
+    cached: bool = False
+    error: str | None = None
+
+    @property
+    def rows(self) -> int:
+        """Number of result rows (0 for a failed query)."""
+        return 0 if self.df is None else len(self.df)
+
+    @property
+    def title(self) -> str:
+        """The query's leading ``--`` comment, or its first line."""
+        first = self.sql.splitlines()[0]
+        return first.removeprefix("--").strip()
+
+
+def split_queries(sql_content: str) -> list[str]:
+    """Split a SQL script on semicolons, dropping empty statements."""
+    return [q.strip() for q in sql_content.split(";") if q.strip()]
+
+
+def data_version(db_path: pathlib.Path) -> str:
+    """Return a token that changes whenever the database content can have changed."""
+    parts = []
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        if path.exists():
+            stat = path.stat()
+            parts.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+class ResultCache:
+    """Query results pickled on disk, keyed by query text and data version."""
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path = CACHE_DIR,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_age_seconds: float = CACHE_MAX_AGE_SECONDS,
+    ) -> None:
+        """Keep results in ``cache_dir``; ``prune`` enforces the two limits."""
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+
+    def _path(self, sql: str, version: str) -> pathlib.Path:
+        key = hashlib.sha256(f"{version}\n{sql}".encode()).hexdigest()
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, sql: str, version: str) -> QueryResult | None:
+        """Return the cached result for this data version, or None.
+
+        An entry that cannot be unpickled (truncated, or written by an
+        incompatible version) counts as a miss and is overwritten by ``put``.
+        """
+        path = self._path(sql, version)
+        try:
+            result = pd.read_pickle(path)  # noqa: S301 - local cache written by put()
+            os.utime(path)  # mtime marks the last use, for pruning
+        except FileNotFoundError:
+            return None
+        except Exception:  # noqa: BLE001 - any unreadable entry is a miss
+            return None
+        return result if isinstance(result, QueryResult) else None
+
+    def put(self, result: QueryResult, version: str) -> None:
+        """Store a result atomically, so readers never see a partial file."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(result.sql, version)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        pd.to_pickle(result, tmp)
+        tmp.replace(path)
+
+    def prune(self) -> int:
+        """Delete stale entries and return how many files were removed.
+
+        Entries unused for ``max_age_seconds`` go first, then the least
+        recently used ones beyond ``max_entries``.
+        """
+        if not self.cache_dir.is_dir():
+            return 0
+        entries = []
+        for path in self.cache_dir.iterdir():
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue  # removed by a concurrent run
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.max_age_seconds
+        kept = [path for mtime, path in entries if mtime >= cutoff and path.suffix == ".pkl"]
+        keep = set(kept[: self.max_entries])
+        removed = 0
+        for mtime, path in entries:
+            # Leftover .tmp files from interrupted writes go once they are old
+            if path not in keep and (path.suffix == ".pkl" or mtime < cutoff):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class ConnectionPool:
+    """Fixed set of read-only connections shared by worker threads."""
+
+    def __init__(self, db_path: pathlib.Path, size: int) -> None:
+        """Open ``size`` read-only connections to an existing database."""
+        if not db_path.exists():
+            raise FileNotFoundError(f"Database not found: {db_path}")
+        self._idle: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self._idle.put(conn)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        """Borrow an idle connection for the duration of a ``with`` block."""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close every connection, waiting for borrowed ones to come back."""
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+def run_query(pool: ConnectionPool, sql: str) -> QueryResult:
+    """Run one query on a pooled connection, timing it and capturing its plan."""
+    result = QueryResult(sql)
+    with pool.connection() as conn:
+        try:
+            result.plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            start = time.perf_counter()
+            result.df = pd.read_sql_query(sql, conn)
+            result.seconds = time.perf_counter() - start
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            result.error = str(e)
+    return result
+
+
+def run_queries(
+    queries: list[str],
+    db_path: pathlib.Path = DB_PATH,
+    workers: int = DEFAULT_WORKERS,
+    cache: ResultCache | None = None,
+) -> list[QueryResult]:
+    """Run queries in parallel, answering unchanged ones from the cache.
+
+    Results are returned in the order the queries were given.
+    """
+    version = data_version(db_path)
+    results: dict[int, QueryResult] = {}
+    pending = []
+    for i, sql in enumerate(queries):
+        hit = cache.get(sql, version) if cache else None
+        if hit is not None:
+            hit.cached = True
+            results[i] = hit
+        else:
+            pending.append(i)
+
+    if pending:
+        pool = ConnectionPool(db_path, min(workers, len(pending)))
+        try:
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                futures = {i: executor.submit(run_query, pool, queries[i]) for i in pending}
+                for i, future in futures.items():
+                    results[i] = future.result()
+        finally:
+            pool.close()
+        if cache:
+            for i in pending:
+                if results[i].error is None:
+                    cache.put(results[i], version)
+            cache.prune()
+
+    return [results[i] for i in range(len(queries))]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the report queries and print each result with its timing."""
+    parser = argparse.ArgumentParser(description="Run the report queries in SQL/queries.sql")
+    parser.add_argument("--db", type=pathlib.Path, default=DB_PATH, help="SQLite database")
+    parser.add_argument("--queries", type=pathlib.Path, default=QUERIES_PATH, help="SQL file")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel readers")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-run every query")
+    args = parser.parse_args(argv)
+
+    queries = split_queries(args.queries.read_text(encoding="utf-8"))
+    cache = None if args.no_cache else ResultCache()
+    start = time.perf_counter()
+    results = run_queries(queries, args.db, args.workers, cache)
+
+    for i, result in enumerate(results, start=1):
+        print(f"\n--- Query {i}: {result.title} ---")
+        if result.error:
+            print("Error:", result.error)
+            continue
+        source = "cache" if result.cached else f"{result.seconds * 1000:.1f} ms"
+        print(f"{result.rows} rows ({source})")
+        for step in result.plan:
+            print(f"  plan: {step}")
+        print(result.df.head(10))  # Show first 10 rows
+
+    print(f"\nAll queries executed in {time.perf_counter() - start:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
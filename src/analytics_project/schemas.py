@@ -0,0 +1,235 @@
+"""Declare the column types of each raw dataset in one place.
+
+Every raw CSV reader uses this registry instead of letting pandas infer
+types: low-cardinality text becomes ``category``, IDs get the smallest
+integer width that fits their domain (nullable, because raw files can have
+gaps; text or out-of-range IDs become missing and are counted), measures that do not need double precision become ``float32`` and
+date columns are parsed with an explicit format. Monetary columns stay
+``float64`` so sums and medians keep cent precision.
+
+Module Information:
+    - Filename: schemas.py
+    - Module: schemas
+    - Location: src/analytics_project/
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from .utils_logger import logger
+
+# Raw dates look like 5/4/2025
+RAW_DATE_FORMAT = "%m/%d/%Y"
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """Column types for one raw dataset, keyed by standardized column name."""
+
+    dtypes: dict[str, str]
+    dates: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> list[str]:
+        """All typed columns, dates last."""
+        return [*self.dtypes, *self.dates]
+
+
+SCHEMAS: dict[str, DatasetSchema] = {
+    "customers": DatasetSchema(
+        dtypes={
+            "customerid": "Int32",
+            "firstname": "string",
+            "region": "category",
+            "loyaltypoints": "float32",
+            "preferredcontact": "category",
+        },
+        dates={"dateenrolled": RAW_DATE_FORMAT},
+    ),
+    "products": DatasetSchema(
+        dtypes={
+            "productid": "Int32",
+            "productname": "string",
+            "category": "category",
+            "unitprice": "float64",
+            "stockquantity": "float32",
+            "category.1": "category",  # repeated Category header; holds the supplier
+        },
+    ),
+    "sales": DatasetSchema(
+        dtypes={
+            "transactionid": "Int32",
+            "customerid": "Int32",
+            "productid": "Int32",
+            "storeid": "Int16",
+            "campaignid": "Int8",
+            "saleamount": "float64",
+            "discountpercent": "float32",
+            "paymenttype": "category",
+        },
+        dates={"saledate": RAW_DATE_FORMAT},
+    ),
+}
+
+# Raw file name -> dataset
+RAW_FILES: dict[str, str] = {
+    "customers_data.csv": "customers",
+    "products_data.csv": "products",
+    "sales_data.csv": "sales",
+}
+
+
+def standard_name(column: str) -> str:
+    """Return the registry key for a raw header (lower case, no spaces)."""
+    return column.strip().lower().replace(" ", "")
+
+
+def _is_integer(dtype: str) -> bool:
+    """Return True for a registered integer type such as ``Int32``."""
+    return pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype))
+
+
+def csv_options(path: pathlib.Path, dataset: str) -> dict:
+    """Return ``dtype`` and ``usecols`` for ``pd.read_csv`` on a raw file.
+
+    The header is read once so registry names can be matched to the raw
+    spelling (e.g. ``SaleAmount``). Columns missing from the registry are
+    not read and are logged; registry columns missing from the file are
+    ignored. Integer columns are read as text, so a dirty value cannot fail
+    the read; ``coerce_integers`` gives them their registered width.
+    """
+    schema = SCHEMAS[dataset]
+    header = pd.read_csv(path, nrows=0).columns
+    raw = {standard_name(col): col for col in header}
+    skipped = [col for col in header if standard_name(col) not in schema.columns]
+    if skipped:
+        logger.warning(f"{path.name}: columns not in the {dataset} schema are not read: {skipped}")
+    dtype = {
+        raw[name]: "string" if _is_integer(t) else t
+        for name, t in schema.dtypes.items()
+        if name in raw
+    }
+    usecols = [raw[name] for name in schema.columns if name in raw]
+    # Keep the file's column order
+    return {"dtype": dtype, "usecols": [col for col in header if col in usecols]}
+
+
+def coerce_integers(df: pd.DataFrame, dataset: str) -> tuple[pd.DataFrame, dict[str, int]]:
+    """Cast the dataset's integer columns in place to their registered width.
+
+    Values that are not whole numbers or do not fit the width (e.g. ``abc``
+    or ``300`` for an ``Int8``) become missing. Returns the frame and the
+    number of such values per column, so callers can report them.
+    """
+    invalid: dict[str, int] = {}
+    for col in df.columns:
+        dtype = SCHEMAS[dataset].dtypes.get(standard_name(col))
+        if dtype is None or not _is_integer(dtype) or df[col].dtype == dtype:
+            continue
+        numeric = pd.to_numeric(df[col], errors="coerce")
+        info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+        fits = (numeric.between(info.min, info.max) & (numeric % 1 == 0)).fillna(False)
+        invalid[col] = int((df[col].notna() & ~fits).sum())
+        df[col] = numeric.where(fits).astype(dtype)
+    return df, invalid
+
+
+def log_invalid_integers(invalid: dict[str, int], dataset: str) -> None:
+    """Warn about the integer values ``coerce_integers`` set to missing."""
+    for col, count in invalid.items():
+        if count:
+            dtype = SCHEMAS[dataset].dtypes[standard_name(col)]
+            logger.warning(f"{col}: {count} values are not valid {dtype} and were set to missing")
+
+
+def to_datetime_cached(series: pd.Series, fmt: str) -> pd.Series:
+    """``pd.to_datetime`` that parses each distinct string once.
+
+    Date columns repeat a few hundred values over millions of rows, so the
+    distinct values are parsed and the result is gathered back by code.
+    Values that do not match ``fmt`` become NaT. The result keeps the
+    resolution ``pd.to_datetime`` picks (``ns`` in pandas 2, ``us`` in 3).
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors="coerce")
+    unit = np.datetime_data(parsed.dtype)[0]
+    # Append NaT so missing values (code -1) pick it up
+    lookup = np.append(parsed.to_numpy(), np.datetime64("NaT", unit))
+    values = lookup[codes]
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def parse_dates(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Parse the dataset's date columns in place with their explicit formats.
+
+    Values that do not match (e.g. ``2023-13-01``) become NaT.
+    """
+    dates = SCHEMAS[dataset].dates
+    for col in df.columns:
+        fmt = dates.get(standard_name(col))
+        if fmt and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = to_datetime_cached(df[col], fmt)
+    return df
+
+
+def parse_prepared_dates(series: pd.Series) -> pd.Series:
+    """Parse a date column read back from data/prepared.
+
+    Prepared files written since dates are parsed at read time hold ISO
+    dates (or real datetimes in Parquet/Feather); older CSVs still hold the
+    raw ``5/4/2025`` form. Both are accepted.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = to_datetime_cached(series, "ISO8601")
+    legacy = parsed.isna() & series.notna()
+    if legacy.any():
+        parsed[legacy] = to_datetime_cached(series[legacy], RAW_DATE_FORMAT)
+    return parsed
+
+
+def read_raw_csv(path: pathlib.Path, dataset: str) -> pd.DataFrame:
+    """Read a whole raw CSV with the dataset's registered types."""
+    df, invalid = coerce_integers(pd.read_csv(path, **csv_options(path, dataset)), dataset)
+    log_invalid_integers(invalid, dataset)
+    return parse_dates(df, dataset)
+
+
+def fill_category(series: pd.Series, value) -> pd.Series:
+    """``fillna`` that also works on categoricals by adding the fill value."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def normalize_text(series: pd.Series, func: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """Apply a string transform, only to the distinct values of a categorical.
+
+    ``func`` receives and returns a string Series (e.g. strip + title-case).
+    For categoricals it runs once per category and the codes are remapped,
+    merging categories that normalize to the same text. Missing values stay
+    missing.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        if not isinstance(series.dtype, pd.StringDtype):
+            series = series.astype("string")
+        return func(series)
+
+    normalized = func(pd.Series(series.cat.categories).astype("string"))
+    new_categories = pd.Index(normalized.unique()).dropna()
+    remap = np.append(new_categories.get_indexer(normalized), -1)  # code -1 stays -1
+    codes = remap[series.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=new_categories),
+        index=series.index,
+        name=series.name,
+    )
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """Return the deep memory usage of a DataFrame in megabytes."""
+    return df.memory_usage(deep=True).sum() / 1_000_000
@@ -0,0 +1,372 @@
+"""Load the sales fact once into shared memory for multi-process workers.
+
+``load_sales`` streams the prepared sales file into a single
+``multiprocessing.shared_memory`` block. Each column is stored as one
+contiguous NumPy array at an aligned offset:
+
+- whole-number columns (keys, ``date_id``) are int64, with -1 for missing
+  or unparseable values;
+- measures are float64, with NaN for missing values;
+- text columns are int32 codes (-1 = missing), and their labels are kept
+  in the layout.
+
+The ``FactLayout`` (block name, row count, column offsets and labels) is
+small and picklable. Workers attach to the block by name and get
+zero-copy array views, so N workers cost one copy of the facts, not N.
+``fan_out`` runs a function over row slices in a process pool whose
+workers attach once at start-up. ``group_sum`` is the stock aggregation
+built on it.
+
+Lifecycle:
+
+- The creating process owns the block. Leaving its ``with`` block (or
+  calling ``unlink``) frees the block, also when a worker crashed.
+- Workers only ``close`` their mapping.
+- If the owner dies without cleaning up, multiprocessing's resource
+  tracker unlinks the block when the owner's process tree exits.
+- Blocks left behind by owners that are no longer running (e.g. after the
+  tracker itself was killed) are removed by ``cleanup_stale``, which
+  ``load_sales`` runs before allocating. Block names carry the owner's pid
+  for this.
+
+    with load_sales() as facts:
+        by_payment = group_sum(facts, "paymenttype", "saleamount", workers=4)
+
+Module Information:
+    - Filename: shared_facts.py
+    - Module: shared_facts
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.shared_facts [--workers 4]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass, replace
+from functools import partial
+from itertools import repeat
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import pathlib
+import secrets
+import sys
+from typing import Self
+
+import numpy as np
+import pandas as pd
+
+from .etl_to_dw import PREPARED_DATA_DIR
+from .prepared_io import count_prepared_rows, iter_prepared
+from .utils_logger import init_logger, logger, timed_stage
+
+# Column -> kind ("int", "float" or "text"); columns absent from the file are skipped
+FACT_COLUMNS: dict[str, str] = {
+    "transactionid": "int",
+    "date_id": "int",
+    "customerid": "int",
+    "productid": "int",
+    "storeid": "int",
+    "campaignid": "float",
+    "saleamount": "float",
+    "discountpercent": "float",
+    "paymenttype": "text",
+}
+KIND_DTYPES: dict[str, str] = {"int": "int64", "float": "float64", "text": "int32"}
+
+SHM_PREFIX = "analytics_facts_"
+SHM_DIR = pathlib.Path("/dev/shm")  # noqa: S108 - where POSIX shared memory shows up on Linux
+ALIGN_BYTES = 64
+CHUNK_ROWS = 250_000
+MISSING = -1
+
+
+@dataclass(frozen=True)
+class FactLayout:
+    """Everything a worker needs to attach: block name, shape and labels."""
+
+    shm_name: str
+    rows: int
+    columns: tuple[tuple[str, str, int], ...]  # (name, dtype, byte offset)
+    labels: dict[str, tuple[str, ...]]  # text column -> label per code
+    nbytes: int
+
+
+def _plan_layout(name: str, rows: int, kinds: dict[str, str]) -> FactLayout:
+    columns, offset = [], 0
+    for column, kind in kinds.items():
+        dtype = np.dtype(KIND_DTYPES[kind])
+        columns.append((column, dtype.str, offset))
+        offset += -(-rows * dtype.itemsize // ALIGN_BYTES) * ALIGN_BYTES
+    return FactLayout(name, rows, tuple(columns), {}, max(offset, 1))
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        # Only the owner may unlink; keep attachers out of the resource tracker
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedFacts:
+    """Column arrays backed by one shared memory block."""
+
+    def __init__(self, layout: FactLayout, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        """Wrap a mapped block; use ``allocate``, ``from_frame`` or ``attach`` instead."""
+        self.layout = layout
+        self.owner = owner
+        self._shm = shm
+        self.arrays: dict[str, np.ndarray] = {
+            name: np.ndarray((layout.rows,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, dtype, offset in layout.columns
+        }
+
+    @classmethod
+    def allocate(cls, rows: int, kinds: dict[str, str]) -> "SharedFacts":
+        """Create a zero-filled block for ``rows`` rows; the caller owns it."""
+        name = f"{SHM_PREFIX}{os.getpid()}_{secrets.token_hex(4)}"
+        layout = _plan_layout(name, rows, kinds)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=layout.nbytes)
+        return cls(layout, shm, owner=True)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, kinds: dict[str, str] | None = None) -> "SharedFacts":
+        """Copy a DataFrame's fact columns into a new block."""
+        kinds = {c: k for c, k in (kinds or FACT_COLUMNS).items() if c in df.columns}
+        facts = cls.allocate(len(df), kinds)
+        try:
+            encoder = _Encoder(kinds)
+            encoder.fill(facts, df, 0)
+            facts.layout = replace(facts.layout, labels=encoder.labels())
+        except BaseException:
+            facts.unlink()
+            raise
+        return facts
+
+    @classmethod
+    def attach(cls, layout: FactLayout) -> "SharedFacts":
+        """Map an existing block read-write without taking ownership."""
+        return cls(layout, _open_block(layout.shm_name), owner=False)
+
+    def __len__(self) -> int:
+        """Return the number of fact rows in the block."""
+        return self.layout.rows
+
+    def decode(self, column: str, start: int = 0, stop: int | None = None) -> pd.Categorical:
+        """Return a text column (or a slice of it) as a Categorical over its labels."""
+        codes = self.arrays[column][start:stop]
+        return pd.Categorical.from_codes(codes, categories=list(self.layout.labels[column]))
+
+    def close(self) -> None:
+        """Drop this process's views and mapping."""
+        self.arrays = {}
+        # A caller may still hold a view; the mapping goes when it does
+        with suppress(BufferError):
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """Close and free the block (owner only; a no-op for attached copies)."""
+        self.close()
+        if self.owner:
+            with suppress(FileNotFoundError):
+                self._shm.unlink()
+            self.owner = False
+
+    def __enter__(self) -> Self:
+        """Return the facts; the block is released on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Free the block if this process owns it, else just unmap it."""
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+class _Encoder:
+    """Converts chunks to fact columns, keeping one label dictionary per text column."""
+
+    def __init__(self, kinds: dict[str, str]) -> None:
+        self.kinds = kinds
+        self._codes: dict[str, dict[str, int]] = {c: {} for c, k in kinds.items() if k == "text"}
+
+    def fill(self, facts: SharedFacts, chunk: pd.DataFrame, start: int) -> int:
+        stop = start + len(chunk)
+        for column, kind in self.kinds.items():
+            target = facts.arrays[column][start:stop]
+            if kind == "text":
+                chunk_codes, uniques = pd.factorize(chunk[column])
+                known = self._codes[column]
+                remap = [known.setdefault(str(u), len(known)) for u in uniques]
+                # factorize's -1 (missing) picks the trailing MISSING entry
+                target[:] = np.array([*remap, MISSING])[chunk_codes]
+            else:
+                values = pd.to_numeric(chunk[column], errors="coerce")
+                values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                target[:] = np.nan_to_num(values, nan=MISSING) if kind == "int" else values
+        return stop
+
+    def labels(self) -> dict[str, tuple[str, ...]]:
+        return {column: tuple(codes) for column, codes in self._codes.items()}
+
+
+def cleanup_stale() -> list[str]:
+    """Unlink fact blocks whose owning process is gone; return their names."""
+    removed = []
+    if not SHM_DIR.is_dir():
+        return removed
+    for path in SHM_DIR.glob(f"{SHM_PREFIX}*"):
+        pid = path.name.removeprefix(SHM_PREFIX).split("_")[0]
+        if not pid.isdigit() or _alive(int(pid)):
+            continue
+        try:
+            path.unlink()
+            removed.append(path.name)
+        except OSError:
+            continue
+    if removed:
+        logger.warning(f"Removed {len(removed)} stale shared fact block(s): {removed}")
+    return removed
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def load_sales(
+    prepared_dir: pathlib.Path = PREPARED_DATA_DIR,
+    columns: list[str] | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> SharedFacts:
+    """Stream the prepared sales file into a new shared block and return it.
+
+    The rows are counted first (without parsing), so the block is allocated
+    once and filled chunk by chunk; memory outside the block stays at one
+    chunk. The caller owns the result; use it as a context manager.
+    """
+    cleanup_stale()
+    path = prepared_dir / "sales_prepared.csv"
+    rows = count_prepared_rows(path)
+    chunks = iter_prepared(path, chunk_rows)
+    first = next(chunks, None)
+    available = [] if first is None else list(first.columns)
+    kinds = {
+        c: k for c, k in FACT_COLUMNS.items() if c in available and (not columns or c in columns)
+    }
+    facts = SharedFacts.allocate(rows, kinds)
+    try:
+        encoder = _Encoder(kinds)
+        start = 0
+        if first is not None:
+            start = encoder.fill(facts, first, start)
+        for chunk in chunks:
+            start = encoder.fill(facts, chunk, start)
+        if start != rows:
+            raise ValueError(f"{path.name}: counted {rows} rows but read {start}")
+        facts.layout = replace(facts.layout, labels=encoder.labels())
+    except BaseException:
+        facts.unlink()
+        raise
+    return facts
+
+
+# Set in each pool worker by _init_worker
+_worker_facts: SharedFacts | None = None
+
+
+def _init_worker(layout: FactLayout) -> None:
+    global _worker_facts
+    _worker_facts = SharedFacts.attach(layout)
+
+
+def _run_slice(func, start: int, stop: int):
+    return func(_worker_facts, start, stop)
+
+
+def worker_pool(facts: SharedFacts, workers: int | None = None) -> ProcessPoolExecutor:
+    """Start spawned workers that attach to ``facts``; reuse it across jobs."""
+    ctx = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(facts.layout,),
+    )
+
+
+def fan_out(
+    facts: SharedFacts,
+    func,
+    workers: int | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> list:
+    """Run ``func(facts, start, stop)`` over row slices in worker processes.
+
+    ``func`` must be picklable (a module-level function or a ``partial`` of
+    one). Workers attach to the block once; only the layout and the slice
+    bounds are sent to them. Pass a ``worker_pool`` to run several jobs
+    without restarting workers; with one worker and no pool, ``func`` runs
+    in this process.
+    """
+    workers = workers or (pool._max_workers if pool else os.cpu_count() or 1)
+    workers = max(1, min(workers, len(facts) or 1))
+    bounds = np.linspace(0, len(facts), workers + 1).astype(int).tolist()
+    if pool is None and workers == 1:
+        return [func(facts, 0, len(facts))]
+    if pool is not None:
+        return list(pool.map(_run_slice, repeat(func), bounds[:-1], bounds[1:]))
+    with worker_pool(facts, workers) as own_pool:
+        return list(own_pool.map(_run_slice, repeat(func), bounds[:-1], bounds[1:]))
+
+
+def _sum_slice(facts: SharedFacts, start: int, stop: int, by: str, measure: str) -> pd.Series:
+    keys = facts.arrays[by][start:stop]
+    values = facts.arrays[measure][start:stop]
+    keep = (keys != MISSING) & ~np.isnan(values)
+    return pd.Series(values[keep]).groupby(keys[keep]).sum()
+
+
+def group_sum(
+    facts: SharedFacts,
+    by: str,
+    measure: str,
+    workers: int | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> pd.Series:
+    """Sum ``measure`` per value of ``by`` (missing keys and values skipped)."""
+    parts = fan_out(facts, partial(_sum_slice, by=by, measure=measure), workers, pool)
+    totals = pd.concat(parts).groupby(level=0).sum()
+    if by in facts.layout.labels:
+        totals.index = [facts.layout.labels[by][code] for code in totals.index]
+    return totals.sort_index().rename(measure).rename_axis(by)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Load the sales into shared memory and log a few parallel group sums."""
+    parser = argparse.ArgumentParser(description="Load sales into shared memory and aggregate")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args(argv)
+
+    init_logger()
+    with timed_stage("shared_facts_load") as stage, load_sales() as facts:
+        stage.rows = len(facts)
+        logger.info(f"Shared {len(facts):,} sales in {facts.layout.shm_name} "
+                    f"({facts.layout.nbytes / 1e6:.1f} MB)")  # fmt: skip
+        with worker_pool(facts, args.workers) as pool:
+            for by in ("paymenttype", "storeid"):
+                with timed_stage(f"shared_facts_sum_by_{by}"):
+                    totals = group_sum(facts, by, "saleamount", pool=pool)
+                logger.info(f"saleamount by {by}:\n{totals.round(2).to_string()}")
+
+
+if __name__ == "__main__":
+    main()
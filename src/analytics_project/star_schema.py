@@ -0,0 +1,237 @@
+"""Build the star-schema warehouse defined in SQL/create_tables.sql.
+
+Applies the DDL to smart_sales.db, generates the dates dimension from the
+span of sale dates (see date_dim.py), assigns integer surrogate keys to customers and products,
+and loads the sales fact with those keys. The fact foreign keys carry
+covering indexes so the reports in SQL/star_queries.sql are answered with
+index lookups instead of full scans.
+
+Module Information:
+    - Filename: star_schema.py
+    - Module: star_schema
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.star_schema
+"""
+
+import pathlib
+import sqlite3
+
+import pandas as pd
+
+from .date_dim import CALENDAR_COLUMNS, build_calendar, date_ids
+from .etl_to_dw import DB_PATH, PREPARED_DATA_DIR, quote_identifier
+from .prepared_io import read_prepared
+from .schemas import parse_prepared_dates
+from .utils_logger import init_logger, logger
+
+SQL_DIR: pathlib.Path = pathlib.Path(__file__).resolve().parent / "SQL"
+DDL_PATH: pathlib.Path = SQL_DIR / "create_tables.sql"
+
+
+# Columns added to tables after their first release: table -> {column: type}.
+# CREATE TABLE IF NOT EXISTS leaves older warehouses without them.
+ADDED_COLUMNS: dict[str, dict[str, str]] = {
+    "dates": {"day": "INTEGER", "week": "INTEGER", "weekday": "INTEGER"},
+}
+
+
+def apply_schema(conn: sqlite3.Connection, ddl_path: pathlib.Path = DDL_PATH) -> None:
+    """Run the warehouse DDL (idempotent: every statement uses IF NOT EXISTS)."""
+    conn.executescript(ddl_path.read_text(encoding="utf-8"))
+    for table, columns in ADDED_COLUMNS.items():
+        name = quote_identifier(table)
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({name})")}
+        for column, sql_type in columns.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {name} ADD COLUMN {quote_identifier(column)} {sql_type}")
+    logger.info(f"Applied schema from {ddl_path.name}")
+
+
+def _records(df: pd.DataFrame) -> list[tuple]:
+    """Convert a frame to tuples of plain Python values with NaN as NULL."""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def build_dates(sale_dates: pd.Series) -> pd.DataFrame:
+    """Return one row per calendar day between the first and last sale date.
+
+    With no dated sale the calendar is empty.
+    """
+    ids = date_ids(sale_dates.dropna())
+    if ids.empty:
+        return pd.DataFrame(columns=list(CALENDAR_COLUMNS))
+    return build_calendar(int(ids.min()), int(ids.max()))
+
+
+def load_customers(conn: sqlite3.Connection, customers: pd.DataFrame) -> pd.Series:
+    """Upsert customers on their natural key and return natural -> surrogate."""
+    names = customers["firstname"].astype("string").str.split(" ", n=1, expand=True)
+    dim = pd.DataFrame(
+        {
+            "source_customer_id": customers["customerid"],
+            "first_name": names[0],
+            "last_name": names[1] if names.shape[1] > 1 else None,
+            "region": customers["region"],
+            "join_date": parse_prepared_dates(customers["dateenrolled"]).dt.strftime("%Y-%m-%d"),
+            "loyalty_points": pd.to_numeric(customers["loyaltypoints"], errors="coerce"),
+            "preferred_contact": customers["preferredcontact"],
+        }
+    ).drop_duplicates("source_customer_id", keep="last")
+    conn.executemany(
+        """INSERT INTO customers (source_customer_id, first_name, last_name, region,
+                                  join_date, loyalty_points, preferred_contact)
+           VALUES (?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(source_customer_id) DO UPDATE SET
+               first_name = excluded.first_name,
+               last_name = excluded.last_name,
+               region = excluded.region,
+               join_date = excluded.join_date,
+               loyalty_points = excluded.loyalty_points,
+               preferred_contact = excluded.preferred_contact""",
+        _records(dim),
+    )
+    return _key_map(conn, "customers", "source_customer_id", "customer_id")
+
+
+def load_products(conn: sqlite3.Connection, products: pd.DataFrame) -> pd.Series:
+    """Upsert products on their natural key and return natural -> surrogate."""
+    dim = pd.DataFrame(
+        {
+            "source_product_id": products["productid"],
+            "product_name": products["productname"],
+            "category": products["category"],
+            # The raw file repeats the Category header; the second one is the supplier
+            "supplier": products.get("category.1"),
+            "unit_price": pd.to_numeric(products["unitprice"], errors="coerce"),
+            "stock_level": pd.to_numeric(products["stockquantity"], errors="coerce"),
+        }
+    ).drop_duplicates("source_product_id", keep="last")
+    conn.executemany(
+        """INSERT INTO products (source_product_id, product_name, category, supplier,
+                                 unit_price, stock_level)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(source_product_id) DO UPDATE SET
+               product_name = excluded.product_name,
+               category = excluded.category,
+               supplier = excluded.supplier,
+               unit_price = excluded.unit_price,
+               stock_level = excluded.stock_level""",
+        _records(dim),
+    )
+    return _key_map(conn, "products", "source_product_id", "product_id")
+
+
+def _key_map(conn: sqlite3.Connection, table: str, natural: str, surrogate: str) -> pd.Series:
+    columns = f"{quote_identifier(natural)}, {quote_identifier(surrogate)}"
+    rows = conn.execute(f"SELECT {columns} FROM {quote_identifier(table)}").fetchall()  # noqa: S608 - quoted identifiers only
+    return pd.Series(dict(rows), dtype="Int64")
+
+
+def load_sales(
+    conn: sqlite3.Connection,
+    sales: pd.DataFrame,
+    sale_dates: pd.Series,
+    customer_keys: pd.Series,
+    product_keys: pd.Series,
+) -> int:
+    """Make the fact match the prepared sales, keyed by transactionid.
+
+    Rows are upserted with surrogate foreign keys, and facts whose
+    transactionid is no longer in the prepared file are deleted.
+    """
+    fact = pd.DataFrame(
+        {
+            "sale_id": sales["transactionid"],
+            "date_id": date_ids(sale_dates),
+            "customer_id": sales["customerid"].map(customer_keys),
+            "product_id": sales["productid"].map(product_keys),
+            "store_id": pd.to_numeric(sales["storeid"], errors="coerce"),
+            "campaign_id": pd.to_numeric(sales["campaignid"], errors="coerce"),
+            "sales_amount": pd.to_numeric(sales["saleamount"], errors="coerce"),
+            "discount_rate": pd.to_numeric(sales["discountpercent"], errors="coerce"),
+            "payment_method": sales["paymenttype"],
+        }
+    )
+    unmatched = int(fact["customer_id"].isna().sum() + fact["product_id"].isna().sum())
+    if unmatched:
+        logger.warning(f"{unmatched} fact foreign keys have no dimension row (stored as NULL)")
+
+    conn.executemany(
+        """INSERT INTO sales (sale_id, date_id, customer_id, product_id, store_id,
+                              campaign_id, sales_amount, discount_rate, payment_method)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(sale_id) DO UPDATE SET
+               date_id = excluded.date_id,
+               customer_id = excluded.customer_id,
+               product_id = excluded.product_id,
+               store_id = excluded.store_id,
+               campaign_id = excluded.campaign_id,
+               sales_amount = excluded.sales_amount,
+               discount_rate = excluded.discount_rate,
+               payment_method = excluded.payment_method""",
+        _records(fact),
+    )
+
+    # Drop facts whose transaction left the prepared file
+    conn.execute("CREATE TEMP TABLE current_sales (sale_id INTEGER PRIMARY KEY)")
+    try:
+        conn.executemany(
+            "INSERT OR IGNORE INTO current_sales VALUES (?)", _records(fact[["sale_id"]])
+        )
+        stale = conn.execute(
+            "DELETE FROM sales WHERE sale_id NOT IN (SELECT sale_id FROM current_sales)"
+        ).rowcount
+    finally:
+        conn.execute("DROP TABLE temp.current_sales")
+    if stale:
+        logger.info(f"Deleted {stale} facts no longer in the prepared sales")
+    return len(fact)
+
+
+def build_star_schema(
+    db_path: pathlib.Path = DB_PATH, prepared_dir: pathlib.Path = PREPARED_DATA_DIR
+) -> None:
+    """Apply the DDL and (re)load every dimension and the fact in one transaction."""
+    customers = read_prepared(prepared_dir / "customers_prepared.csv")
+    products = read_prepared(prepared_dir / "products_prepared.csv")
+    sales = read_prepared(prepared_dir / "sales_prepared.csv")
+    sale_dates = parse_prepared_dates(sales["saledate"])
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # Enforce the REFERENCES clauses in the DDL (off by default in SQLite)
+        conn.execute("PRAGMA foreign_keys = ON")
+        apply_schema(conn)
+        with conn:
+            customer_keys = load_customers(conn, customers)
+            products_keys = load_products(conn, products)
+            dates = build_dates(sale_dates.dropna())
+            # Upsert, so rows from before day/week/weekday existed get them too
+            columns = [quote_identifier(col) for col in CALENDAR_COLUMNS]
+            conn.executemany(
+                f"INSERT INTO dates ({', '.join(columns)}) "  # noqa: S608 - quoted identifiers, bound values
+                f"VALUES ({', '.join('?' for _ in columns)}) "
+                "ON CONFLICT(date_id) DO UPDATE SET "
+                + ", ".join(f"{col} = excluded.{col}" for col in columns[1:]),
+                _records(dates[list(CALENDAR_COLUMNS)]),
+            )
+            rows = load_sales(conn, sales, sale_dates, customer_keys, products_keys)
+        conn.execute("ANALYZE")
+        logger.info(
+            f"Star schema loaded: {len(customer_keys)} customers, {len(products_keys)} products, "
+            f"{len(dates)} dates, {rows} sales"
+        )
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    """Build the star schema in the warehouse database."""
+    init_logger()
+    build_star_schema()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Generate raw customers/products/sales CSVs at any scale, with realistic dirt.
+
+Scale 1 matches the shipped files (200 customers, 100 products, 2,000
+sales); scale 100 and 10,000 multiply every table. Columns, header
+spellings (including the repeated ``Category`` header) and value formats
+follow data/raw, and the same kinds of dirt are injected:
+
+- exact duplicate rows,
+- missing values,
+- negative sale amounts and loyalty points,
+- messy casing and padding in region, contact and payment text,
+- impossible dates (``2023-13-01``),
+- sales pointing at customers or products that do not exist.
+
+Sales are generated and written in chunks, so memory stays bounded even at
+10,000x (20 million sales).
+
+Module Information:
+    - Filename: synthetic_data.py
+    - Module: synthetic_data
+    - Location: src/analytics_project/
+
+Run with:
+    uv run python -m analytics_project.synthetic_data --scale 100 --out data/synthetic
+"""
+
+import argparse
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from .utils_logger import init_logger, logger
+
+# Rows per table at scale 1 (the size of the shipped raw files)
+BASE_ROWS: dict[str, int] = {"customers": 200, "products": 100, "sales": 2000}
+
+# Fraction of rows receiving each kind of dirt
+DIRT_RATES: dict[str, float] = {
+    "duplicate": 0.001,
+    "null": 0.001,
+    "negative": 0.0005,
+    "messy_text": 0.01,
+    "bad_date": 0.0005,
+    "orphan": 0.0005,
+}
+
+SALES_CHUNK_ROWS = 1_000_000
+
+FIRST_NAMES = [
+    "Robert", "John", "Mark", "Jessica", "Karina", "Kenneth", "Michelle", "Brittany", "Stephanie",
+    "David", "Maria", "James", "Linda", "Carlos", "Aisha", "Wei",
+]  # fmt: skip
+LAST_NAMES = [
+    "Gomez", "Silva", "Marshall", "Mora", "Jones", "Graves", "Brewer", "Johnson", "Garrison",
+    "Smith", "Nguyen", "Patel", "Brown", "Garcia", "Kim", "Okafor",
+]  # fmt: skip
+REGIONS = ["North", "South", "East", "West", "Central", "South-West"]
+CONTACTS = ["Email", "Text", "Phone"]
+CATEGORIES = ["Home", "Clothing", "Office", "Electronics"]
+PRODUCT_WORDS = ["Be", "Family", "Training", "Where", "Huge", "Class", "Prime", "Basic", "Pro"]
+SUPPLIERS = ["SupplierA", "SupplierB", "LocalVendor"]
+STORES = [401, 402, 403, 404]
+PAYMENT_TYPES = ["Cash", "Card", "Venmo"]
+SALE_DATES = pd.date_range("2024-01-01", "2025-12-31", freq="D")
+
+
+def _raw_dates(dates: pd.DatetimeIndex) -> np.ndarray:
+    """Format dates the way the raw files do: 5/4/2025 (no zero padding)."""
+    month = dates.month.astype(str)
+    day = dates.day.astype(str)
+    year = dates.year.astype(str)
+    return (month + "/" + day + "/" + year).to_numpy(dtype=object)
+
+
+def _pick(rng: np.random.Generator, n: int, rate: float) -> np.ndarray:
+    """Return the positions of a random ``rate`` share of ``n`` rows."""
+    return np.flatnonzero(rng.random(n) < rate)
+
+
+def _messy(rng: np.random.Generator, values: np.ndarray) -> np.ndarray:
+    """Lower/upper-case or pad a share of text values."""
+    values = values.astype(object)
+    idx = _pick(rng, len(values), DIRT_RATES["messy_text"])
+    styles = rng.integers(3, size=len(idx))
+    for style, func in enumerate((str.lower, str.upper, lambda v: f"  {v} ")):
+        chosen = idx[styles == style]
+        values[chosen] = [func(v) for v in values[chosen]]
+    return values
+
+
+def _with_nulls(rng: np.random.Generator, df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    for col in columns:
+        idx = _pick(rng, len(df), DIRT_RATES["null"])
+        if len(idx):
+            if pd.api.types.is_integer_dtype(df[col]):
+                df[col] = df[col].astype("Int64")  # written as 86, not 86.0
+            df.loc[df.index[idx], col] = None
+    return df
+
+
+def _with_duplicates(rng: np.random.Generator, df: pd.DataFrame) -> pd.DataFrame:
+    idx = _pick(rng, len(df), DIRT_RATES["duplicate"])
+    return pd.concat([df, df.iloc[idx]], ignore_index=True) if len(idx) else df
+
+
+def generate_customers(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    """Return ``n`` raw customer rows with nulls, duplicates and messy text."""
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    enrolled = pd.DatetimeIndex(rng.choice(pd.date_range("2019-01-01", "2025-04-30"), n))
+    points = rng.integers(0, 1000, n)
+    points[_pick(rng, n, DIRT_RATES["negative"])] *= -1
+    df = pd.DataFrame(
+        {
+            "CustomerID": np.arange(1000, 1000 + n),
+            "FirstName": np.char.add(np.char.add(first, " "), last),
+            "Region": _messy(rng, rng.choice(REGIONS, n)),
+            "DateEnrolled": _raw_dates(enrolled),
+            "LoyaltyPoints": points,
+            "PreferredContact": _messy(rng, rng.choice(CONTACTS, n)),
+        }
+    )
+    return _with_duplicates(rng, _with_nulls(rng, df, ["LoyaltyPoints", "PreferredContact"]))
+
+
+def generate_products(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    """Return ``n`` raw product rows, with the Category header repeated for suppliers."""
+    category = rng.choice(CATEGORIES, n)
+    names = np.char.add(np.char.add(category, "-"), rng.choice(PRODUCT_WORDS, n))
+    df = pd.DataFrame(
+        {
+            "ProductID": np.arange(2000, 2000 + n),
+            "ProductName": names,
+            # Products are not always filed under the category in their name
+            "Category": rng.choice(CATEGORIES, n),
+            "UnitPrice": rng.uniform(10, 1000, n).round(2),
+            "StockQuantity": rng.integers(0, 100, n),
+            "Category.1": _messy(rng, rng.choice(SUPPLIERS, n)),
+        }
+    )
+    df = _with_duplicates(rng, _with_nulls(rng, df, ["StockQuantity"]))
+    # The raw file repeats the Category header for the supplier column
+    return df.rename(columns={"Category.1": "Category"})
+
+
+def generate_sales(
+    rng: np.random.Generator, n: int, n_customers: int, n_products: int, first_id: int = 1
+) -> pd.DataFrame:
+    """Return ``n`` raw sales rows with orphan keys and bad dates mixed in."""
+    customers = 1000 + rng.integers(0, n_customers, n)
+    products = 2000 + rng.integers(0, n_products, n)
+    customers[_pick(rng, n, DIRT_RATES["orphan"])] = 9999 + n_customers
+    products[_pick(rng, n, DIRT_RATES["orphan"])] = 9999 + n_products
+    dates = _raw_dates(pd.DatetimeIndex(rng.choice(SALE_DATES, n)))
+    dates[_pick(rng, n, DIRT_RATES["bad_date"])] = "2023-13-01"
+    # Right-skewed amounts like the shipped file (median ~730, mean ~1000)
+    amounts = rng.lognormal(np.log(730), 0.8, n).round(2)
+    amounts[_pick(rng, n, DIRT_RATES["negative"])] *= -0.05
+    df = pd.DataFrame(
+        {
+            "TransactionID": np.arange(first_id, first_id + n),
+            "SaleDate": dates,
+            "CustomerID": customers,
+            "ProductID": products,
+            "StoreID": rng.choice(STORES, n),
+            "CampaignID": rng.integers(0, 4, n),
+            "SaleAmount": amounts,
+            "DiscountPercent": rng.integers(0, 51, n),
+            "PaymentType": _messy(rng, rng.choice(PAYMENT_TYPES, n)),
+        }
+    )
+    df = _with_nulls(rng, df, ["CampaignID", "SaleAmount", "DiscountPercent", "PaymentType"])
+    return _with_duplicates(rng, df)
+
+
+def generate(
+    scale: float, out_dir: pathlib.Path, seed: int = 0, chunk_rows: int = SALES_CHUNK_ROWS
+) -> dict[str, int]:
+    """Write customers_data.csv, products_data.csv and sales_data.csv to ``out_dir``.
+
+    Returns the number of rows written per file (duplicates included).
+    """
+    rng = np.random.default_rng(seed)
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {name: max(1, round(rows * scale)) for name, rows in BASE_ROWS.items()}
+
+    customers = generate_customers(rng, sizes["customers"])
+    customers.to_csv(out_dir / "customers_data.csv", index=False)
+    products = generate_products(rng, sizes["products"])
+    products.to_csv(out_dir / "products_data.csv", index=False)
+    written = {"customers": len(customers), "products": len(products), "sales": 0}
+
+    sales_path = out_dir / "sales_data.csv"
+    for start in range(0, sizes["sales"], chunk_rows):
+        n = min(chunk_rows, sizes["sales"] - start)
+        chunk = generate_sales(rng, n, sizes["customers"], sizes["products"], first_id=start + 1)
+        chunk.to_csv(sales_path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+        written["sales"] += len(chunk)
+
+    logger.info(f"Generated scale {scale:g} data in {out_dir}: {written}")
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Write one scale of synthetic raw data."""
+    parser = argparse.ArgumentParser(description="Generate synthetic raw data")
+    parser.add_argument("--scale", type=float, default=1, help="Multiple of the shipped row counts")
+    parser.add_argument("--out", type=pathlib.Path, required=True, help="Output folder")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+    init_logger()
+    generate(args.scale, args.out, args.seed)
+
+
+if __name__ == "__main__":
+    main()
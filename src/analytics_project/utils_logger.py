@@ -19,16 +19,79 @@ Professional Applications:
     - Audit trails for regulatory compliance
     - Performance monitoring and optimization
     - Error tracking in data pipelines
+
+Stage Instrumentation:
+    ``timed_stage`` wraps a block (``with timed_stage("x") as stage``) or a
+    function (``@timed_stage("x")``) and records wall time, CPU time, the
+    rise in peak RSS and a row count (set ``stage.rows``, or return an int
+    from the decorated function). A one-line summary goes to the log and a
+    JSON record to metrics.jsonl next to project.log (``ANALYTICS_METRICS_FILE``
+    picks another file; ``off`` disables it). Records share a run id, also
+    across worker processes, so ``log_run_report`` can summarize one run.
+
+    Profiling is opt-in per stage with ``profile=("cpu", "memory")`` or for
+    every stage with ``ANALYTICS_PROFILE=cpu,memory``: ``cpu`` runs cProfile
+    and saves profiles/<stage>-<run id>.prof, ``memory`` runs tracemalloc;
+    the top entries of each are logged.
+
+High-Throughput Logging:
+    ``init_logger(mode="fast")`` (or ``ANALYTICS_LOG_MODE=fast``) is meant
+    for per-chunk and per-batch logging at scale: the console only shows
+    warnings and errors, and the file sink buffers records and writes them
+    in batches (errors are written at once) without tracebacks or rotation.
+    ``mode="json"`` does the same with one compact JSON object per line.
+
+    In hot loops, pass values as arguments (``logger.debug("Chunk {}: {}",
+    i, n)``) rather than f-strings: Loguru only formats the message when a
+    sink accepts the level, so a disabled level costs one method call.
+    ``log_enabled`` guards costlier preparation, and ``log_sampled`` keeps
+    repetitive messages to every n-th or one per time interval.
 """
 
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+import functools
+import io
+import json
+import os
 import pathlib
 import sys
+import threading
+import time
+import weakref
 
 from loguru import logger
 
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
 _is_configured: bool = False
 _log_file_path: pathlib.Path | None = None
 
+LOG_MODE_ENV_VAR = "ANALYTICS_LOG_MODE"
+LOG_MODES: tuple[str, ...] = ("standard", "fast", "json")
+
+# Fast mode: records buffered per file write, and the longest a record waits
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_SECONDS = 1.0
+ERROR_LEVEL_NO = logger.level("ERROR").no
+
+METRICS_ENV_VAR = "ANALYTICS_METRICS_FILE"
+PROFILE_ENV_VAR = "ANALYTICS_PROFILE"
+RUN_ID_ENV_VAR = "ANALYTICS_RUN_ID"
+PROFILE_KINDS: tuple[str, ...] = ("cpu", "memory")
+
+# Entries of a cProfile / tracemalloc report written to the log
+PROFILE_TOP = 15
+
+# Only one cProfile can run at a time, so nested stages are not profiled.
+# Holds the pid of the profiling process: forked workers inherit the value
+# but not the running profiler.
+_profiling_pid: int | None = None
+
 
 def _project_root(start: pathlib.Path | None = None) -> pathlib.Path:
     """Find the project root by walking up until we see a pyproject.toml or .git.
@@ -45,6 +108,97 @@ def _project_root(start: pathlib.Path | None = None) -> pathlib.Path:
 project_root = _project_root()
 
 
+class BatchedFileSink:
+    """Loguru sink that appends buffered records to a file in batches.
+
+    A batch is written once it holds ``batch_size`` records, when a record
+    arrives ``flush_seconds`` after the last write, for any ERROR or worse,
+    and when Loguru stops the sink (on ``logger.remove()`` and at exit).
+    With ``json_lines`` each record is written as a compact JSON object.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_seconds: float = LOG_FLUSH_SECONDS,
+        json_lines: bool = False,
+    ) -> None:
+        """Buffer records for ``path``; the file is opened only to write a batch."""
+        self.path = pathlib.Path(path)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.json_lines = json_lines
+        self._buffer: list[str] = []
+        self._last_write = time.monotonic()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        _batched_sinks.add(self)
+
+    def _render(self, message) -> str:
+        if not self.json_lines:
+            return str(message)
+        record = message.record
+        fields = {
+            "time": record["time"].isoformat(timespec="milliseconds"),
+            "level": record["level"].name,
+            "message": record["message"],
+            "module": record["name"],
+            "line": record["line"],
+        }
+        if record["extra"]:
+            fields["extra"] = record["extra"]
+        if record["exception"] is not None:
+            fields["exception"] = repr(record["exception"].value)
+        return json.dumps(fields, separators=(",", ":"), default=str) + "\n"
+
+    # Named write (not flush) on purpose: Loguru calls flush() after every write
+    def write(self, message) -> None:
+        """Buffer one record, writing the batch when it is due."""
+        line = self._render(message)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent writes the records it buffered
+                self._buffer.clear()
+                self._pid = os.getpid()
+            self._buffer.append(line)
+            if (
+                len(self._buffer) >= self.batch_size
+                or message.record["level"].no >= ERROR_LEVEL_NO
+                or time.monotonic() - self._last_write >= self.flush_seconds
+            ):
+                self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("".join(self._buffer))
+            self._buffer.clear()
+        self._last_write = time.monotonic()
+
+    def stop(self) -> None:
+        """Write out the buffered records."""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._write_buffer()
+
+    drain = stop  # write now but keep accepting records
+
+
+# Live batched sinks, drained by flush_logs()
+_batched_sinks: "weakref.WeakSet[BatchedFileSink]" = weakref.WeakSet()
+
+
+def flush_logs() -> None:
+    """Write out records buffered by fast/json mode sinks.
+
+    Called at the end of every timed stage, since worker processes may exit
+    without running the exit hook that normally writes the last batch.
+    """
+    for sink in list(_batched_sinks):
+        sink.drain()
+
+
 def get_log_file_path() -> pathlib.Path:
     """Return the path to the active log file, or default path if not initialized."""
     if _log_file_path is not None:
@@ -58,6 +212,7 @@ def init_logger(
     *,
     log_dir: str | pathlib.Path = project_root,
     log_file_name: str = "project.log",
+    mode: str | None = None,
 ) -> pathlib.Path:
     """Initialize the logger and return the log file path.
 
@@ -67,14 +222,22 @@ def init_logger(
         level (str): Logging level (e.g., "INFO", "DEBUG").
         log_dir: Directory where the log file will be written.
         log_file_name: File name for the log file.
+        mode: "standard", "fast" or "json" (see the module docstring);
+            defaults to ``ANALYTICS_LOG_MODE`` or "standard".
 
     Returns:
         pathlib.Path: The resolved path to the log file.
+
+    Raises:
+        ValueError: If the mode is unknown.
     """
-    global _is_configured
+    mode = mode or os.environ.get(LOG_MODE_ENV_VAR) or "standard"
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown log mode {mode!r}; expected one of {LOG_MODES}")
+    global _is_configured, _log_file_path
     if _is_configured:
-        # If already configured once for this process
-        return pathlib.Path(log_dir) / log_file_name
+        # If already configured once for this process, keep the first file
+        return get_log_file_path()
 
     # print a visual separator before logs
     print("-----------------------")
@@ -90,19 +253,31 @@ def init_logger(
         fmt = "{time:YYYY-MM-DD HH:mm}:{level:<7} AT {file}:{line}: {message}"
         # Remove any existing Loguru handlers to avoid duplicate output
         logger.remove()
-        logger.add(sys.stderr, level=level, format=fmt)
-        logger.add(
-            log_file,
-            level=level,
-            enqueue=True,
-            backtrace=True,
-            diagnose=False,
-            rotation="10 MB",
-            retention="7 days",
-            encoding="utf-8",
-            format=fmt,
-        )
-        logger.info(f"Logging to file: {log_file.resolve()}")
+        if mode == "standard":
+            logger.add(sys.stderr, level=level, format=fmt)
+            logger.add(
+                log_file,
+                level=level,
+                enqueue=True,
+                backtrace=True,
+                diagnose=False,
+                rotation="10 MB",
+                retention="7 days",
+                encoding="utf-8",
+                format=fmt,
+            )
+        else:
+            console_level = max(logger.level(level).no, logger.level("WARNING").no)
+            logger.add(sys.stderr, level=console_level, format=fmt)
+            logger.add(
+                BatchedFileSink(log_file, json_lines=mode == "json"),
+                level=level,
+                backtrace=False,
+                diagnose=False,
+                colorize=False,
+                format=fmt,
+            )
+        logger.info(f"Logging to file: {log_file.resolve()} ({mode} mode)")
         _is_configured = True
         _log_file_path = log_file  # cache for retrieval
     except Exception as e:
@@ -111,6 +286,275 @@ def init_logger(
     return log_file
 
 
+def log_enabled(level: str) -> bool:
+    """Return True when some sink would accept a message at ``level``."""
+    return logger.level(level).no >= logger._core.min_level  # private; no public API
+
+
+_samples: dict[object, list] = {}  # key -> [calls, suppressed, last emit time]
+
+
+def log_sampled(
+    level: str,
+    message: str,
+    *args,
+    key: object = None,
+    every: int | None = None,
+    seconds: float | None = None,
+    **kwargs,
+) -> bool:
+    """Log a repetitive message only every ``every`` calls or ``seconds`` apart.
+
+    The first call always logs. Calls are grouped by ``key`` (default: the
+    message template), and an emitted message says how many were skipped
+    since the last one. Formatting is lazy as with ``logger.log``. Returns
+    True when the message was emitted.
+    """
+    if not log_enabled(level):
+        return False
+    state = _samples.setdefault(message if key is None else key, [0, 0, -float("inf")])
+    state[0] += 1
+    now = time.monotonic()
+    due = (every is not None and (state[0] - 1) % every == 0) or (
+        seconds is not None and now - state[2] >= seconds
+    )
+    if state[0] > 1 and not due:
+        state[1] += 1
+        return False
+    if state[1]:
+        message = f"{message} ({state[1]} similar messages skipped)"
+    state[1], state[2] = 0, now
+    logger.opt(depth=1).log(level, message, *args, **kwargs)
+    return True
+
+
+def get_metrics_file_path() -> pathlib.Path | None:
+    """Return the JSON metrics file, or None when metrics are switched off."""
+    configured = os.environ.get(METRICS_ENV_VAR, "")
+    if configured.lower() == "off":
+        return None
+    if configured:
+        return pathlib.Path(configured)
+    return get_log_file_path().with_name("metrics.jsonl")
+
+
+def run_id() -> str:
+    """Return this run's id, creating it on first use.
+
+    The id is kept in the environment, so worker processes started
+    afterwards report under the same run.
+    """
+    return os.environ.setdefault(
+        RUN_ID_ENV_VAR, datetime.now(UTC).strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+    )
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024  # bytes vs KiB
+
+
+@dataclass
+class StageMetrics:
+    """Measurements of one timed stage (``rows`` may be set by the caller)."""
+
+    stage: str
+    rows: int | None = None
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta_mb: float | None = None  # how far the stage raised the process peak
+    traced_peak_mb: float | None = None  # tracemalloc peak, when memory profiling
+    profile_file: str | None = None
+    status: str = "ok"
+    run_id: str = field(default_factory=run_id)
+    pid: int = field(default_factory=os.getpid)
+    started_at: str = field(
+        default_factory=lambda: datetime.now(UTC).isoformat(timespec="milliseconds")
+    )
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        """Throughput of the stage, or None without a row count or duration."""
+        if self.rows is None or not self.wall_seconds:
+            return None
+        return self.rows / self.wall_seconds
+
+    def summary(self) -> str:
+        """One log line with the stage's timings, memory and throughput."""
+        parts = [f"{self.wall_seconds:.2f}s wall", f"{self.cpu_seconds:.2f}s CPU"]
+        if self.peak_rss_delta_mb is not None:
+            parts.append(f"peak RSS +{self.peak_rss_delta_mb:.1f} MB")
+        if self.traced_peak_mb is not None:
+            parts.append(f"traced peak {self.traced_peak_mb:.1f} MB")
+        if self.rows is not None:
+            parts.append(f"{self.rows:,} rows ({self.rows_per_sec or 0:,.0f} rows/sec)")
+        failed = "" if self.status == "ok" else f" [{self.status}]"
+        return f"Stage {self.stage}{failed}: " + ", ".join(parts)
+
+
+def _profile_kinds(profile: Iterable[str] | str | None) -> set[str]:
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV_VAR, "")
+    if isinstance(profile, str):
+        profile = profile.split(",")
+    kinds = {kind.strip().lower() for kind in profile if kind.strip()}
+    unknown = kinds - set(PROFILE_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown profile kinds {sorted(unknown)}; expected {PROFILE_KINDS}")
+    return kinds
+
+
+def _write_metrics(metrics: StageMetrics) -> None:
+    path = get_metrics_file_path()
+    if path is None:
+        return
+    record = {**asdict(metrics), "rows_per_sec": metrics.rows_per_sec}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One short append per record, so concurrent workers do not interleave lines
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write stage metrics to {path}: {e}")
+
+
+class timed_stage:  # noqa: N801 - used like a function, as a context manager or decorator
+    """Time a pipeline stage; see the module docstring.
+
+    Args:
+        name: Stage name used in the log and metrics records.
+        profile: Profilers to run ("cpu", "memory"); defaults to the
+            ``ANALYTICS_PROFILE`` environment variable.
+    """
+
+    def __init__(self, name: str, profile: Iterable[str] | str | None = None) -> None:
+        """Set up the stage; nothing is measured until it is entered."""
+        self.name = name
+        self.profile = profile
+        self.metrics: StageMetrics | None = None
+
+    def __call__(self, func: Callable) -> Callable:
+        """Time every call of ``func``; an int result is taken as its row count."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed_stage(self.name, self.profile) as stage:
+                result = func(*args, **kwargs)
+                if stage.rows is None and isinstance(result, int) and not isinstance(result, bool):
+                    stage.rows = result
+                return result
+
+        return wrapper
+
+    def __enter__(self) -> StageMetrics:
+        """Start the clocks and profilers; returns the metrics to fill in."""
+        global _profiling_pid
+        self.metrics = StageMetrics(self.name)
+        self._kinds = kinds = _profile_kinds(self.profile)
+        self._profiler = None
+        self._tracing = False
+        if "cpu" in kinds and _profiling_pid != os.getpid():
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            _profiling_pid = os.getpid()
+        if "memory" in kinds:
+            import tracemalloc
+
+            # An enclosing stage may already be tracing; leave it running then
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        self._rss_before = _peak_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # A profiler inherited from a forking parent is running; the
+                # pid stays set, so nested stages do not retry
+                logger.debug(f"Another profiler is active; not profiling {self.name}")
+                self._profiler = None
+        return self.metrics
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Stop measuring, then log and record the metrics."""
+        global _profiling_pid
+        if self._profiler is not None:
+            self._profiler.disable()
+        m = self.metrics
+        m.wall_seconds = time.perf_counter() - self._wall_start
+        m.cpu_seconds = time.process_time() - self._cpu_start
+        rss_after = _peak_rss_mb()
+        if rss_after is not None:
+            m.peak_rss_delta_mb = rss_after - self._rss_before
+        if exc_type is not None:
+            m.status = exc_type.__name__
+
+        if self._profiler is not None:
+            _profiling_pid = None
+            m.profile_file = str(self._save_cpu_profile())
+        if "memory" in self._kinds:
+            self._report_memory()
+
+        (logger.info if m.status == "ok" else logger.error)(m.summary())
+        _write_metrics(m)
+        flush_logs()
+
+    def _save_cpu_profile(self) -> pathlib.Path:
+        import pstats
+
+        out = get_log_file_path().with_name("profiles") / f"{self.name}-{self.metrics.run_id}.prof"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        self._profiler.dump_stats(out)
+        text = io.StringIO()
+        pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        logger.info(f"CPU profile of {self.name} saved to {out}\n{text.getvalue()}")
+        return out
+
+    def _report_memory(self) -> None:
+        import tracemalloc
+
+        self.metrics.traced_peak_mb = tracemalloc.get_traced_memory()[1] / 1024**2
+        top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]
+        lines = "\n".join(f"  {stat}" for stat in top)
+        logger.info(f"Largest live allocations at the end of {self.name}:\n{lines}")
+        if self._tracing:
+            tracemalloc.stop()
+
+
+def read_metrics(run: str | None = None, path: pathlib.Path | None = None) -> list[dict]:
+    """Return the metrics records of one run (default: this process's run)."""
+    path = path or get_metrics_file_path()
+    if path is None or not path.exists():
+        return []
+    wanted = run or run_id()
+    with path.open(encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if r["run_id"] == wanted]
+
+
+def log_run_report(run: str | None = None) -> list[dict]:
+    """Log one line per stage recorded for a run, slowest first."""
+    records = sorted(read_metrics(run), key=lambda r: r["wall_seconds"], reverse=True)
+    if records:
+        logger.info(f"Performance report for run {records[0]['run_id']}:")
+    for r in records:
+        rows = "" if r["rows"] is None else f"{r['rows']:>12,} rows"
+        peak = r["peak_rss_delta_mb"]
+        logger.info(
+            f"  {r['stage']:<32} {r['wall_seconds']:>8.2f}s wall {r['cpu_seconds']:>8.2f}s CPU"
+            + ("" if peak is None else f" {peak:>+8.1f} MB")
+            + f" {rows} {r['status']}"
+        )
+    return records
+
+
 def log_example() -> None:
     """Demonstrate logging behavior with example messages."""
     logger.info("This is an example info message.")
@@ -128,4 +572,19 @@ def main() -> None:
 if __name__ == "__main__":
     main()
 
-__all__ = ["get_log_file_path", "init_logger", "log_example", "logger"]
+__all__ = [
+    "BatchedFileSink",
+    "StageMetrics",
+    "flush_logs",
+    "get_log_file_path",
+    "get_metrics_file_path",
+    "init_logger",
+    "log_enabled",
+    "log_example",
+    "log_run_report",
+    "log_sampled",
+    "logger",
+    "read_metrics",
+    "run_id",
+    "timed_stage",
+]
@@ -0,0 +1,28 @@
+"""Shared test fixtures.
+
+Module Information:
+    - Filename: conftest.py
+    - Module: conftest
+    - Location: tests/
+
+Every test logs to its own temporary folder with the metrics file switched
+off, so running the suite leaves project.log and metrics.jsonl untouched.
+"""
+
+import sys
+
+import pytest
+
+from analytics_project import utils_logger
+
+
+@pytest.fixture(autouse=True)
+def isolated_logger(tmp_path, monkeypatch):
+    """Send logs to a temporary log_dir and switch off stage metrics."""
+    monkeypatch.setenv(utils_logger.METRICS_ENV_VAR, "off")
+    monkeypatch.setattr(utils_logger, "_is_configured", False)
+    monkeypatch.setattr(utils_logger, "_log_file_path", None)
+    log_file = utils_logger.init_logger(log_dir=tmp_path / "logs")
+    yield log_file
+    utils_logger.logger.remove()
+    utils_logger.logger.add(sys.stderr)
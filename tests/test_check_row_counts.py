@@ -0,0 +1,31 @@
+"""Test the byte-scanning CSV row counter.
+
+Module Information:
+    - Filename: test_check_row_counts.py
+    - Module: test_check_row_counts
+    - Location: tests/
+
+Counts must match pd.read_csv for quoted newlines, escaped quotes, blank
+lines, CRLF endings and a missing final newline, including when records
+straddle scan blocks.
+"""
+
+import pandas as pd
+
+from analytics_project.check_row_counts import _scan_csv, profile_file
+
+
+def test_row_count_matches_pandas(tmp_path):
+    path = tmp_path / "tricky.csv"
+    path.write_bytes(
+        b'id,note\r\n1,"two\nlines"\r\n\r\n2,"say ""hi""\n, again"\n\n3,plain\n4,"\r\n"\n5,last'
+    )
+    expected = len(pd.read_csv(path))
+
+    for block_bytes in (1, 2, 3, 7, 1 << 20):
+        assert _scan_csv(path, block_bytes=block_bytes)[0] == expected
+
+    profile = profile_file(path, nulls=True)
+    assert profile.rows == expected == 5
+    assert profile.size_bytes == path.stat().st_size
+    assert profile.nulls == {"id": 0, "note": 0}
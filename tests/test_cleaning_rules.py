@@ -0,0 +1,60 @@
+"""Test the cleaning-rules engine.
+
+Module Information:
+    - Filename: test_cleaning_rules.py
+    - Module: test_cleaning_rules
+    - Location: tests/
+
+Rules must keep their sequential meaning inside the single pass, invalid
+rule lists must be rejected when compiled, and a rule naming a missing
+column must fail instead of being skipped.
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project.cleaning_rules import Dedup, Fill, Normalize, Range, compile_rules
+from analytics_project.data_preparation.prepare_products_data import PRODUCT_PLAN
+from analytics_project.schemas import SCHEMAS
+
+
+def test_rules_run_in_order():
+    df = pd.DataFrame(
+        {"amount": [-50.0, 10.0, 30.0, None, 10.0], "name": [" a", "b ", "c", "d", "b "]}
+    )
+    plan = compile_rules(
+        [
+            Dedup(),
+            Range("amount", min=0),  # a missing amount fails too, so nothing is left to fill
+            Fill("amount", strategy="median"),
+            Normalize("name", ("strip",)),
+            Normalize("name", ("upper",)),
+        ]
+    )
+
+    cleaned, removed = plan.run(df)
+    assert cleaned["amount"].tolist() == [10.0, 30.0]
+    assert cleaned["name"].tolist() == ["B", "C"]
+    assert removed == {"duplicates": 1, "failing amount >= 0": 2}
+    assert plan.rules[-1] == Normalize("name", ("strip", "upper"))
+
+
+def test_fill_before_range_keeps_filled_rows():
+    df = pd.DataFrame({"amount": [-50.0, 20.0, 30.0, None]})
+    plan = compile_rules([Fill("amount", strategy="median"), Range("amount", min=0)])
+
+    cleaned, _ = plan.run(df)
+    assert cleaned["amount"].tolist() == [20.0, 30.0, 20.0]
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError, match="Dedup rules must come before Range"):
+        compile_rules([Range("amount", min=0), Dedup()])
+    with pytest.raises(ValueError, match="Unknown text steps"):
+        compile_rules([Normalize("name", ("shout",))])
+    with pytest.raises(KeyError, match="price"):
+        compile_rules([Fill("price", 0)]).run(pd.DataFrame({"unitprice": [1.0]}))
+
+
+def test_product_rules_name_registered_columns():
+    assert PRODUCT_PLAN.columns <= set(SCHEMAS["products"].columns)
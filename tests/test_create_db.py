@@ -0,0 +1,61 @@
+"""Test importing partitioned prepared files into project.db.
+
+Module Information:
+    - Filename: test_create_db.py
+    - Module: test_create_db
+    - Location: tests/
+
+Partitions of one dataset must land in a single typed table keyed by its
+natural key, whether they are parsed inline or in worker processes.
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analytics_project.create_db import find_files, ingest
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_partitions_load_into_one_typed_table(tmp_path, workers):
+    for part in range(3):
+        pd.DataFrame(
+            {
+                "transactionid": [part * 2 + 1, part * 2 + 2],
+                "saleamount": [10.5, 20.0],
+                "order": ["a", "b"],
+            }
+        ).to_csv(tmp_path / f"sales_prepared_{part:03d}.csv", index=False)
+    pd.DataFrame({"productid": [1]}).to_csv(tmp_path / "products_prepared.csv", index=False)
+
+    tables = find_files(tmp_path, ["sales_prepared_*.csv"])
+    assert list(tables) == ["sales_prepared"] and len(tables["sales_prepared"]) == 3
+
+    db = tmp_path / "project.db"
+    assert ingest(tables, db, workers) == {"sales_prepared": 6}
+    with sqlite3.connect(db) as conn:
+        info = {row[1]: (row[2], row[5]) for row in conn.execute("PRAGMA table_info(sales_prepared)")}
+        count = conn.execute("SELECT COUNT(*) FROM sales_prepared").fetchone()[0]
+    assert info == {
+        "transactionid": ("INTEGER", 1),
+        "saleamount": ("REAL", 0),
+        "order_col": ("TEXT", 0),
+    }
+    assert count == 6
+
+
+def test_repeated_keys_are_skipped_or_rejected(tmp_path):
+    pd.DataFrame({"customerid": [1001, 1005, 1005], "name": ["a", "b", "c"]}).to_csv(
+        tmp_path / "customers_prepared.csv", index=False
+    )
+    tables = find_files(tmp_path)
+    db = tmp_path / "project.db"
+
+    assert ingest(tables, db, workers=1) == {"customers_prepared": 2}
+    with sqlite3.connect(db) as conn:
+        kept = conn.execute("SELECT name FROM customers_prepared WHERE customerid = 1005")
+        assert kept.fetchall() == [("b",)]
+
+    with pytest.raises(ValueError, match=r"customerid repeated: \[1005\]"):
+        ingest(tables, db, workers=1, strict=True)
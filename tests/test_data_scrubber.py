@@ -0,0 +1,41 @@
+"""Test the generic frame scrubber.
+
+Module Information:
+    - Filename: test_data_scrubber.py
+    - Module: test_data_scrubber
+    - Location: tests/
+
+Text and categorical columns are stripped and filled, every other column
+keeps its dtype and nulls, and rows that only differed by whitespace
+collapse into one.
+"""
+
+import pandas as pd
+
+from analytics_project.data_scrubber import clean_dataframe
+
+
+def test_clean_keeps_dtypes():
+    raw = pd.DataFrame(
+        {
+            "Name": pd.Series([" Ann ", "Ann", None], dtype="string"),
+            "Region": pd.Series(["East ", "East", None], dtype="category"),
+            "Visits": pd.Series([1, 1, None], dtype="Int16"),
+            "Spend": [10.5, 10.5, None],
+            "Member": [True, True, False],
+            "Joined": pd.to_datetime(["2024-01-02", "2024-01-02", None]),
+        }
+    )
+    before = raw.copy()
+
+    cleaned = clean_dataframe(raw)
+    assert list(cleaned.columns) == ["name", "region", "visits", "spend", "member", "joined"]
+    # Categories change when values are stripped, but the column stays categorical
+    assert isinstance(cleaned["region"].dtype, pd.CategoricalDtype)
+    kept = ["name", "visits", "spend", "member", "joined"]
+    assert list(cleaned[kept].dtypes) == list(raw.dtypes.drop("Region"))
+    assert cleaned["name"].tolist() == ["Ann", "Unknown"]
+    assert cleaned["region"].tolist() == ["East", "Unknown"]
+    assert cleaned["visits"].isna().tolist() == [False, True]
+    assert cleaned["joined"].isna().tolist() == [False, True]
+    pd.testing.assert_frame_equal(raw, before)
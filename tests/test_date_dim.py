@@ -0,0 +1,35 @@
+"""Test integer date keys and the calendar dimension.
+
+Module Information:
+    - Filename: test_date_dim.py
+    - Module: test_date_dim
+    - Location: tests/
+
+Dates parsed once per distinct value must match pd.to_datetime, and the
+calendar must carry ISO week and weekday across a year boundary.
+"""
+
+import pandas as pd
+
+from analytics_project.date_dim import add_date_ids, build_calendar
+from analytics_project.schemas import RAW_DATE_FORMAT, to_datetime_cached
+
+
+def test_cached_parse_and_date_ids():
+    raw = pd.Series(["5/4/2025", None, "2023-13-01", "12/31/2024", "5/4/2025"])
+    parsed = to_datetime_cached(raw, RAW_DATE_FORMAT)
+    expected = pd.to_datetime(raw, format=RAW_DATE_FORMAT, errors="coerce")
+    # Same values and the same resolution, whichever one this pandas picks
+    pd.testing.assert_series_equal(parsed, expected)
+
+    df = add_date_ids(pd.DataFrame({"transactionid": range(5), "saledate": parsed}), "sales")
+    assert list(df.columns) == ["transactionid", "saledate", "date_id"]
+    assert df["date_id"].tolist() == [20250504, pd.NA, pd.NA, 20241231, 20250504]
+
+
+def test_calendar_spans_year_boundary():
+    calendar = build_calendar(20241230, 20250105)
+    assert calendar["date_id"].tolist() == [20241230, 20241231, *range(20250101, 20250106)]
+    # 2024-12-30 is the Monday of ISO week 1 of 2025
+    assert calendar.loc[0, ["week", "weekday", "quarter", "year"]].tolist() == [1, 1, 4, 2024]
+    assert calendar["weekday"].tolist() == [1, 2, 3, 4, 5, 6, 7]
@@ -0,0 +1,45 @@
+"""Test dense dimension lookups and their memory-mapped .npy bundle.
+
+Module Information:
+    - Filename: test_dim_lookup.py
+    - Module: test_dim_lookup
+    - Location: tests/
+
+Enriching through a saved, memory-mapped lookup must match a left merge
+(last row wins for a repeated key; unknown and missing keys get NaN).
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics_project.dim_lookup import DimensionLookup
+
+
+def test_enrich_matches_merge_after_round_trip(tmp_path):
+    customers = pd.DataFrame(
+        {
+            "customerid": [1000, 1001, 1003, 1001],
+            "region": ["East", "West", None, "North"],
+            "loyaltypoints": [10.0, 20.0, 30.0, 25.0],
+        }
+    )
+    lookup = DimensionLookup.from_frame(customers, "customerid", ("region", "loyaltypoints"))
+    loaded = DimensionLookup.load(lookup.save(tmp_path / "customers"))
+    assert isinstance(loaded.codes["region"], np.memmap)
+
+    sales = pd.Series([1001, 1000, 1002, 9999, None, 1003], index=list("abcdef"))
+    enriched = loaded.enrich(sales)
+    expected = pd.merge(
+        sales.rename("customerid").to_frame(),
+        customers.drop_duplicates("customerid", keep="last"),
+        on="customerid",
+        how="left",
+    )
+    assert list(enriched.index) == list("abcdef")
+    # Compare as string/float so None and NaN are both just missing
+    for column, dtype in (("region", "string"), ("loyaltypoints", "float64")):
+        pd.testing.assert_series_equal(
+            enriched[column].astype(dtype).reset_index(drop=True),
+            expected[column].astype(dtype),
+            check_dtype=False,
+        )
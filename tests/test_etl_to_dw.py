@@ -0,0 +1,136 @@
+"""Test the warehouse loaders in etl_to_dw.
+
+Module Information:
+    - Filename: test_etl_to_dw.py
+    - Module: test_etl_to_dw
+    - Location: tests/
+
+Loading the same prepared files twice must not grow the warehouse, and a
+failed load must surface its error instead of printing it.
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analytics_project import etl_to_dw
+from analytics_project.prepared_io import write_prepared
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    prepared = tmp_path / "prepared"
+    prepared.mkdir()
+    pd.DataFrame({"customerid": [1001, 1002], "region": ["East", "West"]}).to_csv(
+        prepared / "customers_prepared.csv", index=False
+    )
+    pd.DataFrame({"productid": [101, 102], "category.1": ["Acme", "Zenith"]}).to_csv(
+        prepared / "products_prepared.csv", index=False
+    )
+    pd.DataFrame({"date_id": [20240101, 20240102], "year": [2024, 2024]}).to_csv(
+        prepared / "dates_prepared.csv", index=False
+    )
+    pd.DataFrame(
+        {
+            "transactionid": [1, 2, 3],
+            "customerid": [1001, 1002, 1001],
+            "saleamount": [5.0, 7.5, 1.0],
+        }
+    ).to_csv(prepared / "sales_prepared.csv", index=False)
+
+    monkeypatch.setattr(etl_to_dw, "PREPARED_DATA_DIR", prepared)
+    monkeypatch.setattr(etl_to_dw, "DB_PATH", tmp_path / "warehouse.db")
+    return tmp_path
+
+
+def _counts(db):
+    tables = ("dim_customer", "dim_product", "dim_date", "fact_sales")
+    with sqlite3.connect(db) as conn:
+        return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables}
+
+
+def test_incremental_load_is_idempotent(warehouse):
+    assert etl_to_dw.load_data_to_db_incremental() == 9
+    first = _counts(etl_to_dw.DB_PATH)
+    assert first == {"dim_customer": 2, "dim_product": 2, "dim_date": 2, "fact_sales": 3}
+
+    assert etl_to_dw.load_data_to_db_incremental() == 0
+    (etl_to_dw.PREPARED_DATA_DIR / "sales_prepared.csv").touch()
+    with open(etl_to_dw.PREPARED_DATA_DIR / "customers_prepared.csv", "a") as f:
+        f.write("1001,East\n")  # same row again: new hash, nothing to change
+    assert etl_to_dw.load_data_to_db_incremental() == 0
+    assert _counts(etl_to_dw.DB_PATH) == first
+
+
+def test_incremental_load_without_new_facts(warehouse):
+    with sqlite3.connect(etl_to_dw.DB_PATH) as conn:
+        etl_to_dw.ensure_watermark_table(conn)
+        etl_to_dw.set_watermark(conn, "fact_sales", 10, "stale")
+
+    etl_to_dw.load_data_to_db_incremental()
+    with sqlite3.connect(etl_to_dw.DB_PATH) as conn:
+        assert etl_to_dw.get_watermark(conn, "fact_sales")[0] == 10
+
+
+def test_failed_bulk_load_raises_and_restores(warehouse):
+    db = etl_to_dw.DB_PATH
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE fact_sales (transactionid INTEGER, customerid INTEGER)")
+        conn.execute("CREATE INDEX ix_fact_sales_customer ON fact_sales (customerid)")
+        conn.execute("INSERT INTO fact_sales VALUES (0, 1000)")
+
+    # saleamount is not a column of the existing fact table, so its insert fails
+    with pytest.raises(sqlite3.OperationalError, match="saleamount"):
+        etl_to_dw.bulk_load_data_to_db()
+
+    with sqlite3.connect(db) as conn:
+        indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        assert indexes == [("ix_fact_sales_customer",)]
+        assert conn.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0] == 1
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        assert tables == [("fact_sales",)]
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_append_and_bulk_after_incremental_do_not_duplicate(warehouse):
+    etl_to_dw.load_data_to_db_incremental()
+    first = _counts(etl_to_dw.DB_PATH)
+    pd.DataFrame({"customerid": [1001, 1002], "region": ["North", "West"]}).to_csv(
+        etl_to_dw.PREPARED_DATA_DIR / "customers_prepared.csv", index=False
+    )
+
+    assert etl_to_dw.load_data_to_db() == 1  # only the changed region
+    assert etl_to_dw.bulk_load_data_to_db() == 0
+    assert _counts(etl_to_dw.DB_PATH) == first
+    with sqlite3.connect(etl_to_dw.DB_PATH) as conn:
+        regions = conn.execute("SELECT region FROM dim_customer ORDER BY customerid").fetchall()
+    assert regions == [("North",), ("West",)]
+
+
+def test_bulk_load_of_an_empty_file_creates_the_table(tmp_path):
+    pytest.importorskip("pyarrow")
+    empty = pd.DataFrame({"date_id": pd.Series(dtype="int64")})
+    source = write_prepared(empty, tmp_path / "dates_prepared", fmt="parquet")
+    with sqlite3.connect(":memory:") as conn:
+        assert etl_to_dw.bulk_load_table(conn, "dim_date", source) == 0
+        assert conn.execute("SELECT COUNT(*) FROM dim_date").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize(
+    "load",
+    [
+        etl_to_dw.load_data_to_db,
+        etl_to_dw.load_data_to_db_incremental,
+        etl_to_dw.bulk_load_data_to_db,
+    ],
+)
+def test_date_ids_with_gaps_load_as_integers(warehouse, load):
+    sales = pd.DataFrame(
+        {"transactionid": [1, 2], "date_id": pd.array([20240101, None], dtype="Int32")}
+    )
+    sales.to_csv(etl_to_dw.PREPARED_DATA_DIR / "sales_prepared.csv", index=False)
+    load()
+    with sqlite3.connect(etl_to_dw.DB_PATH) as conn:
+        types = conn.execute("SELECT typeof(date_id) FROM fact_sales ORDER BY 1").fetchall()
+    assert types == [("integer",), ("null",)]
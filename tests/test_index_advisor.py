@@ -0,0 +1,76 @@
+"""Test the covering-index advisor on a small two-table workload.
+
+Module Information:
+    - Filename: test_index_advisor.py
+    - Module: test_index_advisor
+    - Location: tests/
+
+A join-and-group query that scans the fact table must get a covering index
+on the join key; a dry run must leave the database without it.
+"""
+
+import sqlite3
+
+from analytics_project.index_advisor import PLAN_INDEX, advise, needs_index, propose_indexes
+
+QUERY = """-- Sales per customer
+SELECT c.customerid, c.region, COUNT(s.transactionid) AS num_sales
+FROM sales s
+JOIN customers c ON s.customerid = c.customerid
+GROUP BY c.customerid, c.region
+ORDER BY num_sales DESC;
+"""
+
+
+def _database(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE customers (customerid INTEGER PRIMARY KEY, region TEXT)")
+        conn.execute("CREATE TABLE sales (transactionid INTEGER PRIMARY KEY, customerid INTEGER)")
+        conn.executemany("INSERT INTO customers VALUES (?, ?)", [(i, "North") for i in range(50)])
+        conn.executemany("INSERT INTO sales VALUES (?, ?)", [(i, i % 50) for i in range(2000)])
+    conn.close()
+
+
+def _indexes(path):
+    with sqlite3.connect(path) as conn:
+        names = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")]
+    conn.close()
+    return names
+
+
+def test_advisor_creates_used_covering_indexes(tmp_path):
+    db, queries = tmp_path / "project.db", tmp_path / "queries.sql"
+    _database(db)
+    queries.write_text(QUERY, encoding="utf-8")
+
+    with sqlite3.connect(db) as conn:
+        # The rowid (transactionid) is in every index, so it is not repeated
+        assert propose_indexes(conn, QUERY)["sales"] == ("customerid",)
+    conn.close()
+
+    dry = advise(db, queries, repeat=1, dry_run=True)
+    assert dry.created and _indexes(db) == []
+
+    report = advise(db, queries, repeat=1)
+    (query,) = report.queries
+    assert needs_index(query.plan_before)
+    assert any("COVERING INDEX advisor_sales_customerid" in step for step in query.plan_after)
+    assert sorted(_indexes(db)) == sorted(s.split('"')[1] for s in report.created)
+
+
+def test_cross_join_keyword_is_not_an_alias(tmp_path):
+    db = tmp_path / "project.db"
+    _database(db)
+    sql = (
+        "SELECT customers.region, COUNT(sales.transactionid) FROM sales CROSS JOIN customers "
+        "WHERE sales.customerid = customers.customerid GROUP BY customers.region"
+    )
+    with sqlite3.connect(db) as conn:
+        assert propose_indexes(conn, sql)["sales"] == ("customerid",)
+    conn.close()
+
+
+def test_plan_index_matches_whole_names():
+    step = "SEARCH s USING COVERING INDEX advisor_sales_customerid_region (customerid=?)"
+    # advisor_sales_customerid is a prefix of the index used, not the index itself
+    assert PLAN_INDEX.findall(step) == ["advisor_sales_customerid_region"]
@@ -0,0 +1,71 @@
+"""Test quarantining sales with unknown customer or product keys.
+
+Module Information:
+    - Filename: test_integrity.py
+    - Module: test_integrity
+    - Location: tests/
+
+Quarantined rows must come back once their keys resolve, even when the
+sales stage itself is not rebuilt, and must not be counted twice when it is.
+"""
+
+import pandas as pd
+import pytest
+
+from analytics_project import integrity
+from analytics_project.build_cache import BuildCache
+
+SALES = pd.DataFrame(
+    {
+        "transactionid": [1, 2, 3],
+        "customerid": [1001, 1009, 1002],
+        "productid": [101, 101, 102],
+        "discountpercent": pd.array([5, None, 10], dtype="Int64"),
+    }
+)
+
+
+@pytest.fixture
+def prepared(tmp_path, monkeypatch):
+    folder = tmp_path / "prepared"
+    folder.mkdir()
+    pd.DataFrame({"customerid": [1001, 1002]}).to_csv(
+        folder / "customers_prepared.csv", index=False
+    )
+    pd.DataFrame({"productid": [101, 102]}).to_csv(folder / "products_prepared.csv", index=False)
+    SALES.to_csv(folder / "sales_prepared.csv", index=False)
+    monkeypatch.setattr(integrity, "BuildCache", lambda: BuildCache(tmp_path / "cache"))
+    return folder
+
+
+def _validate(folder):
+    return integrity.validate_sales(folder, folder.parent / "quarantine", chunk_size=2)
+
+
+def test_quarantined_rows_return_when_their_keys_resolve(prepared):
+    report = _validate(prepared)
+    assert (report.rows, report.kept, report.orphans) == (3, 2, {"customerid": 1, "productid": 0})
+    quarantined = pd.read_csv(report.quarantine_file)
+    assert quarantined["transactionid"].tolist() == [2]
+    assert quarantined["orphan_reason"].tolist() == ["customerid"]
+    assert pd.read_csv(prepared / "sales_prepared.csv")["transactionid"].tolist() == [1, 3]
+    assert _validate(prepared).quarantine_file == report.quarantine_file  # cached
+
+    # Only a dimension changes; the stripped sales file is not rebuilt
+    with (prepared / "customers_prepared.csv").open("a") as f:
+        f.write("1009\n")
+    report = _validate(prepared)
+    assert (report.rows, report.kept, report.quarantine_file) == (3, 3, None)
+    sales = pd.read_csv(prepared / "sales_prepared.csv", dtype_backend="numpy_nullable")
+    restored = sales.sort_values("transactionid", ignore_index=True)
+    pd.testing.assert_frame_equal(restored, SALES.convert_dtypes())  # gaps stay integers
+    assert not (prepared.parent / "quarantine").joinpath("sales_orphans.csv").exists()
+
+
+def test_rebuilt_sales_replace_the_quarantine(prepared):
+    _validate(prepared)
+    SALES.to_csv(prepared / "sales_prepared.csv", index=False)  # the sales stage ran again
+
+    report = _validate(prepared)
+    assert (report.rows, report.kept) == (3, 2)
+    assert pd.read_csv(report.quarantine_file)["transactionid"].tolist() == [2]
@@ -0,0 +1,45 @@
+"""Test the in-memory OLAP cube.
+
+Module Information:
+    - Filename: test_olap.py
+    - Module: test_olap
+    - Location: tests/
+
+Cube roll-ups must agree with a pandas group-by over the same filtered rows.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics_project.olap import Cube
+
+
+def test_rollup_matches_pandas_groupby():
+    rng = np.random.default_rng(7)
+    n = 5_000
+    df = pd.DataFrame(
+        {
+            "region": rng.choice(["East", "West", "North", None], n),
+            "category": rng.choice(["Clothing", "Electronics", "Sports"], n),
+            "month": rng.choice(["2025-01", "2025-02", "2025-03"], n),
+            "saleamount": rng.uniform(0, 500, n).round(2),
+            "discount_amount": rng.uniform(0, 100, n).round(2),
+        }
+    )
+    df["region"] = df["region"].fillna("Unknown")
+    cube = Cube.from_frame(df, ["region", "category", "month"])
+
+    result = cube.slice("month", "2025-02").dice(region=["East", "West"]).rollup("region", "category")
+
+    subset = df[(df["month"] == "2025-02") & df["region"].isin(["East", "West"])]
+    expected = (
+        subset.groupby(["region", "category"])
+        .agg(
+            num_sales=("saleamount", "size"),
+            saleamount=("saleamount", "sum"),
+            discount_amount=("discount_amount", "sum"),
+        )
+        .reset_index()
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert cube.rollup()["num_sales"].item() == n
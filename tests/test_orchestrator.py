@@ -0,0 +1,58 @@
+"""Test the pipeline DAG: subgraph selection, retries and failure isolation.
+
+Module Information:
+    - Filename: test_orchestrator.py
+    - Module: test_orchestrator
+    - Location: tests/
+
+Stages here run in the thread pool, so their targets are functions of this
+test module.
+"""
+
+import asyncio
+
+import pytest
+
+from analytics_project import orchestrator
+from analytics_project.orchestrator import STAGES, Stage, critical_path, run_dag, select, validate
+
+ATTEMPTS: dict[str, int] = {}
+
+
+def flaky(name: str, failures: int) -> int:
+    ATTEMPTS[name] = ATTEMPTS.get(name, 0) + 1
+    if ATTEMPTS[name] <= failures:
+        raise RuntimeError(f"{name} attempt {ATTEMPTS[name]}")
+    return ATTEMPTS[name]
+
+
+def test_select_subgraphs():
+    stages = validate(STAGES)
+    assert select(stages, starting=["create_db"]) == ["create_db", "run_queries"]
+    assert select(stages, targets=["rollups"], starting=["integrity"]) == [
+        "integrity", "etl_load", "rollups",
+    ]  # fmt: skip
+    with pytest.raises(ValueError, match="cycle"):
+        validate((Stage("a", "m:f", deps=("b",)), Stage("b", "m:f", deps=("a",))))
+
+
+def test_retries_and_skips(monkeypatch):
+    monkeypatch.setattr(orchestrator, "RETRY_DELAY_SECONDS", 0.0)
+    ATTEMPTS.clear()
+    target = f"{__name__}:flaky"
+    stages = validate(
+        (
+            Stage("source", target, args=("source", 1), executor="thread", retries=1),
+            Stage("broken", target, args=("broken", 5), executor="thread", retries=1),
+            Stage("after_source", target, ("source",), ("after_source", 0), "thread"),
+            Stage("after_broken", target, ("broken",), ("after_broken", 0), "thread"),
+        )
+    )
+    runs = asyncio.run(run_dag(stages, list(stages), workers=2))
+
+    assert {n: r.status for n, r in runs.items()} == {
+        "source": "ok", "broken": "failed", "after_source": "ok", "after_broken": "skipped",
+    }  # fmt: skip
+    assert runs["source"].attempts == 2 and runs["broken"].attempts == 2
+    assert runs["after_source"].start >= runs["source"].end
+    assert critical_path(runs) == ["source", "after_source"]
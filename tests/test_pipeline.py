@@ -0,0 +1,51 @@
+"""Test the parallel preparation runner.
+
+Module Information:
+    - Filename: test_pipeline.py
+    - Module: test_pipeline
+    - Location: tests/
+
+Stages run in a thread pool with a stand-in for run_stage, so no real data
+is prepared: every stage must report its result, and a failing stage must
+fail the run only after the others have finished.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from analytics_project import pipeline
+from analytics_project.pipeline import PREPARE_STAGES, StageResult, run_prepare_stages
+
+CALLS: list[tuple[str, tuple[str, ...]]] = []
+FAILING: set[str] = set()
+
+
+def fake_stage(name: str, args: tuple[str, ...] = ()) -> StageResult:
+    CALLS.append((name, args))
+    if name in FAILING:
+        raise ValueError(f"bad {name} file")
+    return StageResult(name, 0.0, 10)
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    CALLS.clear()
+    FAILING.clear()
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pipeline, "run_stage", fake_stage)
+
+
+def test_results_for_every_stage(fake_stages):
+    results = run_prepare_stages(workers=2)
+    assert sorted(results) == sorted(PREPARE_STAGES)
+    assert {r.rows for r in results.values()} == {10}
+
+
+def test_failure_waits_for_the_other_stages(fake_stages):
+    FAILING.add("products")
+    with pytest.raises(RuntimeError, match="Preparation failed for: products"):
+        run_prepare_stages(workers=1, sales_chunksize=500)
+    assert sorted(CALLS) == [
+        ("customers", ()), ("products", ()), ("sales", ("--chunksize", "500")),
+    ]  # fmt: skip
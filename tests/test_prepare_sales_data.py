@@ -0,0 +1,48 @@
+"""Test the sales preparation script.
+
+Module Information:
+    - Filename: test_prepare_sales_data.py
+    - Module: test_prepare_sales_data
+    - Location: tests/
+
+The streaming mode must produce what the in-memory mode produces, even
+when duplicates sit in different chunks or IDs are dirty; only the median used to fill
+missing amounts may differ, as streaming estimates it with a sketch.
+"""
+
+import pandas as pd
+
+from analytics_project.data_preparation import prepare_sales_data as sales
+
+
+def test_streaming_matches_in_memory(tmp_path, monkeypatch):
+    raw_dir = tmp_path / "raw"
+    prepared_dir = tmp_path / "prepared"
+    raw_dir.mkdir()
+    prepared_dir.mkdir()
+    monkeypatch.setattr(sales, "RAW_DATA_DIR", raw_dir)
+    monkeypatch.setattr(sales, "PREPARED_DATA_DIR", prepared_dir)
+
+    raw = pd.read_csv(sales.PROJECT_ROOT / "data" / "raw" / "sales_data.csv")
+    # Repeat early rows near the end so duplicates span chunks
+    raw = pd.concat([raw, raw.head(25)], ignore_index=True)
+    # IDs that are not numbers or do not fit the registered width
+    raw = raw.astype({"CampaignID": object, "StoreID": object})
+    raw.loc[3, "CampaignID"] = "abc"
+    raw.loc[400, "StoreID"] = 99999
+    raw.to_csv(raw_dir / "sales_data.csv", index=False)
+
+    cleaned = sales.clean_sales_data(sales.read_raw_data("sales_data.csv"))
+    sales.save_prepared_data(cleaned, "in_memory.csv")
+    rows = sales.stream_sales_data("sales_data.csv", "streamed.csv", chunk_size=300)
+
+    expected = pd.read_csv(prepared_dir / "in_memory.csv")
+    streamed = pd.read_csv(prepared_dir / "streamed.csv")
+    assert rows == len(expected)
+    filled = streamed["saleamount"] != expected["saleamount"]
+    assert expected.loc[filled, "saleamount"].nunique() <= 1
+    assert streamed.loc[filled, "saleamount"].nunique() <= 1
+    if filled.any():
+        rank = (expected["saleamount"] < streamed.loc[filled, "saleamount"].iloc[0]).mean()
+        assert abs(rank - 0.5) < 0.02
+    pd.testing.assert_frame_equal(streamed[~filled], expected[~filled])
@@ -0,0 +1,57 @@
+"""Test reading and writing prepared files in every format.
+
+Module Information:
+    - Filename: test_prepared_io.py
+    - Module: test_prepared_io
+    - Location: tests/
+
+A writer that received no chunks must still leave a readable file behind
+(or fail when it does not know the columns), and readers must pick the
+format that was last written, not the newest file.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from analytics_project.prepared_io import (
+    PreparedWriter,
+    count_prepared_rows,
+    list_prepared,
+    read_prepared,
+    resolve_prepared,
+    write_prepared,
+)
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_empty_writer_leaves_readable_file(tmp_path, fmt):
+    path = PreparedWriter(tmp_path / "sales_prepared.csv", fmt, columns=["a", "b"]).close()
+    assert path.suffix == f".{fmt}" and path.stat().st_size > 0
+    assert count_prepared_rows(path) == 0
+    assert list(read_prepared(path).columns) == ["a", "b"]
+
+
+def test_empty_writer_without_columns_fails(tmp_path):
+    writer = PreparedWriter(tmp_path / "sales_prepared.csv", "csv")
+    with pytest.raises(ValueError, match="No rows or columns"):
+        writer.close()
+    assert not list(tmp_path.glob("sales_prepared*"))
+
+
+def test_recorded_format_wins_over_newer_file(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    written = write_prepared(df, tmp_path / "sales_prepared.csv", "parquet")
+    stale = tmp_path / "sales_prepared.csv"
+    pd.DataFrame({"a": [9]}).to_csv(stale, index=False)  # e.g. touched by git checkout
+    os.utime(stale, ns=(written.stat().st_mtime_ns + 10**9,) * 2)
+
+    assert resolve_prepared(stale) == written
+    assert list_prepared(tmp_path) == [written]
+    assert count_prepared_rows(stale) == 3
+
+    (tmp_path / ".sales_prepared.format").unlink()
+    assert resolve_prepared(written) == stale  # no record: newest file
@@ -0,0 +1,87 @@
+"""Test incremental rollup refreshes over a small warehouse.
+
+Module Information:
+    - Filename: test_rollups.py
+    - Module: test_rollups
+    - Location: tests/
+
+Folding new fact rows into the rollups must give the same totals as a
+rebuild from the whole fact table, with discounts summed as amounts.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from analytics_project.rollups import choose_rollup, query_rollup, refresh_rollups
+
+FACT_COLUMNS = (
+    "transactionid", "saledate", "customerid", "productid", "storeid",
+    "saleamount", "discountpercent", "paymenttype",
+)  # fmt: skip
+
+
+def _add_sales(db, rows):
+    with sqlite3.connect(db) as conn:
+        conn.executemany(f"INSERT INTO fact_sales VALUES ({', '.join('?' * 8)})", rows)
+    conn.close()
+
+
+def _by_region(db):
+    with sqlite3.connect(db) as conn:
+        return query_rollup(conn, ["region"])
+
+
+def test_incremental_refresh_matches_rebuild(tmp_path):
+    db = tmp_path / "smart_sales.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute(f"CREATE TABLE fact_sales ({', '.join(FACT_COLUMNS)})")
+        conn.execute("CREATE TABLE dim_customer (customerid, region)")
+        conn.execute("CREATE TABLE dim_product (productid, category)")
+        conn.executemany("INSERT INTO dim_customer VALUES (?, ?)", [(1, "East"), (2, "West")])
+        conn.executemany("INSERT INTO dim_product VALUES (?, ?)", [(10, "Home")])
+        # Left by an older version that summed discount percentages
+        conn.execute(
+            "CREATE TABLE rollup_date_product "
+            "(date, productid, num_sales, total_amount, total_discount)"
+        )
+        conn.execute("INSERT INTO rollup_date_product VALUES ('2025-05-04', 10, 9, 9.0, 60)")
+    conn.close()
+
+    _add_sales(db, [(1, "2025-05-04", 1, 10, 401, 100.0, 10, "Cash")])
+    assert refresh_rollups(db)["rollup_date_region_category"] == 1
+    _add_sales(
+        db,
+        [
+            (2, "2025-05-04", 1, 10, 401, 200.0, 50, "Card"),
+            (3, "2025-06-01", 2, 10, 402, 50.0, 0, "Cash"),
+            (4, "2025-06-01", 9, 10, 402, 10.0, None, "Cash"),  # unknown customer
+        ],
+    )
+    touched = refresh_rollups(db)
+    assert touched["rollup_date_customer"] == 3 and refresh_rollups(db)["rollup_date_customer"] == 0
+
+    incremental = _by_region(db)
+    expected = pd.DataFrame(
+        {
+            "region": ["East", "Unknown", "West"],
+            "num_sales": [2, 1, 1],
+            "total_amount": [300.0, 10.0, 50.0],
+            # 100 * 10% + 200 * 50%; a missing discount adds nothing
+            "discount_amount": [110.0, 0.0, 0.0],
+        }
+    )
+    pd.testing.assert_frame_equal(incremental, expected)
+
+    with sqlite3.connect(db) as conn:
+        by_product = query_rollup(conn, ["productid"])
+        by_month = query_rollup(conn, ["month"], ["num_sales"])
+        counts = dict(conn.execute("SELECT name, row_count FROM rollup_stats"))
+        assert choose_rollup(conn, ["region"]) == "rollup_date_region_category"
+    conn.close()
+    assert counts["rollup_date_customer"] == 3 and counts["rollup_date_product"] == 2
+    assert by_product.values.tolist() == [[10, 4, 360.0, 110.0]]
+    assert by_month.values.tolist() == [["2025-05", 2], ["2025-06", 2]]
+
+    refresh_rollups(db, rebuild=True)
+    pd.testing.assert_frame_equal(_by_region(db), incremental)
@@ -0,0 +1,45 @@
+"""Test the on-disk query result cache.
+
+Module Information:
+    - Filename: test_run_queries.py
+    - Module: test_run_queries
+    - Location: tests/
+
+Pruning must drop entries unused for too long and keep only the most
+recently used ones, so results for old data versions do not pile up; an
+unreadable entry is a miss, not an error.
+"""
+
+import os
+import time
+
+from analytics_project.run_queries import QueryResult, ResultCache
+
+
+def test_prune_keeps_recently_used_entries(tmp_path):
+    cache = ResultCache(tmp_path, max_entries=2, max_age_seconds=3600)
+    now = time.time()
+    for i, sql in enumerate(["SELECT 1", "SELECT 2", "SELECT 3", "SELECT 4"]):
+        cache.put(QueryResult(sql), "v1")
+        # Oldest first; SELECT 1 was last used two hours ago
+        age = 7200 if i == 0 else 30 - i
+        os.utime(cache._path(sql, "v1"), (now - age, now - age))
+    assert cache.get("SELECT 2", "v1") is not None  # a hit counts as a use
+
+    assert cache.prune() == 2
+    assert cache.get("SELECT 1", "v1") is None and cache.get("SELECT 3", "v1") is None
+    assert cache.get("SELECT 2", "v1").sql == "SELECT 2"
+    assert cache.get("SELECT 4", "v1").sql == "SELECT 4"
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put(QueryResult("SELECT 1"), "v1")
+    path = cache._path("SELECT 1", "v1")
+    path.write_bytes(path.read_bytes()[:10])  # truncated by an interrupted copy
+    assert cache.get("SELECT 1", "v1") is None
+
+    path.write_bytes(b"not a pickle")
+    assert cache.get("SELECT 1", "v1") is None
+    cache.put(QueryResult("SELECT 1"), "v1")
+    assert cache.get("SELECT 1", "v1").sql == "SELECT 1"
@@ -0,0 +1,49 @@
+"""Test the raw column type registry.
+
+Module Information:
+    - Filename: test_schemas.py
+    - Module: test_schemas
+    - Location: tests/
+
+Every raw header must be registered, unregistered columns must be reported
+rather than dropped silently, and a dirty ID must not fail the read.
+"""
+
+import pandas as pd
+
+from analytics_project.schemas import RAW_FILES, SCHEMAS, csv_options, read_raw_csv, standard_name
+from analytics_project.utils_logger import logger, project_root
+
+RAW_DIR = project_root / "data" / "raw"
+
+
+def test_every_raw_column_is_registered():
+    for file_name, dataset in RAW_FILES.items():
+        header = pd.read_csv(RAW_DIR / file_name, nrows=0).columns
+        assert {standard_name(col) for col in header} == set(SCHEMAS[dataset].columns)
+
+
+def test_unregistered_columns_are_logged(tmp_path, isolated_logger):
+    path = tmp_path / "sales_data.csv"
+    path.write_text("TransactionID,SaleAmount,Note\n1,10.5,gift\n", encoding="utf-8")
+
+    assert csv_options(path, "sales")["usecols"] == ["TransactionID", "SaleAmount"]
+    logger.complete()  # the file sink writes from a queue
+    assert "not read: ['Note']" in isolated_logger.read_text(encoding="utf-8")
+
+
+def test_dirty_ids_become_missing(tmp_path, isolated_logger):
+    path = tmp_path / "sales_data.csv"
+    path.write_text(
+        "TransactionID,StoreID,CampaignID\n1,401,0\n2,402,abc\n3,99999,300\n4,,1\n",
+        encoding="utf-8",
+    )
+
+    df = read_raw_csv(path, "sales")
+    assert str(df["CampaignID"].dtype) == "Int8"
+    assert df["CampaignID"].tolist() == [0, pd.NA, pd.NA, 1]
+    assert df["StoreID"].tolist() == [401, 402, pd.NA, pd.NA]
+    logger.complete()
+    log = isolated_logger.read_text(encoding="utf-8")
+    assert "CampaignID: 2 values are not valid Int8" in log
+    assert "StoreID: 1 values are not valid Int16" in log
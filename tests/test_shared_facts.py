@@ -0,0 +1,43 @@
+"""Test the shared-memory sales fact and its worker fan-out.
+
+Module Information:
+    - Filename: test_shared_facts.py
+    - Module: test_shared_facts
+    - Location: tests/
+
+Workers attached by name must aggregate the same totals as pandas, and the
+block must be gone once its owner leaves the ``with`` block.
+"""
+
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from analytics_project.shared_facts import SHM_DIR, SharedFacts, group_sum
+
+
+def test_workers_aggregate_shared_block(tmp_path):
+    sales = pd.DataFrame(
+        {
+            "transactionid": range(1, 9),
+            "storeid": [401, 402, 401, None, 403, 402, 401, 401],
+            "saleamount": [10.0, 5.5, None, 2.0, 1.0, "Unknown", 3.0, 4.0],
+            "paymenttype": ["Cash", "Card", "Cash", None, "Venmo", "Card", "Card", "Cash"],
+        }
+    )
+    with SharedFacts.from_frame(sales) as facts:
+        name = facts.layout.shm_name
+        assert facts.arrays["storeid"].tolist() == [401, 402, 401, -1, 403, 402, 401, 401]
+        assert facts.decode("paymenttype").isna().sum() == 1
+
+        by_payment = group_sum(facts, "paymenttype", "saleamount", workers=2)
+        by_store = group_sum(facts, "storeid", "saleamount", workers=1)
+
+    amounts = pd.to_numeric(sales["saleamount"], errors="coerce")
+    expected = amounts.groupby(sales["paymenttype"]).sum()
+    np.testing.assert_allclose(by_payment.to_numpy(), expected.sort_index().to_numpy())
+    assert list(by_payment.index) == sorted(expected.index)
+    assert by_store.to_dict() == {401: 17.0, 402: 5.5, 403: 1.0}
+    if SHM_DIR.is_dir():
+        assert not pathlib.Path(SHM_DIR, name).exists()
@@ -0,0 +1,37 @@
+"""Test the streaming sketches behind outlier bounds.
+
+Module Information:
+    - Filename: test_sketches.py
+    - Module: test_sketches
+    - Location: tests/
+
+Sketches fed in chunks, or built separately and merged, must agree with
+exact statistics over the whole column.
+"""
+
+import numpy as np
+
+from analytics_project.sketches import KLLSketch, Moments
+
+
+def test_merged_sketches_match_exact_statistics():
+    values = np.random.default_rng(3).lognormal(5, 1, 200_000)
+    values[::1000] = np.nan
+
+    left, right = KLLSketch(), KLLSketch(seed=1)
+    left_moments, right_moments = Moments(), Moments()
+    for chunk in np.array_split(values[:120_000], 7):
+        left.update(chunk)
+        left_moments.update(chunk)
+    right.update(values[120_000:])
+    right_moments.update(values[120_000:])
+    left.merge(right)
+    left_moments.merge(right_moments)
+
+    observed = np.sort(values[~np.isnan(values)])
+    assert left.count == len(observed)
+    qs = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+    ranks = np.searchsorted(observed, left.quantile(qs)) / len(observed)
+    assert np.all(np.abs(ranks - qs) < 0.01)
+    assert np.isclose(left_moments.mean, observed.mean())
+    assert np.isclose(left_moments.std, observed.std(ddof=1))
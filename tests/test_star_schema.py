@@ -0,0 +1,91 @@
+"""Test the star-schema build.
+
+Module Information:
+    - Filename: test_star_schema.py
+    - Module: test_star_schema
+    - Location: tests/
+
+Rebuilding from smaller prepared files must drop the facts that left them,
+sales without dates must not break the calendar, and the report queries
+must be answered through the fact indexes.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from analytics_project.run_queries import split_queries
+from analytics_project.star_schema import SQL_DIR, build_dates, build_star_schema
+
+SALES = pd.DataFrame(
+    {
+        "transactionid": [1, 2, 3],
+        "saledate": ["5/4/2025", "5/6/2025", None],
+        "customerid": [1000, 1001, 1000],
+        "productid": [2000, 2000, 2001],
+        "storeid": [401, 402, 401],
+        "campaignid": [0, 1, 0],
+        "saleamount": [100.0, 50.0, 20.0],
+        "discountpercent": [10, 0, 5],
+        "paymenttype": ["Cash", "Card", "Cash"],
+    }
+)
+
+
+def _prepare(folder, sales):
+    folder.mkdir(exist_ok=True)
+    pd.DataFrame(
+        {
+            "customerid": [1000, 1001],
+            "firstname": ["Robert Gomez", "John Silva"],
+            "region": ["West", "East"],
+            "dateenrolled": ["2/25/2024", "12/1/2020"],
+            "loyaltypoints": [405.0, 450.0],
+            "preferredcontact": ["Phone", "Email"],
+        }
+    ).to_csv(folder / "customers_prepared.csv", index=False)
+    pd.DataFrame(
+        {
+            "productid": [2000, 2001],
+            "productname": ["Laptop", "Jacket"],
+            "category": ["Electronics", "Clothing"],
+            "unitprice": [969.31, 412.35],
+            "stockquantity": [78.0, 93.0],
+            "category.1": ["SupplierB", "SupplierC"],
+        }
+    ).to_csv(folder / "products_prepared.csv", index=False)
+    sales.to_csv(folder / "sales_prepared.csv", index=False)
+
+
+def test_rebuild_prunes_stale_facts(tmp_path):
+    db = tmp_path / "smart_sales.db"
+    _prepare(tmp_path / "prepared", SALES)
+    build_star_schema(db, tmp_path / "prepared")
+    _prepare(tmp_path / "prepared", SALES[SALES["transactionid"] != 2])
+    build_star_schema(db, tmp_path / "prepared")
+
+    with sqlite3.connect(db) as conn:
+        facts = conn.execute("SELECT sale_id, date_id FROM sales ORDER BY sale_id").fetchall()
+        days = conn.execute("SELECT COUNT(*) FROM dates").fetchone()[0]
+    conn.close()
+    assert facts == [(1, 20250504), (3, None)]
+    assert days == 3
+
+
+def test_calendar_is_empty_without_dated_sales():
+    dates = build_dates(pd.Series(pd.NaT, index=range(2), dtype="datetime64[ns]"))
+    assert dates.empty
+
+
+def test_report_queries_use_the_fact_indexes(tmp_path):
+    db = tmp_path / "smart_sales.db"
+    _prepare(tmp_path / "prepared", SALES)
+    build_star_schema(db, tmp_path / "prepared")
+
+    queries = split_queries((SQL_DIR / "star_queries.sql").read_text(encoding="utf-8"))
+    with sqlite3.connect(db) as conn:
+        for sql in queries:
+            plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            assert "USING COVERING INDEX idx_sales_" in plan, plan
+    conn.close()
+    assert len(queries) == 3
@@ -0,0 +1,44 @@
+"""Test the synthetic raw data generator used by the benchmark.
+
+Module Information:
+    - Filename: test_synthetic_data.py
+    - Module: test_synthetic_data
+    - Location: tests/
+
+Scale 1 must produce files shaped like data/raw: the shipped row counts
+(plus the injected duplicates) and the same headers, including the
+repeated ``Category`` header of the products file.
+"""
+
+import csv
+import pathlib
+
+from analytics_project.synthetic_data import BASE_ROWS, generate
+
+RAW_DIR = pathlib.Path(__file__).resolve().parents[1] / "data" / "raw"
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        header, *rows = csv.reader(f)
+    return header, rows
+
+
+def test_scale_one_matches_shipped_layout(tmp_path):
+    written = generate(1, tmp_path, seed=0, chunk_rows=700)
+
+    for name, base in BASE_ROWS.items():
+        header, rows = _read(tmp_path / f"{name}_data.csv")
+        assert written[name] == len(rows)
+        # Duplicates are appended on top of the base rows, at a 0.1% rate
+        assert base <= len(rows) <= base * 1.01 + 2
+        assert header == _read(RAW_DIR / f"{name}_data.csv")[0]
+
+    header, rows = _read(tmp_path / "products_data.csv")
+    assert header == [
+        "ProductID", "ProductName", "Category", "UnitPrice", "StockQuantity", "Category",
+    ]  # fmt: skip
+    assert all(len(row) == len(header) for row in rows)
+    # Sales chunks share one header and continue the transaction ids
+    _, sales = _read(tmp_path / "sales_data.csv")
+    assert {int(row[0]) for row in sales} == set(range(1, BASE_ROWS["sales"] + 1))
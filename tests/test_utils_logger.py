@@ -11,6 +11,7 @@ Testing logging is important because:
     - Good tests ensure logs work when you need them most
 """
 
+import json
 from pathlib import Path
 from analytics_project import utils_logger
 
@@ -66,3 +67,50 @@ def test_logger_creates_log_file():
 
     # Check log file exists
     assert log_path.parent.exists(), "Log directory not created"
+
+
+def test_log_dir_moves_log_and_metrics(isolated_logger, monkeypatch):
+    """Verify the configured log_dir is where the log and the metrics go."""
+    monkeypatch.delenv(utils_logger.METRICS_ENV_VAR)
+    assert utils_logger.get_log_file_path() == isolated_logger
+    assert utils_logger.init_logger() == isolated_logger
+    assert utils_logger.get_metrics_file_path() == isolated_logger.with_name("metrics.jsonl")
+
+
+def test_timed_stage_writes_metrics(tmp_path, monkeypatch):
+    """Verify timed stages record rows and append JSON metrics for the run."""
+    metrics_file = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv(utils_logger.METRICS_ENV_VAR, str(metrics_file))
+    monkeypatch.setenv(utils_logger.PROFILE_ENV_VAR, "memory")
+
+    @utils_logger.timed_stage("decorated")
+    def build() -> int:
+        return sum(range(1000)) and 42
+
+    assert build() == 42
+    with utils_logger.timed_stage("block") as stage:
+        stage.rows = 7
+
+    records = utils_logger.read_metrics(path=metrics_file)
+    assert [(r["stage"], r["rows"]) for r in records] == [("decorated", 42), ("block", 7)]
+    assert all(r["wall_seconds"] >= 0 and r["traced_peak_mb"] is not None for r in records)
+
+
+def test_batched_json_sink_and_sampling(tmp_path):
+    """Verify fast-mode records are batched as JSON and sampled messages are thinned."""
+    log_file = tmp_path / "fast.log"
+    sink = utils_logger.BatchedFileSink(log_file, batch_size=100, json_lines=True)
+    handler = utils_logger.logger.add(sink, level="INFO", format="{message}")
+    try:
+        for i in range(10):
+            utils_logger.log_sampled("INFO", "Batch {} done", i, every=5)
+        assert not log_file.exists()  # still buffered
+        utils_logger.flush_logs()
+    finally:
+        utils_logger.logger.remove(handler)
+
+    lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [line["message"] for line in lines] == [
+        "Batch 0 done",
+        "Batch 5 done (4 similar messages skipped)",
+    ]